@@ -36,11 +36,53 @@
 from haiku.environment import Environment
 builtinEnvironment = Environment()
 
+# The built-in procedures whose results depend on nothing but their arguments,
+# and which have no side effects. An application of one of these to constant
+# arguments may be replaced by its result ahead of time (see
+# `haiku.vm.fold_constants()`):
+pureBuiltins = set()
+
+# Special forms, by name. The arguments of an application of a special form
+# are not evaluated before the call: instead the evaluator calls the function
+# registered for its name as `form(evaluate, proc, args, environment)`, with
+# the procedure the name is bound to, the unevaluated arguments, and the
+# environment of the application, in which the form may evaluate whichever
+# of its arguments it needs to with `evaluate(expression, environment)`.
+specialForms = {}
+
+def special_form(name):
+  "Returns the special form registered for `name`, or None."
+  try:
+    return specialForms.get(name)
+  except TypeError:
+    # Unhashable, so not a name:
+    return None
+
+class TailCall(object):
+  """May be returned by a special form in place of its value, when that is the
+  value of `expression` in `environment` (the branch taken by a conditional,
+  for instance): the caller of the form evaluates the expression instead,
+  which `BaseInterpreter.evaluate()` does without nesting a Python frame, so
+  that calls in tail position run in constant stack."""
+  __slots__ = ('expression', 'environment')
+
+  def __init__(self, expression, environment):
+    self.expression, self.environment = expression, environment
+
+def call_special_form(form, evaluate, proc, args, environment):
+  """Calls a special form as `form(evaluate, proc, args, environment)`, and
+  returns its value, evaluating any tail call it returns with `evaluate`."""
+  value = form(evaluate, proc, args, environment)
+  if value.__class__ is TailCall:
+    return evaluate(value.expression, value.environment)
+  return value
+
 from .base64_   import *
 from .constant  import *
 from .operator_ import *
 from .pickle    import *
 from .quote     import *
+from .special   import *
 from .string_   import *
 from .types     import *
 
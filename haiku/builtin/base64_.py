@@ -39,7 +39,7 @@ from base64 import (
   urlsafe_b64encode as b64encode,
   urlsafe_b64decode as b64decode)
 
-from haiku.builtin import builtinEnvironment
+from haiku.builtin import builtinEnvironment, pureBuiltins
 from haiku.types import *
 __all__ = []
 
@@ -48,22 +48,26 @@ __all__ = []
 _b64encode, _b64decode = map(Symbol,
 'b64encode   b64decode'.split())
 
-builtinEnvironment[_b64encode] = Procedure(
+builtinEnvironment[_b64encode] = NativeProcedure(
   params      = Tuple([(1, SymbolCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:b64encode(env[1]),
+  function    = b64encode,
 )
 
-builtinEnvironment[_b64decode] = Procedure(
+builtinEnvironment[_b64decode] = NativeProcedure(
   params      = Tuple([(1, SymbolCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:b64decode(env[1]),
+  function    = b64decode,
 )
 
+# ===----------------------------------------------------------------------===
+
+pureBuiltins.update(builtinEnvironment[symbol] for symbol in (
+  _b64encode, _b64decode,
+))
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
@@ -37,7 +37,7 @@
 
 import operator
 
-from haiku.builtin import builtinEnvironment
+from haiku.builtin import builtinEnvironment, pureBuiltins
 from haiku.pickle import CanonicalExpressionPickler
 from haiku.types import *
 __all__ = []
@@ -49,47 +49,43 @@ _and, _or, _xor, _not = map(Symbol,
 
 from operator import and_, or_, xor, not_
 
-builtinEnvironment[_and] = Procedure(
+builtinEnvironment[_and] = NativeProcedure(
   params      = Tuple([
       (1, IntegerCompatible),
       (2, IntegerCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:and_(env[1], env[2]),
+  function    = and_,
 )
 
-builtinEnvironment[_or] = Procedure(
+builtinEnvironment[_or] = NativeProcedure(
   params      = Tuple([
       (1, IntegerCompatible),
       (2, IntegerCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:or_(env[1], env[2]),
+  function    = or_,
 )
 
-builtinEnvironment[_xor] = Procedure(
+builtinEnvironment[_xor] = NativeProcedure(
   params      = Tuple([
       (1, IntegerCompatible),
       (2, IntegerCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:xor(env[1], env[2]),
+  function    = xor,
 )
 
-builtinEnvironment[_not] = Procedure(
+builtinEnvironment[_not] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:not_(env[1]),
+  function    = not_,
 )
 
 # ===----------------------------------------------------------------------===
@@ -99,14 +95,13 @@ _inv, _shift, _rotate = map(Symbol,
 
 from operator import inv
 
-builtinEnvironment[_inv] = Procedure(
+builtinEnvironment[_inv] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:inv(env[1]),
+  function    = inv,
 )
 
 # ===----------------------------------------------------------------------===
@@ -116,75 +111,70 @@ _abs, _add, _sub, _div, _mul, _divmod, _pow = map(Symbol,
 
 from operator import add, sub, mul, truediv
 
-builtinEnvironment[_add] = Procedure(
+builtinEnvironment[_add] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:add(env[1], env[2]),
+  function    = add,
 )
 
-builtinEnvironment[_sub] = Procedure(
+builtinEnvironment[_sub] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:sub(env[1], env[2]),
+  function    = sub,
 )
 
-def __div(eval_, env):
-  if (isinstance(env[1], IntegerCompatible) and
-      isinstance(env[2], IntegerCompatible)):
-    return Fraction(env[1], env[2])
+def __div(a, b):
+  if (isinstance(a, IntegerCompatible) and
+      isinstance(b, IntegerCompatible)):
+    return Fraction(a, b)
   else:
-    return truediv(env[1], env[2])
-builtinEnvironment[_div] = Procedure(
+    return truediv(a, b)
+builtinEnvironment[_div] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = __div,
+  function    = __div,
 )
 
-builtinEnvironment[_mul] = Procedure(
+builtinEnvironment[_mul] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:mul(env[1], env[2]),
+  function    = mul,
 )
 
-builtinEnvironment[_divmod] = Procedure(
+builtinEnvironment[_divmod] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:Tuple(zip(
+  function    = lambda a,b:Tuple(zip(
                   ('quotient', 'remainder'),
-                  divmod(env[1], env[2]))),
+                  divmod(a, b))),
 )
 
-def __pow(eval_, env):
-  if 3 in env and env[3]:
-    return pow(env[1], env[2], env[3])
+def __pow(a, b, modulus):
+  if modulus:
+    return pow(a, b, modulus)
   else:
-    return pow(env[1], env[2])
-builtinEnvironment[_pow] = Procedure(
+    return pow(a, b)
+builtinEnvironment[_pow] = NativeProcedure(
   params      = Tuple([
       (1, FractionCompatible),
       (2, FractionCompatible),
@@ -193,9 +183,8 @@ builtinEnvironment[_pow] = Procedure(
   defaults    = Tuple([
       (3, Fraction(0,1))
     ]),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = __pow,
+  function    = __pow,
 )
 
 # ===----------------------------------------------------------------------===
@@ -203,72 +192,74 @@ builtinEnvironment[_pow] = Procedure(
 _lt, _le, _eq, _ne, _ge, _gt = map(Symbol,
 ' <   <=    =   !=   >=    >'.split())
 
-builtinEnvironment[_lt] = Procedure(
+builtinEnvironment[_lt] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.lt(env[1], env[2]),
+  function    = operator.lt,
 )
 
-builtinEnvironment[_le] = Procedure(
+builtinEnvironment[_le] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.le(env[1], env[2]),
+  function    = operator.le,
 )
 
-builtinEnvironment[_eq] = Procedure(
+builtinEnvironment[_eq] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.eq(env[1], env[2]),
+  function    = operator.eq,
 )
 
-builtinEnvironment[_ne] = Procedure(
+builtinEnvironment[_ne] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.ne(env[1], env[2]),
+  function    = operator.ne,
 )
 
-builtinEnvironment[_gt] = Procedure(
+builtinEnvironment[_gt] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.gt(env[1], env[2]),
+  function    = operator.gt,
 )
 
-builtinEnvironment[_ge] = Procedure(
+builtinEnvironment[_ge] = NativeProcedure(
   params      = Tuple([
       (1, AlphaCompatible),
       (2, AlphaCompatible),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:operator.ge(env[1], env[2]),
+  function    = operator.ge,
 )
 
+# ===----------------------------------------------------------------------===
+
+pureBuiltins.update(builtinEnvironment[symbol] for symbol in (
+  _and, _or, _xor, _not, _inv,
+  _add, _sub, _div, _mul, _divmod, _pow,
+  _lt, _le, _eq, _ne, _ge, _gt,
+))
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
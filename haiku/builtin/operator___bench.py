@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.builtin.operator___bench --------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Calls to the builtins of `haiku.builtin.operator_`, which are native
+procedures, versus the same calls made through a `Procedure` which binds its
+arguments in a new environment, and versus calling the underlying Python
+function; directly, and through `BaseInterpreter.evaluate()`. Run with:
+
+  python -m haiku.builtin.operator___bench
+"""
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, benchmarking harness
+from haiku.utils.benchmark import measure, report
+
+RULES = [
+  (u"+",      Tuple([(1, 1), (2, 2)])),
+  (u"/",      Tuple([(1, 1), (2, 3)])),
+  (u"pow",    Tuple([(1, 2), (2, 10)])),
+  (u"<",      Tuple([(1, 1), (2, 2)])),
+]
+
+def environment_call(native):
+  "Returns a `Procedure` calling `native`'s function from an environment."
+  return Procedure(
+    params      = native.params,
+    defaults    = native.defaults,
+    ellipsis    = False,
+    environment = native.environment,
+    body        = native.body)
+
+def main():
+  interpreter = BaseInterpreter(
+    pickler     = SimpleExpressionPickler(),
+    environment = Environment(parent=builtinEnvironment))
+  evaluate = interpreter.evaluate
+  for name, args in RULES:
+    native = builtinEnvironment[Symbol(name)]
+    proc = environment_call(native)
+    values = [args[key] for key in sorted(args)]
+    if name == u"pow":
+      values.append(0)
+    function = native.function
+    expression = Tuple([(0, Symbol(name))] + args.items())
+    environment = Environment(parent=builtinEnvironment)
+    environment[Symbol(name)] = proc
+    report(u"[%s %s]" % (name, u" ".join(map(unicode, values))), [
+      (u"Procedure",       measure(lambda:proc(evaluate, args)),
+       1, u"calls"),
+      (u"NativeProcedure", measure(lambda:native(evaluate, args)),
+       1, u"calls"),
+      (u"Python function", measure(lambda:function(*values)),
+       1, u"calls"),
+      (u"evaluate(), Procedure",
+       measure(lambda:evaluate(expression, environment)),
+       1, u"calls"),
+      (u"evaluate(), NativeProcedure", measure(lambda:evaluate(expression)),
+       1, u"calls")])
+
+if __name__ == '__main__':
+  main()
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
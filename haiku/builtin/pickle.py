@@ -42,25 +42,25 @@ __all__ = []
 
 # ===----------------------------------------------------------------------===
 
-pickler = CanonicalExpressionPickler()
+# Pickled values are frequently immutable structures passed around and pickled
+# again, so the encodings of up to 4MiB of tuples are cached:
+pickler = CanonicalExpressionPickler(cache_size=2**22)
 
 _pickle, _unpickle = map(Symbol,
 'pickle   unpickle'.split())
 
-pickle = Procedure(
+pickle = NativeProcedure(
   params      = Tuple([(1, AlphaCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:pickler.dumps(env[1]),
+  function    = pickler.dumps,
 )
 
-unpickle = Procedure(
+unpickle = NativeProcedure(
   params      = Tuple([(1, SymbolCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:pickler.loads(env[1]),
+  function    = pickler.loads,
 )
 
 # ===----------------------------------------------------------------------===
@@ -35,7 +35,7 @@
 
 ""
 
-from haiku.builtin import builtinEnvironment
+from haiku.builtin import builtinEnvironment, specialForms
 from haiku.types import *
 __all__ = []
 
@@ -45,19 +45,35 @@ _quote, _unquote, _unquote_splice = map(Symbol,
 'quote   unquote   unquote-splice'.split())
 
 def do_quote(eval_, env, obj, level=0):
-  def quote(key, value):
-    if isinstance(value, TupleCompatible) and 0 in value:
-      if value[0] in (_quote,):
-        return (key, do_quote(eval_, env, value, level+1))
-      if value[0] in (_unquote, _unquote_splice):
-        if level:
-          return (key, do_quote(eval_, env, value, level-1))
-        else:
-          return (key, eval_(value, env))
-    return (key, value)
-  if isinstance(obj, TupleCompatible):
-    obj = Tuple([quote(key, value) for key, value in obj.items()])
-  return obj
+  """Returns the quotation of `obj` at quasi-quotation `level`: nested quote
+  forms raise the level and unquote forms lower it, and an unquote form at
+  level zero is replaced by its value. Nested forms are walked with an
+  explicit stack, so that their depth is limited by memory alone."""
+  if not isinstance(obj, TupleCompatible):
+    return obj
+  # Each frame holds the items of a tuple still to be quoted, its level, the
+  # items quoted so far, and the key under which it appears in its parent:
+  stack = [(iter(obj.items()), level, [], None)]
+  while True:
+    items, level, quoted, parent_key = stack[-1]
+    for key, value in items:
+      if isinstance(value, TupleCompatible) and 0 in value:
+        if value[0] in (_quote,):
+          stack.append((iter(value.items()), level+1, [], key))
+          break
+        if value[0] in (_unquote, _unquote_splice):
+          if level:
+            stack.append((iter(value.items()), level-1, [], key))
+            break
+          else:
+            quoted.append((key, eval_(value, env)))
+            continue
+      quoted.append((key, value))
+    else:
+      stack.pop()
+      if not stack:
+        return Tuple(quoted)
+      stack[-1][2].append((parent_key, Tuple(quoted)))
 builtinEnvironment[_quote] = Procedure(
   params      = Tuple([(1, AlphaCompatible)]),
   defaults    = Tuple(),
@@ -66,6 +82,15 @@ builtinEnvironment[_quote] = Procedure(
   body        = lambda eval_,env:do_quote(eval_,env,env[1]),
 )
 
+# The arguments of a quotation are passed through unevaluated, unless its name
+# is bound to another procedure, which is applied as any other:
+def quote_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_quote]:
+    args = Tuple([(key, eval_(value, env))
+                  for key, value in args.iteritems()])
+  return proc(eval_, args)
+specialForms[_quote] = quote_form
+
 def do_unquote(eval_, env):
   raise SyntaxError(
     u"unquote not allowed outside of enclosing quote")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.builtin.quote__test -------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+from haiku.builtin.quote import do_quote
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, s-expression pickler
+from haiku.pickle import CanonicalExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+class TestQuote(unittest2.TestCase):
+  "Test quasi-quotation by `do_quote()`, including deeply nested forms."
+  def setUp(self):
+    self.environment = Environment(parent=builtinEnvironment)
+    self.environment[Symbol('x')] = 42
+    self.evaluate = lambda expression, environment:(
+      environment.resolve(expression[1])[expression[1]])
+
+  def quote(self, obj):
+    return Tuple([(0, Symbol('quote')), (1, obj)])
+
+  def unquote(self, obj):
+    return Tuple([(0, Symbol('unquote')), (1, obj)])
+
+  def test_levels(self):
+    obj = Tuple([(0, Symbol('f')), (1, self.unquote(Symbol('x')))])
+    self.assertEqual(do_quote(self.evaluate, self.environment, obj),
+      Tuple([(0, Symbol('f')), (1, 42)]))
+    # An unquote within a nested quote is left alone:
+    obj = Tuple([(0, Symbol('f')), (1, self.quote(self.unquote(Symbol('x'))))])
+    self.assertEqual(do_quote(self.evaluate, self.environment, obj), obj)
+    self.assertEqual(do_quote(self.evaluate, self.environment, Symbol('x')),
+      Symbol('x'))
+
+  def test_deep(self):
+    # Quotes and unquotes nested far deeper than the recursion limit, with the
+    # innermost unquote at level zero. The results are compared by their
+    # serialization, as comparing them directly would recurse.
+    depth = 10000
+    obj, expected = self.unquote(Symbol('x')), 42
+    for wrap in [self.unquote] * depth + [self.quote] * depth:
+      obj, expected = wrap(obj), wrap(expected)
+    obj      = Tuple([(0, Symbol('f')), (1, obj)])
+    expected = Tuple([(0, Symbol('f')), (1, expected)])
+    pickler = CanonicalExpressionPickler()
+    self.assertEqual(
+      pickler.dumps(do_quote(self.evaluate, self.environment, obj)),
+      pickler.dumps(expected))
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.builtin.special -----------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+""
+
+from haiku.builtin import (
+  TailCall, builtinEnvironment, special_form, specialForms)
+from haiku.environment import LoopFrame, Signature
+from haiku.types import *
+__all__ = []
+
+# ===----------------------------------------------------------------------===
+
+# Conditionals and boolean operators evaluate only those of their arguments
+# which they need to, as special forms (see `haiku.builtin.specialForms`).
+# The procedures bound to their names take evaluated arguments, as any other
+# procedure, for when they are applied under another name. The branch taken,
+# or the last argument evaluated, is in tail position, and is returned as a
+# tail call for the evaluator to evaluate in place of the form.
+
+_if, _and, _or, _cond = map(Symbol,
+'if   and   or   cond'.split())
+
+def _positional(args):
+  """Returns the number of arguments in `args`, raising `TypeError` if any of
+  them is not positional."""
+  extra = filter(lambda key:key not in xrange(1, len(args)+1), args.keys())
+  if extra:
+    raise TypeError(
+      u"got unexpected argument(s) %s" % u", ".join(map(repr, extra)))
+  return len(args)
+
+def _apply(eval_, proc, args, env):
+  """Applies `proc` to the values of `args`, as for any procedure: the name of
+  a special form may be bound to something else in the environment of its
+  application."""
+  return proc(eval_, Tuple([(key, eval_(value, env))
+                            for key, value in args.iteritems()]))
+
+# ===----------------------------------------------------------------------===
+
+# [if condition consequent alternative], where the alternative defaults to
+# #nil:
+builtinEnvironment[_if] = NativeProcedure(
+  params      = Tuple([
+      (1, AlphaCompatible),
+      (2, AlphaCompatible),
+      (3, AlphaCompatible),
+    ]),
+  defaults    = Tuple([
+      (3, None),
+    ]),
+  environment = builtinEnvironment,
+  function    = lambda condition,consequent,alternative:
+                  consequent if condition else alternative,
+)
+
+_if_signature = Signature(
+  builtinEnvironment[_if].params,
+  builtinEnvironment[_if].defaults,
+  False)
+
+def if_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_if]:
+    return _apply(eval_, proc, args, env)
+  if not (1 in args and 2 in args and len(args) <= 2 + (3 in args)):
+    # Raises the error the procedure would:
+    _if_signature.bind(args)
+  if eval_(args[1], env):
+    return TailCall(args[2], env)
+  elif 3 in args:
+    return TailCall(args[3], env)
+  return None
+specialForms[_if] = if_form
+
+# ===----------------------------------------------------------------------===
+
+# [and ...] is the first of its arguments which is false, or the last, or
+# #t if there are none:
+def do_and(eval_, env):
+  value = True
+  for key in xrange(1, _positional(env) + 1):
+    value = env[key]
+    if not value:
+      break
+  return value
+builtinEnvironment[_and] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_and,
+)
+
+def and_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_and]:
+    return _apply(eval_, proc, args, env)
+  count = _positional(args)
+  for key in xrange(1, count):
+    value = eval_(args[key], env)
+    if not value:
+      return value
+  if count:
+    return TailCall(args[count], env)
+  return True
+specialForms[_and] = and_form
+
+# [or ...] is the first of its arguments which is true, or the last, or #f if
+# there are none:
+def do_or(eval_, env):
+  value = False
+  for key in xrange(1, _positional(env) + 1):
+    value = env[key]
+    if value:
+      break
+  return value
+builtinEnvironment[_or] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_or,
+)
+
+def or_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_or]:
+    return _apply(eval_, proc, args, env)
+  count = _positional(args)
+  for key in xrange(1, count):
+    value = eval_(args[key], env)
+    if value:
+      return value
+  if count:
+    return TailCall(args[count], env)
+  return False
+specialForms[_or] = or_form
+
+# ===----------------------------------------------------------------------===
+
+# [cond test1 value1 test2 value2 ... default] is the value following the
+# first test which is true, or else the default, if the number of arguments
+# is odd, or #nil:
+def do_cond(eval_, env):
+  count = _positional(env)
+  for key in xrange(1, count, 2):
+    if env[key]:
+      return env[key+1]
+  if count % 2:
+    return env[count]
+  return None
+builtinEnvironment[_cond] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_cond,
+)
+
+def cond_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_cond]:
+    return _apply(eval_, proc, args, env)
+  count = _positional(args)
+  for key in xrange(1, count, 2):
+    if eval_(args[key], env):
+      return TailCall(args[key+1], env)
+  if count % 2:
+    return TailCall(args[count], env)
+  return None
+specialForms[_cond] = cond_form
+
+# ===----------------------------------------------------------------------===
+
+# Iteration. [loop body 'var:init ...] binds each variable to the value of its
+# initial expression, in a frame of its own, and evaluates the body in it. If
+# the body evaluates to [recur 'var:value ...] the variables named are rebound
+# to the new values, in place, and the body is evaluated again; otherwise its
+# value is that of the loop:
+#
+#   [loop [if [= n 0] acc [recur 'n:[- n 1] 'acc:[* acc n]]] 'n:10 'acc:1]
+#
+# [while test body result 'var:init ...] evaluates the body for as long as
+# the test is true, rebinding the variables whenever the body evaluates to a
+# recur form, and then evaluates to the result (#nil if omitted):
+#
+#   [while [< i 10] [recur 'i:[+ i 1] 'sum:[+ sum i]] sum 'i:0 'sum:0]
+#
+# A recur form is only allowed in tail position within the body of a loop,
+# so that the iterations run in a flat Python loop and in constant stack.
+
+_loop, _while, _recur, _quote = map(Symbol,
+'loop   while   recur   quote'.split())
+
+class Recur(object):
+  "The value of a recur form: the new bindings of the variables of a loop."
+  __slots__ = ('bindings',)
+
+  def __init__(self, bindings):
+    self.bindings = bindings
+
+def check_recur(expression, tail=True):
+  """Raises `SyntaxError` if `expression`, evaluated in the frame of a loop
+  (and in tail position within its body, if `tail` is true) has a recur form
+  anywhere other than in tail position. The bodies of nested loops are
+  checked when those are evaluated."""
+  stack = [(expression, tail)]
+  while stack:
+    expression, tail = stack.pop()
+    if isinstance(expression, (SequenceCompatible, SetCompatible)):
+      stack.extend((value, False) for value in expression)
+      continue
+    if not isinstance(expression, TupleCompatible) or 0 not in expression:
+      continue
+    name = special_form(expression[0]) and expression[0]
+    if name in (_recur,) and not tail:
+      raise SyntaxError(
+        u"recur not allowed outside of tail position")
+    # Only the branches of conditionals are themselves in tail position:
+    if name in (_if,):
+      tails = (2, 3)
+    elif name in (_and, _or):
+      tails = (len(expression) - 1,)
+    elif name in (_cond,):
+      tails = range(2, len(expression), 2)
+      if len(expression) % 2 == 0:
+        tails.append(len(expression) - 1)
+    else:
+      tails = ()
+    for key, value in expression.iteritems():
+      if name in (_quote,) and key != 0:
+        continue
+      # Only the initial values of the variables of a nested loop, under
+      # keys which are not positions, belong to this one:
+      if name in (_loop, _while) and isinstance(key, IntegerCompatible):
+        continue
+      stack.append((value, key in tails))
+
+def _iteration(eval_, args, env, positional, required):
+  """Checks the arguments of an iteration form, which takes `positional`
+  arguments, the first `required` of them required and the last of those
+  its body, and returns its frame, with its variables bound to their initial
+  values."""
+  extra = filter(lambda key:not isinstance(key, SymbolCompatible) and
+                            key not in positional, args.keys())
+  if extra:
+    raise TypeError(
+      u"got unexpected argument(s) %s" % u", ".join(map(repr, extra)))
+  missing = filter(lambda key:key not in args, positional[:required])
+  if missing:
+    raise TypeError(
+      u"missing required argument(s): %s" % u", ".join(map(repr, missing)))
+  for key in positional:
+    if key in args:
+      check_recur(args[key], key == positional[required-1])
+  return LoopFrame([(key, eval_(value, env))
+                    for key, value in args.iteritems()
+                    if isinstance(key, SymbolCompatible)], env)
+
+def do_iteration(eval_, env):
+  raise SyntaxError(
+    u"iteration forms cannot be applied to evaluated arguments")
+
+builtinEnvironment[_loop] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_iteration,
+)
+
+def loop_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_loop]:
+    return _apply(eval_, proc, args, env)
+  frame = _iteration(eval_, args, env, (1,), 1)
+  body = args[1]
+  while True:
+    value = eval_(body, frame)
+    if value.__class__ is not Recur:
+      return value
+    frame.rebind(value.bindings)
+specialForms[_loop] = loop_form
+
+builtinEnvironment[_while] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_iteration,
+)
+
+def while_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_while]:
+    return _apply(eval_, proc, args, env)
+  frame = _iteration(eval_, args, env, (1, 2, 3), 2)
+  test, body = args[1], args[2]
+  while eval_(test, frame):
+    value = eval_(body, frame)
+    if value.__class__ is Recur:
+      frame.rebind(value.bindings)
+  if 3 in args:
+    return TailCall(args[3], frame)
+  return None
+specialForms[_while] = while_form
+
+def do_recur(eval_, env):
+  raise SyntaxError(
+    u"recur not allowed outside of enclosing loop")
+builtinEnvironment[_recur] = Procedure(
+  params      = Tuple(),
+  defaults    = Tuple(),
+  ellipsis    = True,
+  environment = builtinEnvironment,
+  body        = do_recur,
+)
+
+def recur_form(eval_, proc, args, env):
+  if proc is not builtinEnvironment[_recur]:
+    return _apply(eval_, proc, args, env)
+  # Being in tail position, a recur form is evaluated in the very frame of
+  # its loop:
+  if env.__class__ is not LoopFrame:
+    do_recur(eval_, env)
+  extra = filter(lambda key:key not in env, args.keys())
+  if extra:
+    raise TypeError(
+      u"got unexpected argument(s) %s" % u", ".join(map(repr, extra)))
+  return Recur([(key, eval_(value, env)) for key, value in args.iteritems()])
+specialForms[_recur] = recur_form
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
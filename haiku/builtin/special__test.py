@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.builtin.special__test -----------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment, specialForms
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+# Haiku language, virtual machine
+from haiku.vm import Machine
+
+class TestSpecialForms(unittest2.TestCase):
+  """Test the conditionals `if`, `and`, `or` and `cond`, with each way of
+  evaluating an expression."""
+  def setUp(self):
+    self.pickler = SimpleExpressionPickler()
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(self.pickler,
+                                       environment=self.environment)
+    self.machine = Machine(self.interpreter)
+    self.engines = [
+      self.interpreter.evaluate,
+      lambda expression:self.interpreter.compile(expression)(),
+      self.machine.evaluate,
+    ]
+    # Counts its calls, so that it can be told which arguments are evaluated:
+    self.calls = []
+    def do_touch(eval_, env):
+      self.calls.append(env[1])
+      return env[1]
+    self.environment[Symbol('touch')] = Procedure(
+      params      = Tuple([(1, AlphaCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = do_touch,
+    )
+
+  def evaluate(self, lisp):
+    "Returns the values of `lisp` and the arguments touched, by engine."
+    results = []
+    expression = self.pickler.loads(lisp)[0]
+    for engine in self.engines:
+      del self.calls[:]
+      results.append((engine(expression), list(self.calls)))
+    return results
+
+  def assertEvaluates(self, lisp, value, calls):
+    for result in self.evaluate(lisp):
+      self.assertEqual(result, (value, calls))
+
+  def test_short_circuit(self):
+    self.assertEvaluates(u'[if [touch #t] [touch 1] [touch 2]]', 1, [True, 1])
+    self.assertEvaluates(u'[if [touch #f] [touch 1] [touch 2]]', 2, [False, 2])
+    self.assertEvaluates(u'[and [touch 1] [touch #f] [touch 3]]',
+      False, [1, False])
+    self.assertEvaluates(u'[or [touch #f] [touch 2] [touch 3]]', 2, [False, 2])
+    self.assertEvaluates(
+      u'[cond [touch #f] [touch 1] [touch #t] [touch 2] [touch 3]]',
+      2, [False, True, 2])
+    self.assertEvaluates(u'[cond [touch #f] [touch 1] [touch 3]]', 3, [False, 3])
+
+  def test_procedures(self):
+    # Bound to another name, the conditionals evaluate all of their arguments
+    # as any other procedure:
+    self.environment[Symbol('when')] = builtinEnvironment[Symbol('if')]
+    self.environment[Symbol('all')]  = builtinEnvironment[Symbol('and')]
+    self.assertEvaluates(u'[when [touch #f] [touch 1] [touch 2]]',
+      2, [False, 1, 2])
+    self.assertEvaluates(u'[when [touch #f] [touch 1]]', None, [False, 1])
+    self.assertEvaluates(u'[all [touch 1] [touch #f] [touch 3]]',
+      False, [1, False, 3])
+
+  def test_shadowed(self):
+    # Nor are their names special where they are bound to anything else:
+    self.environment[Symbol('if')] = builtinEnvironment[Symbol('or')]
+    self.assertEvaluates(u'[if [touch #f] [touch 1] [touch 2]]',
+      1, [False, 1, 2])
+    self.environment[Symbol('if')] = 1
+    for engine in self.engines:
+      self.assertRaises(self.interpreter.SyntaxError,
+        engine, self.pickler.loads(u'[if #t 1 2]')[0])
+    # Nor is that of quote:
+    self.environment[Symbol('quote')] = builtinEnvironment[Symbol('+')]
+    self.assertEvaluates(u'[quote [touch 1] [touch 2]]', 3, [1, 2])
+
+  def test_errors(self):
+    for lisp in (u'[if]', u'[if #t]', u'[if #t 1 2 3]', u"[and 1 'x:2]",
+                 u'[or 1 3:2]', u'[cond 2:1]'):
+      expression = self.pickler.loads(lisp)[0]
+      for engine in self.engines:
+        self.assertRaises(TypeError, engine, expression)
+
+  def test_native(self):
+    # The machine compiles the conditionals to jumps, and does not evaluate
+    # the branches not taken at all:
+    self.machine.reset_counts()
+    self.assertEqual(self.machine.evaluate(
+      self.pickler.loads(u'[if #f [+ 1 2] [cond #f [- 1 2] [or #f 3]]]')[0]),
+      3)
+    counts = self.machine.instruction_counts()
+    self.assertNotIn('APPLY', counts)
+    self.assertNotIn('SPECIAL', counts)
+
+  def test_registry(self):
+    self.assertEqual(
+      set([Symbol('quote'), Symbol('if'), Symbol('and'), Symbol('or'),
+           Symbol('cond')]) - set(specialForms),
+      set())
+
+class TestIteration(unittest2.TestCase):
+  """Test the iteration forms `loop` and `while`, and `recur`, with each way
+  of evaluating an expression."""
+  def setUp(self):
+    self.pickler = SimpleExpressionPickler(engine='native')
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(self.pickler,
+                                       environment=self.environment)
+    self.machine = Machine(self.interpreter)
+    self.engines = [
+      self.interpreter.evaluate,
+      lambda expression:self.interpreter.compile(expression)(),
+      self.machine.evaluate,
+    ]
+
+  def assertEvaluates(self, lisp, value):
+    expression = self.pickler.loads(lisp)[0]
+    for engine in self.engines:
+      self.assertEqual(engine(expression), value)
+
+  def assertRaisesEach(self, error, lisp):
+    expression = self.pickler.loads(lisp)[0]
+    for engine in self.engines:
+      self.assertRaises(error, engine, expression)
+
+  def test_loop(self):
+    self.assertEvaluates(
+      u"[loop [if [= n 0] acc [recur 'n:[- n 1] 'acc:[* acc n]]] 'n:5 'acc:1]",
+      120)
+    # Variables not named by recur keep their values:
+    self.assertEvaluates(
+      u"[loop [if [< n 3] [recur 'n:[+ n 1]] [+ n k]] 'n:0 'k:10]", 13)
+    self.assertEvaluates(u"[loop 42]", 42)
+
+  def test_while(self):
+    self.assertEvaluates(
+      u"[while [< i 10] [recur 'i:[+ i 1] 'sum:[+ sum i]] sum 'i:0 'sum:0]",
+      45)
+    self.assertEvaluates(u"[while #f [/ 1 0]]", None)
+
+  def test_nested(self):
+    # A recur form rebinds the variables of the innermost loop:
+    self.assertEvaluates(
+      u"[loop [if [= n 0] acc "
+      u"  [recur 'n:[- n 1] "
+      u"         'acc:[loop [if [= k 0] acc [recur 'k:[- k 1] 'acc:[+ acc 1]]] "
+      u"                    'k:n 'acc:acc]]] "
+      u"'n:4 'acc:0]", 10)
+
+  def test_procedure(self):
+    # Loops in the bodies of procedures, reading their arguments, and calls
+    # to procedures from the bodies of loops:
+    self.environment[Symbol('triangle')] = Procedure(
+      params      = Tuple([(Symbol('n'), IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = self.environment,
+      body        = self.pickler.loads(
+        u"[while [<= i n] [recur 'i:[+ i 1] 'sum:[+ sum i]] sum 'i:1 'sum:0]"
+      )[0],
+    )
+    self.assertEvaluates(
+      u"[loop [if [= k 0] acc "
+      u"  [recur 'k:[- k 1] 'acc:[+ acc [triangle 'n:k]]]] 'k:4 'acc:0]", 20)
+
+  def test_deep(self):
+    # Far more iterations than the recursion limit allows for calls:
+    self.assertEvaluates(
+      u"[loop [if [= n 0] acc [recur 'n:[- n 1] 'acc:[+ acc n]]] "
+      u"'n:5000 'acc:0]", 12502500)
+
+  def test_errors(self):
+    self.assertRaisesEach(SyntaxError, u"[recur 'n:1]")
+    self.assertRaisesEach(SyntaxError,
+      u"[loop [if [= n 0] n [+ 1 [recur 'n:[- n 1]]]] 'n:3]")
+    self.assertRaisesEach(SyntaxError,
+      u"[while [recur 'n:1] n 'n:3]")
+    self.assertRaisesEach(TypeError, u"[loop [recur 'm:1] 'n:1]")
+    self.assertRaisesEach(TypeError, u"[loop [recur 1] 'n:1]")
+    self.assertRaisesEach(TypeError, u"[loop 1 2:3]")
+    self.assertRaisesEach(TypeError, u"[loop 'n:1]")
+    self.assertRaisesEach(TypeError, u"[while #t]")
+    # Applied under another name, the arguments would already be evaluated:
+    self.environment[Symbol('repeat')] = builtinEnvironment[Symbol('loop')]
+    self.assertRaisesEach(SyntaxError, u"[repeat 1]")
+
+  def test_native(self):
+    # The machine compiles iteration to jumps, in a single frame:
+    self.machine.reset_counts()
+    self.assertEqual(self.machine.evaluate(self.pickler.loads(
+      u"[loop [if [= n 0] acc [recur 'n:[- n 1] 'acc:[+ acc n]]] "
+      u"'n:100 'acc:0]")[0]), 5050)
+    counts = self.machine.instruction_counts()
+    self.assertEqual(counts['ENTER_LOOP'], 1)
+    self.assertEqual(counts['REBIND'], 100)
+    self.assertNotIn('SPECIAL', counts)
+    self.assertNotIn('SPECIAL_KEYS', counts)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
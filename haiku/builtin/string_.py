@@ -37,7 +37,7 @@
 
 import operator
 
-from haiku.builtin import builtinEnvironment
+from haiku.builtin import builtinEnvironment, pureBuiltins
 from haiku.pickle import CanonicalExpressionPickler
 from haiku.types import *
 __all__ = []
@@ -49,15 +49,14 @@ _cat, = map(Symbol,
 
 from operator import concat
 
-builtinEnvironment[_cat] = Procedure(
+builtinEnvironment[_cat] = NativeProcedure(
   params      = Tuple([
       (1, (SymbolCompatible, UnicodeCompatible)),
       (2, (SymbolCompatible, UnicodeCompatible)),
     ]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:concat(env[1], env[2]),
+  function    = concat,
 )
 
 # ===----------------------------------------------------------------------===
@@ -65,7 +64,7 @@ builtinEnvironment[_cat] = Procedure(
 _encode, _decode = map(Symbol,
 'encode   decode'.split())
 
-builtinEnvironment[_encode] = Procedure(
+builtinEnvironment[_encode] = NativeProcedure(
   params      = Tuple([
       (1,          UnicodeCompatible),
       ('encoding', SymbolCompatible),
@@ -73,12 +72,11 @@ builtinEnvironment[_encode] = Procedure(
   defaults    = Tuple([
       ('encoding', 'utf-8'),
     ]),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:env[1].encode(env['encoding']),
+  function    = lambda value,encoding:value.encode(encoding),
 )
 
-builtinEnvironment[_decode] = Procedure(
+builtinEnvironment[_decode] = NativeProcedure(
   params      = Tuple([
       (1,          SymbolCompatible),
       ('encoding', SymbolCompatible),
@@ -86,11 +84,16 @@ builtinEnvironment[_decode] = Procedure(
   defaults    = Tuple([
       ('encoding', 'utf-8'),
     ]),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:env[1].decode(env['encoding']),
+  function    = lambda value,encoding:value.decode(encoding),
 )
 
+# ===----------------------------------------------------------------------===
+
+pureBuiltins.update(builtinEnvironment[symbol] for symbol in (
+  _cat, _encode, _decode,
+))
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
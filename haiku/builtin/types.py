@@ -35,7 +35,7 @@
 
 ""
 
-from haiku.builtin import builtinEnvironment
+from haiku.builtin import builtinEnvironment, pureBuiltins
 from haiku.types import *
 from haiku.utils.serialization import bytearray2i
 __all__ = []
@@ -45,39 +45,37 @@ __all__ = []
 _boolean, _integer, _rational, _tuple, = map(Symbol,
 'boolean   integer   rational   tuple'.split())
 
-builtinEnvironment[_boolean] = Procedure(
+builtinEnvironment[_boolean] = NativeProcedure(
   params      = Tuple([(1, AlphaCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:Boolean(env[1]),
+  function    = Boolean,
 )
 
-builtinEnvironment[_integer] = Procedure(
+builtinEnvironment[_integer] = NativeProcedure(
   params      = Tuple([(1, AlphaCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:Integer(bytearray2i(env[1])),
+  function    = lambda value:Integer(bytearray2i(value)),
 )
 
-builtinEnvironment[_rational] = Procedure(
+builtinEnvironment[_rational] = NativeProcedure(
   params      = Tuple([(1, AlphaCompatible),
                        (2, AlphaCompatible)]),
   defaults    = Tuple(),
-  ellipsis    = False,
   environment = builtinEnvironment,
-  body        = lambda eval_,env:Fraction(env[1], env[2]),
+  function    = Fraction,
 )
 
 from itertools import count
 def do_tuple(eval_,env):
+  items = dict(env)
   for key in count(1):
-    if key in env:
-      env[key-1] = env[key]; del env[key]
+    if key in items:
+      items[key-1] = items.pop(key)
     else:
       break
-  return Tuple(env)
+  return Tuple(items)
 builtinEnvironment[_tuple] = Procedure(
   params      = Tuple(),
   defaults    = Tuple(),
@@ -86,6 +84,42 @@ builtinEnvironment[_tuple] = Procedure(
   body        = do_tuple,
 )
 
+# ===----------------------------------------------------------------------===
+
+_memoize, = map(Symbol,
+'memoize'.split())
+
+def do_memoize(eval_, env):
+  proc = env[1]
+  return MemoizedProcedure(
+    params      = proc.params,
+    defaults    = proc.defaults,
+    ellipsis    = proc.ellipsis,
+    environment = proc.environment,
+    body        = proc.body,
+    max_entries = env['entries'],
+    max_size    = env['bytes'])
+builtinEnvironment[_memoize] = Procedure(
+  params      = Tuple([
+      (1,         ProcedureCompatible),
+      ('entries', IntegerCompatible),
+      ('bytes',   IntegerCompatible),
+    ]),
+  defaults    = Tuple([
+      ('entries', 2**10),
+      ('bytes',   2**24),
+    ]),
+  ellipsis    = False,
+  environment = builtinEnvironment,
+  body        = do_memoize,
+)
+
+# ===----------------------------------------------------------------------===
+
+pureBuiltins.update(builtinEnvironment[symbol] for symbol in (
+  _boolean, _integer, _rational, _tuple,
+))
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
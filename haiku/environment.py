@@ -37,15 +37,27 @@
 
 __all__ = [
   'Environment',
+  'LoopFrame',
+  'Signature',
 ]
 
 # ===----------------------------------------------------------------------===
 
-# Python standard library, shallow and deep copy operations
-from copy import copy, deepcopy
+# Python standard library, iteration tools
+from itertools import chain
 
 class Environment(dict):
-  "A haiku environment space."
+  """A haiku environment space. Arguments are bound by reference, as haiku
+  values are immutable, and environments are allocated for every procedure
+  call, so they keep their few attributes in slots. They may be referred to
+  weakly, as by the caches of `haiku.vm`."""
+  __slots__ = ('_layout', '_closed', '_parent', '__weakref__')
+
+  # Incremented whenever a binding is added to, changed in or removed from any
+  # environment after its construction. Lookups cached while it is unchanged
+  # are still valid (see `haiku.vm.InlineCache`).
+  version = 0
+
   def __init__(self,
     params   = None,
     defaults = None,
@@ -54,12 +66,20 @@ class Environment(dict):
     parent   = None,
     *largs, **dargs):
     ""
+    # An environment constructed with a parameter list is the frame of a
+    # procedure call. Its parameters (and any defaults) are bound for as long
+    # as it exists, and unless it takes an ellipsis nothing else is, which is
+    # what allows symbols to be resolved to it ahead of time (see
+    # `haiku.vm.compiler`):
+    self._layout = frozenset(chain(params or (), defaults or ()))
+    self._closed = params is not None and not ellipsis
     params   = params   or {}
     defaults = defaults or {}
     args     = args     or {}
     super(Environment, self).__init__(*largs, **dargs)
-    self.update(copy(defaults))
-    self.update(deepcopy(args))
+    # Filling in a new frame is not a mutation which needs to be counted:
+    dict.update(self, defaults)
+    dict.update(self, args)
     self._parent = parent
 
     missing = filter(lambda key:key not in self, params.keys())
@@ -82,15 +102,115 @@ class Environment(dict):
         raise TypeError(
           u"got unexpected argument(s) %s" % u", ".join(map(repr, extra)))
 
+  def __setitem__(self, key, value):
+    Environment.version += 1
+    super(Environment, self).__setitem__(key, value)
+
+  def __delitem__(self, key):
+    Environment.version += 1
+    super(Environment, self).__delitem__(key)
+
+  def clear(self):
+    Environment.version += 1
+    super(Environment, self).clear()
+
+  def pop(self, *args):
+    Environment.version += 1
+    return super(Environment, self).pop(*args)
+
+  def popitem(self):
+    Environment.version += 1
+    return super(Environment, self).popitem()
+
+  def setdefault(self, *args):
+    Environment.version += 1
+    return super(Environment, self).setdefault(*args)
+
+  def update(self, *args, **kwargs):
+    Environment.version += 1
+    super(Environment, self).update(*args, **kwargs)
+
+  def lexical_chain(self):
+    """Returns this environment and its ancestors, up to and including the
+    first which may gain bindings after its construction: the frames to
+    which a symbol can be resolved ahead of time by its lexical address, a
+    `(depth, symbol)` pair."""
+    frames = [self]
+    while frames[-1]._closed and frames[-1]._parent is not None:
+      frames.append(frames[-1]._parent)
+    return frames
+
   def resolve(self, symbol):
     ""
     if symbol not in self:
-      if not self._parent:
+      if self._parent is None:
         raise KeyError(
           u"symbol not found: %s" % symbol)
       self = self._parent.resolve(symbol)
     return self
 
+class LoopFrame(Environment):
+  """The frame of an iteration form (see `haiku.builtin.special`), which binds
+  its variables and nothing else, and is reused from one iteration to the
+  next. Rebinding its variables is not counted as a mutation: the frame is
+  closed, so symbols resolved through it but not bound in it are unaffected,
+  and those bound in it are never looked up through a cache."""
+  __slots__ = ()
+
+  def __init__(self, bindings, parent=None):
+    dict.update(self, bindings)
+    self._layout, self._closed, self._parent = (
+      frozenset(self.iterkeys()), True, parent)
+
+  def rebind(self, bindings):
+    "Replaces the values of (some of) the variables of the frame in place."
+    dict.update(self, bindings)
+
+class Signature(object):
+  """The parameters of a procedure (`params`, `defaults` and `ellipsis`, as
+  taken by `Environment`), compiled once into a validator of the arguments
+  of its calls. `bind()` builds the environment of a call without the
+  passes over keys which `Environment.__init__()` makes: the arguments are
+  merged with the defaults, the count of bindings stands in for the check
+  for unexpected arguments, and the classes of the values which have passed
+  the type check of each parameter are remembered, so that `isinstance()`
+  is called once per class. Arguments which fail any check are bound by
+  `Environment()` instead, so that the same `TypeError` is raised."""
+  __slots__ = ('params', 'defaults', 'ellipsis',
+               '_layout', '_defaults', '_checks')
+
+  def __init__(self, params, defaults, ellipsis):
+    self.params, self.defaults, self.ellipsis = params, defaults, ellipsis
+    self._layout = frozenset(chain(params, defaults))
+    self._defaults = dict(defaults)
+    # One (key, type, accepted classes) entry per parameter:
+    self._checks = tuple((key, params[key], set()) for key in params)
+
+  def bind(self, args, parent=None):
+    """Returns the environment of a call with `args`, whose parent is
+    `parent`."""
+    frame = Environment.__new__(Environment)
+    frame._layout, frame._closed, frame._parent = (
+      self._layout, not self.ellipsis, parent)
+    # Positional-only procedures have no defaults to fill in:
+    if self._defaults:
+      dict.update(frame, self._defaults)
+    dict.update(frame, args)
+    checks = self._checks
+    if self.ellipsis or len(frame) == len(checks):
+      for key, type_, accepted in checks:
+        if key not in frame:
+          break
+        cls = dict.__getitem__(frame, key).__class__
+        if cls not in accepted:
+          if not isinstance(dict.__getitem__(frame, key), type_):
+            break
+          accepted.add(cls)
+      else:
+        return frame
+    # Missing, extra, or wrongly-typed arguments:
+    return Environment(self.params, self.defaults, self.ellipsis, args, parent)
+
 from haiku.types.tuple_ import TupleCompatible
 TupleCompatible.register(Environment)
 
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.environment__test ---------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, object serialization
+import cPickle as pickle
+# Python standard library, shallow and deep copy operations
+from copy import deepcopy
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, environment mapping
+from haiku.environment import Environment, LoopFrame, Signature
+# Haiku language, type hierarchy
+from haiku.types import *
+
+class TestEnvironment(unittest2.TestCase):
+  "Test the construction of environments and resolution of symbols in them."
+  def setUp(self):
+    self.globals_ = Environment()
+    self.globals_[Symbol('a')] = 1
+    self.args = Tuple([(1, Tuple([(0, Symbol('x'))])), ('b', 2)])
+    self.frame = Environment(
+      params   = Tuple([(1, TupleCompatible), ('b', IntegerCompatible),
+                       ('c', IntegerCompatible)]),
+      defaults = Tuple([('c', 3)]),
+      args     = self.args,
+      parent   = self.globals_)
+
+  def test_bindings(self):
+    self.assertEqual(dict(self.frame), {1: self.args[1], 'b': 2, 'c': 3})
+    # Arguments are bound by reference:
+    self.assertTrue(self.frame[1] is self.args[1])
+    self.assertFalse(hasattr(self.frame, '__dict__'))
+    self.assertTrue(isinstance(self.frame, TupleCompatible))
+
+  def test_resolve(self):
+    self.assertTrue(self.frame.resolve('b') is self.frame)
+    self.assertTrue(self.frame.resolve(Symbol('a')) is self.globals_)
+    self.assertRaises(KeyError, self.frame.resolve, Symbol('d'))
+    self.assertEqual(self.frame.lexical_chain(), [self.frame, self.globals_])
+
+  def test_copy(self):
+    for copy_ in (deepcopy(self.frame),
+                  pickle.loads(pickle.dumps(self.frame, 2))):
+      self.assertEqual(dict(copy_), dict(self.frame))
+      self.assertEqual(copy_.resolve(Symbol('a'))[Symbol('a')], 1)
+      self.assertEqual((copy_._layout, copy_._closed),
+                       (self.frame._layout, self.frame._closed))
+
+  def test_version(self):
+    version = Environment.version
+    Environment(params=Tuple([(1, IntegerCompatible)]),
+                args=Tuple([(1, 1)]))
+    self.assertEqual(Environment.version, version)
+    self.globals_[Symbol('a')] = 2
+    self.assertEqual(Environment.version, version + 1)
+
+class TestLoopFrame(unittest2.TestCase):
+  "Test the frames of iteration forms, which are rebound in place."
+  def setUp(self):
+    self.globals_ = Environment()
+    self.globals_[Symbol('a')] = 1
+    self.frame = LoopFrame([(Symbol('i'), 0), (Symbol('j'), 1)], self.globals_)
+
+  def test_bindings(self):
+    self.assertEqual(dict(self.frame), {'i': 0, 'j': 1})
+    self.assertEqual(self.frame.lexical_chain(), [self.frame, self.globals_])
+    self.assertEqual(self.frame._layout, frozenset(['i', 'j']))
+    self.assertTrue(self.frame.resolve(Symbol('a')) is self.globals_)
+
+  def test_rebind(self):
+    version = Environment.version
+    self.frame.rebind([(Symbol('j'), 2)])
+    self.assertEqual(dict(self.frame), {'i': 0, 'j': 2})
+    # Rebinding the variables of a closed frame invalidates no cache:
+    self.assertEqual(Environment.version, version)
+
+class TestSignature(unittest2.TestCase):
+  """Test that `Signature.bind()` binds the same arguments, and raises the
+  same errors, as `Environment()` with the same parameters."""
+  SIGNATURES = [
+    (Tuple([(1, IntegerCompatible), (2, FractionCompatible)]), Tuple(), False),
+    (Tuple([(1, UnicodeCompatible), ('encoding', SymbolCompatible)]),
+     Tuple([('encoding', 'utf-8')]), False),
+    (Tuple([(1, IntegerCompatible)]), Tuple(), True),
+    (Tuple(), Tuple(), False),
+  ]
+  ARGS = [
+    Tuple(),
+    Tuple([(1, 1)]),
+    Tuple([(1, 1), (2, 2)]),
+    Tuple([(1, 1), (2, u"b")]),
+    Tuple([(1, u"a")]),
+    Tuple([(1, u"a"), ('encoding', 'utf-16')]),
+    Tuple([(1, u"a"), ('encoding', 16)]),
+    Tuple([(1, 1), (2, 2), (3, 3)]),
+  ]
+
+  def test_bind(self):
+    parent = Environment()
+    for params, defaults, ellipsis in self.SIGNATURES:
+      signature = Signature(params, defaults, ellipsis)
+      # Twice over, for the classes accepted the first time to be known:
+      for args in self.ARGS * 2:
+        try:
+          expected = Environment(params, defaults, ellipsis, args, parent)
+        except TypeError, e:
+          with self.assertRaises(TypeError) as raised:
+            signature.bind(args, parent)
+          self.assertEqual(raised.exception.args, e.args)
+        else:
+          frame = signature.bind(args, parent)
+          self.assertEqual(dict(frame), dict(expected))
+          self.assertEqual(
+            (frame._layout, frame._closed, frame._parent),
+            (expected._layout, expected._closed, expected._parent))
+
+  def test_procedure(self):
+    proc = Procedure(
+      params      = Tuple([(1, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = None,
+      body        = None)
+    self.assertEqual(dict(proc.bind(Tuple([(1, 1)]))), {1: 1})
+    # A procedure whose parameters are replaced binds its arguments anew:
+    proc.params = Tuple([(1, UnicodeCompatible)])
+    self.assertRaises(TypeError, proc.bind, Tuple([(1, 1)]))
+    self.assertEqual(dict(proc.bind(Tuple([(1, u"a")]))), {1: u"a"})
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
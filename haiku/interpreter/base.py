@@ -33,8 +33,12 @@
 # DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ===----------------------------------------------------------------------===
 
+# Haiku language, built-in primitives
+from haiku.builtin import TailCall, call_special_form, special_form
 # Haiku language, type hierarchy
 from haiku.types import *
+# Haiku language, virtual machine
+from haiku.vm import Machine, fold_constants
 
 __all__ = [
   'BaseInterpreter',
@@ -42,12 +46,29 @@ __all__ = [
 
 class BaseInterpreter(object):
   "A haiku interpreter state."
+  # `evaluate()` walks the expression tree recursively by default. The
+  # 'iterative' engine, selected with the `engine` keyword argument to the
+  # constructor, instead compiles the expression for and runs it on a
+  # `haiku.vm.Machine`, which keeps explicit stacks: nesting depth and the
+  # depth of calls to procedures with haiku bodies are then limited by memory
+  # rather than by the Python recursion limit.
+  ENGINES        = ('recursive', 'iterative')
+  DEFAULT_ENGINE = 'recursive'
+
   def __init__(self, pickler, environment=None, *args, **kwargs):
     if environment is None:
       raise NotImplementedError
+    engine = kwargs.pop('engine', self.DEFAULT_ENGINE)
+    if engine not in self.ENGINES:
+      raise ValueError(
+        u"unrecognized evaluation engine: %s" % repr(engine))
     super(BaseInterpreter, self).__init__(*args, **kwargs)
     self._pickler     = pickler
     self._environment = environment
+    self.engine       = engine
+    self._machine     = None
+    if engine == 'iterative':
+      self._machine = Machine(self)
 
   # Not a typo: SyntaxError is a built-in Python exception, which we want to
   # make a property of this `BasePickler` as well.
@@ -63,65 +84,231 @@ class BaseInterpreter(object):
   def evaluate(self, expression, environment=None):
     """Evaluate a Python-expressed haiku expression in the context of an
     environment."""
+    if self._machine is not None:
+      return self._machine.evaluate(expression, environment)
+
     # To make things easy, the global environment will be used if no
     # environment is specified.
     if None == environment:
       environment = self._environment
 
-    # Handle (trivial) self-evaluating types:
+    handler = self.evaluators.lookup(expression)
+    if handler is not None:
+      return getattr(self, handler)(expression, environment)
+
+    # Procedures (built-in):
+    elif callable(expression):
+      return expression(self.evaluate, environment)
+
+    else:
+      raise ValueError
+
+  # Handlers of the kinds of expression, in the order in which they are tried
+  # by `evaluate()`:
+
+  def _evaluate_constant(self, expression, environment):
+    "Handle (trivial) self-evaluating types."
+    return expression
+
+  def _evaluate_symbol(self, expression, environment):
+    "Variable reference (lookup in local environment)."
+    return environment.resolve(expression)[expression]
+
+  def _evaluate_container(self, expression, environment):
+    """Handle non-tuple container types, in which the elements of the
+    container are evaluated."""
+    return expression.__class__(self.evaluate(elem, environment)
+                                for elem in expression)
+
+  def _evaluate_unsupported(self, expression, environment):
+    "Relations and matrices, which are not yet supported."
+    # FIXME: figure out what to do with relations, too.
+    raise NotImplementedError
+
+  def _evaluate_tuple(self, expression, environment):
+    """Procedures (user-defined). An application whose value is that of
+    another expression in tail position (the body of a procedure with a haiku
+    body, or the tail call returned by a special form) is followed by the
+    evaluation of that expression in the same Python frame, as long as it is
+    itself an application, so that procedures calling each other in tail
+    position run in constant Python stack."""
+    # An application in tail position is handed to `evaluate()` instead if
+    # this method has been overridden, as the override then handles it:
+    trampoline = (self._evaluate_tuple.im_func is
+                  BaseInterpreter._evaluate_tuple.im_func)
+    while True:
+      if 0 not in expression:
+        raise SyntaxError(
+          u"expected procedure name in position 0")
+      proc_name = expression[0]
+      proc = self.evaluate(proc_name, environment)
+      args = Tuple([(self.evaluate(key), expression[key])
+        for key in filter(lambda key:key!=0, expression.keys())])
+      # The arguments of a special form are passed to it unevaluated, for it
+      # to evaluate as it sees fit:
+      form = special_form(proc_name)
+      if form is None:
+        args = Tuple([(key, self.evaluate(args[key], environment))
+                      for key in args])
+      if not callable(proc):
+        raise self.SyntaxError(
+          u"procedure is not callable: %s" % repr(proc_name))
+      if form is not None:
+        value = form(self.evaluate, proc, args, environment)
+        if value.__class__ is not TailCall:
+          return value
+        expression, environment = value.expression, value.environment
+      # Subclasses of Procedure may have their own calling convention, and
+      # are called as any other procedure:
+      elif type(proc) is Procedure and not callable(proc.body):
+        expression, environment = proc.body, proc.bind(args)
+      else:
+        return proc(self.evaluate, args)
+      if (not trampoline or
+          self.evaluators.lookup(expression) != '_evaluate_tuple'):
+        return self.evaluate(expression, environment)
+
+  # Other types of expression can be supported by registering the names of
+  # their handler methods here, which are looked up on the interpreter so that
+  # subclasses may override them. Values of any type not registered are
+  # evaluated by being called, if they are callable:
+  evaluators = TypeDispatch(
+    ((OmegaCompatible,
+      BooleanCompatible,
+      IntegerCompatible,
+      FractionCompatible,
+      UnicodeCompatible),  '_evaluate_constant'),
+    (SymbolCompatible,     '_evaluate_symbol'),
+    ((SequenceCompatible,
+      SetCompatible),      '_evaluate_container'),
+    ((MatrixCompatible,
+      RelationCompatible), '_evaluate_unsupported'),
+    (TupleCompatible,      '_evaluate_tuple'))
+
+  def compile(self, expression, fold=False):
+    """Analyze a Python-expressed haiku expression once, returning a callable
+    which takes an environment (the global environment if omitted) and
+    returns the same result as `evaluate()` would. The kind of each node is
+    resolved ahead of time into a tree of nested closures, so repeated
+    evaluation does not pay for type dispatch again. The expression must not
+    be mutated after it has been compiled.
+
+    If `fold` is true, applications of pure built-ins to constant arguments
+    are first evaluated once and for all (see `haiku.vm.fold_constants()`),
+    with names resolved in the global environment: the code must then only
+    be run in environments which do not rebind those names."""
+    if fold:
+      expression = fold_constants(expression, self._environment)
+    code = self._compile(expression)
+    def run(environment=None):
+      if None == environment:
+        environment = self._environment
+      return code(environment)
+    return run
+
+  def _compile(self, expression):
+    "Returns a closure of one argument, the environment, for `expression`."
+    # Self-evaluating types are constants:
     if isinstance(expression, (
       OmegaCompatible,
       BooleanCompatible,
       IntegerCompatible,
       FractionCompatible,
       UnicodeCompatible)):
-      return expression
+      return lambda environment:expression
 
     # Variable reference (lookup in local environment)
     elif isinstance(expression, SymbolCompatible):
-      return environment.resolve(expression)[expression]
+      return lambda environment:environment.resolve(expression)[expression]
 
-    # Handle non-tuple container types, in which the elements of the container
-    # are evaluated:
+    # Non-tuple container types, each of whose elements is compiled:
     elif isinstance(expression, (
       SequenceCompatible,
       SetCompatible)):
-      return expression.__class__(self.evaluate(elem, environment) for elem in expression)
-
-    # A Matrix is similar to the Set and Sequence container types in that the
-    # result of evaluating a matrix is the application of `evaluate` to each
-    # of the elements of the matrix. However the multi-dimensional nature of
-    # the matrix necessitates that we handle it specially:
-    elif isinstance(expression, MatrixCompatible):
-      raise NotImplementedError
+      cls = expression.__class__
+      codes = map(self._compile, expression)
+      return lambda environment:cls(code(environment) for code in codes)
 
-    # FIXME: figure out what to do with this one
-    elif isinstance(expression, RelationCompatible):
-      raise NotImplementedError
+    # Matrices and relations are not supported by `evaluate()` either. The
+    # error is deferred until the code is run, as it may never be:
+    elif isinstance(expression, (
+      MatrixCompatible,
+      RelationCompatible)):
+      def code(environment):
+        raise NotImplementedError
+      return code
 
     # Procedures (user-defined):
     elif isinstance(expression, TupleCompatible):
-      if 0 not in expression:
-        raise SyntaxError(
-          u"expected procedure name in position 0")
-      proc_name = expression[0]
-      proc = self.evaluate(proc_name, environment)
-      expression = Tuple([(self.evaluate(key), expression[key])
-        for key in filter(lambda key:key!=0, expression.keys())])
-      if proc_name not in ('quote',):
-        expression = Tuple([(key, self.evaluate(expression[key], environment))
-                            for key in expression])
-      if not callable(proc):
-        raise self.SyntaxError(
-          u"procedure is not callable: %s" % repr(expression[0]))
-      return proc(self.evaluate, expression)
+      return self._compile_tuple(expression)
 
     # Procedures (built-in):
     elif callable(expression):
-      return expression(self.evaluate, environment)
+      evaluate = self.evaluate
+      return lambda environment:expression(evaluate, environment)
 
     else:
-      raise ValueError
+      def code(environment):
+        raise ValueError
+      return code
+
+  def _compile_tuple(self, expression):
+    "Returns a closure which applies the procedure expressed by a tuple."
+    if 0 not in expression:
+      def code(environment):
+        raise SyntaxError(
+          u"expected procedure name in position 0")
+      return code
+    proc_name = expression[0]
+    proc_code = self._compile(proc_name)
+    # Argument keys are evaluated in the global environment. Those which are
+    # self-evaluating are constant, and resolved here once and for all:
+    keys = filter(lambda key:key!=0, expression.keys())
+    key_codes = map(self._compile, keys)
+    constant = all(isinstance(key, (
+        OmegaCompatible,
+        BooleanCompatible,
+        IntegerCompatible,
+        FractionCompatible,
+        UnicodeCompatible))
+      for key in keys)
+    evaluate, SyntaxError_ = self.evaluate, self.SyntaxError
+    # The arguments of a special form are passed to it unevaluated, along with
+    # an evaluation function which compiles each of them the first time the
+    # form evaluates it (and falls back on `evaluate()` for anything else):
+    form = special_form(proc_name)
+    if form is None:
+      value_codes = [self._compile(expression[key]) for key in keys]
+    else:
+      value_codes = [(lambda value:lambda environment:value)(expression[key])
+                     for key in keys]
+      arguments = dict((id(expression[key]), expression[key]) for key in keys)
+      codes = {}
+      def evaluate_(value, environment=None):
+        if environment is None:
+          return evaluate(value)
+        code = codes.get(id(value))
+        if code is None:
+          if arguments.get(id(value)) is not value:
+            return evaluate(value, environment)
+          code = codes[id(value)] = self._compile(value)
+        return code(environment)
+    def code(environment):
+      proc = proc_code(environment)
+      if constant:
+        args = keys
+      else:
+        globals_ = self._environment
+        args = [key_code(globals_) for key_code in key_codes]
+      args = Tuple(zip(args,
+        [value_code(environment) for value_code in value_codes]))
+      if not callable(proc):
+        raise SyntaxError_(
+          u"procedure is not callable: %s" % repr(proc_name))
+      if form is not None:
+        return call_special_form(form, evaluate_, proc, args, environment)
+      return proc(evaluate, args)
+    return code
 
 # ===----------------------------------------------------------------------===
 # End of File
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.interpreter.base__bench ---------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Cost of the recursive and iterative evaluation engines of
+`BaseInterpreter` on deeply nested chains of applications, which only the
+latter can evaluate past a few hundred levels. Run with:
+
+  python -m haiku.interpreter.base__bench
+"""
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, benchmarking harness
+from haiku.utils.benchmark import measure, report
+
+def main():
+  environment = Environment(parent=builtinEnvironment)
+  # A chain of applications, [+ 1 [+ 1 ... 0]], by evaluation engine:
+  recursive = BaseInterpreter(
+    pickler     = SimpleExpressionPickler(),
+    environment = environment)
+  iterative = BaseInterpreter(
+    pickler     = SimpleExpressionPickler(),
+    environment = environment,
+    engine      = 'iterative')
+  for depth in (10, 100, 1000, 10000, 100000):
+    expression = 0
+    for level in xrange(depth):
+      expression = Tuple([(0, Symbol('+')), (1, 1), (2, expression)])
+    rows = []
+    for engine in (recursive, iterative):
+      try:
+        engine.evaluate(expression)
+      except RuntimeError:
+        # Maximum recursion depth exceeded:
+        continue
+      rows.append((engine.engine,
+                   measure(lambda:engine.evaluate(expression), repeat=1),
+                   depth, u"calls"))
+    report(u"chain of %d applications" % depth, rows)
+
+if __name__ == '__main__':
+  main()
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
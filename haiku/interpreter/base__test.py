@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.interpreter.base__test ----------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+class TestCompile(unittest2.TestCase):
+  """Test `BaseInterpreter.compile()` beyond the evaluation scenarios: reuse
+  of compiled code across environments, and errors raised at run time."""
+  def setUp(self):
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment)
+
+  def test_environment(self):
+    code = self.interpreter.compile(self.interpreter.read(u'[+ x 1]')[0])
+    self.environment[Symbol('x')] = 1
+    self.assertEqual(code(), 2)
+    local = Environment(parent=self.environment)
+    local[Symbol('x')] = 41
+    self.assertEqual(code(local), 42)
+    self.assertEqual(code(), 2)
+
+  def test_quote(self):
+    expression = Tuple([(0, Symbol('quote')), (1, Symbol('x'))])
+    self.assertEqual(self.interpreter.compile(expression)(), Symbol('x'))
+
+  def test_errors(self):
+    for expression, exception in [
+        (Symbol('undefined'),        KeyError),
+        (Tuple([(1, 2)]),            SyntaxError),
+        (Tuple([(0, 2), (1, 2)]),    self.interpreter.SyntaxError),
+        (object(),                   ValueError)]:
+      code = self.interpreter.compile(expression)
+      self.assertRaises(exception, self.interpreter.evaluate, expression)
+      self.assertRaises(exception, code)
+
+class TestSubclass(unittest2.TestCase):
+  "Test that `evaluate()` calls the handlers overridden by a subclass."
+  def test_overrides(self):
+    calls = []
+    class TracingInterpreter(BaseInterpreter):
+      def _evaluate_symbol(self, expression, environment):
+        calls.append(expression)
+        return super(TracingInterpreter, self)._evaluate_symbol(
+          expression, environment)
+      def _evaluate_tuple(self, expression, environment):
+        calls.append(expression[0])
+        return super(TracingInterpreter, self)._evaluate_tuple(
+          expression, environment)
+    environment = Environment(parent=builtinEnvironment)
+    interpreter = TracingInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = environment)
+    environment[Symbol('f')] = Procedure(
+      params      = Tuple([(1, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = environment,
+      body        = interpreter.read(u'[+ 1 2]')[0])
+    self.assertEqual(interpreter.evaluate(interpreter.read(u'[f 1]')[0]), 3)
+    # The application in the body of f, in tail position, is handed to the
+    # override too:
+    self.assertEqual(calls, [Symbol('f'), Symbol('f'),
+                             Symbol('+'), Symbol('+')])
+
+class TestTailCalls(unittest2.TestCase):
+  """Test that `BaseInterpreter.evaluate()` makes calls in tail position, from
+  the bodies of procedures and the branches of conditionals, without growing
+  the Python stack."""
+  DEPTH = 10000
+
+  def setUp(self):
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(engine='native'),
+      environment = self.environment)
+    for name, body in [
+        ('is-even', u"[if [= n 0] #t [is-odd 'n:[- n 1]]]"),
+        ('is-odd',  u"[cond [= n 0] #f [is-even 'n:[- n 1]]]"),
+        ('total',   u"[if [= n 0] 0 [+ n [total 'n:[- n 1]]]]")]:
+      self.environment[Symbol(name)] = Procedure(
+        params      = Tuple([(Symbol('n'), IntegerCompatible)]),
+        defaults    = Tuple(),
+        ellipsis    = False,
+        environment = self.environment,
+        body        = self.interpreter.read(body)[0])
+
+  def test_mutual_recursion(self):
+    self.assertEqual(self.interpreter.evaluate(
+      self.interpreter.read(u"[is-even 'n:%d]" % self.DEPTH)[0]), True)
+    self.assertEqual(self.interpreter.evaluate(
+      self.interpreter.read(u"[is-odd 'n:%d]" % self.DEPTH)[0]), False)
+
+  def test_not_tail(self):
+    # The result of a call which is an argument of another is still needed
+    # once it returns, so deep recursion of that kind is not eliminated:
+    self.assertEqual(self.interpreter.evaluate(
+      self.interpreter.read(u"[total 'n:10]")[0]), 55)
+    self.assertRaises(RuntimeError, self.interpreter.evaluate,
+      self.interpreter.read(u"[total 'n:%d]" % self.DEPTH)[0])
+
+class TestIterative(unittest2.TestCase):
+  """Test the 'iterative' engine of `BaseInterpreter` on expressions nested
+  far deeper than the recursion limit allows the default engine to go."""
+  DEPTH = 100000
+
+  def setUp(self):
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment,
+      engine      = 'iterative')
+    self.recursive = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment)
+
+  def test_engines(self):
+    self.assertEqual(self.recursive.engine, 'recursive')
+    self.assertEqual(self.interpreter.engine, 'iterative')
+    self.assertRaises(ValueError, BaseInterpreter,
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment,
+      engine      = 'unknown')
+
+  def test_application(self):
+    expression = 0
+    # Each level calls a builtin, which is comparatively slow:
+    for index in xrange(self.DEPTH // 10):
+      expression = Tuple([(0, Symbol('+')), (1, 1), (2, expression)])
+    self.assertEqual(self.interpreter.evaluate(expression), self.DEPTH // 10)
+    self.assertRaises(RuntimeError, self.recursive.evaluate, expression)
+
+  def test_sequence(self):
+    expression = Symbol('x')
+    for index in xrange(self.DEPTH):
+      expression = (expression,)
+    self.environment[Symbol('x')] = 1
+    result = self.interpreter.evaluate(expression)
+    for index in xrange(self.DEPTH):
+      result, = result
+    self.assertEqual(result, 1)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
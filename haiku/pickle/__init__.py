@@ -34,6 +34,7 @@
 # ===----------------------------------------------------------------------===
 
 from .base      import *
+from .cache     import *
 from .canonical import *
 from .meta      import *
 from .simple    import *
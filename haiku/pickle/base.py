@@ -35,8 +35,23 @@
 
 from abc import ABCMeta, abstractmethod
 
+# Python standard library, codec registry
+import codecs
+# Python standard library, iteration tools
+from itertools import chain
+# Python standard library, process-based parallelism
+import multiprocessing
+# Python standard library, object serialization
+import cPickle as pickle
+
 from cStringIO import StringIO
 
+# Haiku language, type definitions
+from haiku.types import *
+
+# Haiku language, serialized-encoding cache
+from .cache import EncodingCache
+
 __all__ = [
   'BasePickler',
 ]
@@ -71,12 +86,42 @@ class BasePickler(object):
   UNQUOTE_PROCEDURE        = 'unquote'
   UNQUOTE_SPLICE_PROCEDURE = 'unquote-splice'
 
+  # A pickler may offer more than one implementation of `loads()`, selected
+  # per instance with the `engine` keyword argument to the constructor.
+  ENGINES        = ()
+  DEFAULT_ENGINE = None
+
+  # Streams are read (and, where supported, written) in pieces of at most
+  # this many bytes, unless overridden with the `buffer_size` keyword
+  # argument to the constructor.
+  BUFFER_SIZE = 2**16
+
+  # The encodings of up to this many characters' worth of `Tuple`s may be
+  # kept in `self.cache` by the pickler, unless overridden with the
+  # `cache_size` keyword argument to the constructor. Caching is off by
+  # default: a cached tuple is serialized whole before it is written, which
+  # gives up the incremental output of `dump()` for that tuple.
+  CACHE_SIZE = 0
+
+  def __init__(self, *args, **kwargs):
+    engine = kwargs.pop('engine', self.DEFAULT_ENGINE)
+    if engine not in self.ENGINES + (self.DEFAULT_ENGINE,):
+      raise ValueError(
+        u"unrecognized parse engine: %s" % repr(engine))
+    buffer_size = kwargs.pop('buffer_size', self.BUFFER_SIZE)
+    cache_size = kwargs.pop('cache_size', self.CACHE_SIZE)
+    super(BasePickler, self).__init__(*args, **kwargs)
+    self.engine, self.buffer_size = engine, buffer_size
+    self.cache = None
+    if cache_size:
+      self.cache = EncodingCache(cache_size)
+
   # NOTE: implementors should override `dump()` in preference to `dumps()`, so
-  #   that `dump()` does all of the work and `dumps()` calls dump with a
-  #   `StringIO` object. In that way pickled expressions can be written to
-  #   disk as they are generated, instead of having to generate the entire
-  #   pickled expression first, as would be the case when `dumps()` is
-  #   overridden.
+  #   that `dump()` does all of the work and `dumps()` is a thin wrapper
+  #   around the same writer (see `_BufferedWriter` below). In that way
+  #   pickled expressions can be written to disk as they are generated,
+  #   instead of having to generate the entire pickled expression first, as
+  #   would be the case when `dumps()` is overridden.
   def dump(self, ostream, *args, **kwargs):
     """Serialize a Python-represented haiku expression into pickled form and
     write the resulting string to the duck-typed `ostream` file-like
@@ -103,6 +148,231 @@ class BasePickler(object):
     istream = StringIO()
     return self.load(istream, *args, **kwargs)
 
+  def _serialize(self, expression, write):
+    """Translates a Python-represented haiku expression into pickled form,
+    passing the generated text to `write()` in pieces as the expression tree
+    is walked."""
+    self._serialize_parts([(expression,)], write)
+
+  def _serialize_parts(self, parts, write):
+    """Passes `parts` to `write()` in order. Each part is either a piece of
+    serialized text, or a 1-tuple `(expression,)` standing for the
+    serialization of `expression`, which `_serialize_node()` expands into
+    parts of its own. The parts still to be written are kept on an explicit
+    stack rather than Python's, so that the depth of the expressions which
+    can be serialized is limited by memory alone.
+
+    With `self.cache` set, the encoding of an immutable `Tuple` which has been
+    serialized before is copied out of the cache. Otherwise its parts are
+    captured as they are written, and cached once it is complete."""
+    cache = self.cache
+    captures = []
+    stack = parts[::-1]
+    push, pop = stack.append, stack.pop
+    while stack:
+      part = pop()
+      if part.__class__ is tuple:
+        expression = part[0]
+        if cache is not None and isinstance(expression, Tuple):
+          encoding = cache.get(expression)
+          if encoding is not None:
+            push(encoding)
+            continue
+          push(_Captured(expression))
+          captures.append([])
+        parts = []
+        self._serialize_node(expression, parts.append)
+        parts.reverse()
+        stack.extend(parts)
+      elif part.__class__ is _Captured:
+        encoding = "".join(captures.pop())
+        cache.put(part.expression, encoding)
+        push(encoding)
+      elif captures:
+        captures[-1].append(part)
+      else:
+        write(part)
+
+  def _serialize_node(self, expression, write):
+    """Passes the parts of the serialization of `expression` to `write()`,
+    as described for `_serialize_parts()`: text is written as-is, and each
+    sub-expression as a 1-tuple, to be expanded in its turn."""
+    raise NotImplementedError
+
+  # Inputs shorter than this are not worth the cost of starting worker
+  # processes, and are always deserialized by `loads_parallel()` in-process.
+  PARALLEL_MIN_SIZE = 2**16
+
+  def loads_parallel(self, expression, processes=None):
+    """Deserializes a sequence of haiku expressions in pickled form, as
+    `loads()` does, but splits the input between top-level expressions and
+    parses the pieces in a pool of `processes` worker processes (by default,
+    one per CPU). The results are returned in their original order.
+    Positions reported in syntax errors are relative to the start of the
+    piece in which the error was found, and errors which cannot be passed
+    back from a worker process are raised as `SyntaxError`s."""
+    processes = processes or multiprocessing.cpu_count()
+    pieces = []
+    if processes > 1 and len(expression) >= self.PARALLEL_MIN_SIZE:
+      # Several pieces per process even out the work when expressions vary
+      # in size:
+      pieces = self._split(expression, 4 * processes)
+    if len(pieces) < 2:
+      return self.loads(expression)
+    pool = multiprocessing.Pool(processes)
+    try:
+      results = pool.map(_loads_piece,
+        [(self.__class__, self.engine, piece) for piece in pieces])
+    finally:
+      pool.terminate()
+      pool.join()
+    for success, result in results:
+      if not success:
+        raise result
+    return list(chain.from_iterable(result for success, result in results))
+
+  def _split(self, expression, count):
+    """Cuts `expression` into at most `count` pieces of roughly equal size,
+    only at positions reported by `_top_level_ends()`."""
+    size, start, pieces = len(expression), 0, []
+    for end in self._top_level_ends(expression):
+      if end - start >= size // count and end < size:
+        pieces.append(expression[start:end])
+        start = end
+    pieces.append(expression[start:])
+    return pieces
+
+  def _top_level_ends(self, expression):
+    """Yields, in increasing order, offsets within `expression` at which it
+    may be cut without splitting a top-level expression, as found by a scan
+    which is much cheaper than parsing. Each piece must parse on its own to
+    the same expressions as it would in place. Picklers which cannot find
+    such offsets yield none, and are never parsed in parallel."""
+    return iter(())
+
+  # The following helpers are shared by the hand-written (non-LEPL) parse
+  # engines, which assemble containers on an explicit stack of `_Frame`s.
+  def _build_tuple(self, args, kwargs):
+    """Builds a `Tuple` out of a list of positional elements and a list of
+    `(key, value)` keyword elements, rejecting duplicate keys."""
+    elements = dict(kwargs)
+    if len(elements) != len(kwargs):
+      raise self.SyntaxError(
+        u"duplicate keys in keyword arguments")
+    for index, arg in enumerate(args):
+      index = Integer(index)
+      if index in elements:
+        raise self.SyntaxError(
+          u"redundant parameter(s) specified positionally and as keyword arguments")
+      elements[index] = arg
+    return Tuple(elements)
+
+  def _build_eval_data(self, tuple_):
+    """Expands the eval-data special form: a quoted tuple, each of whose
+    values is unquoted."""
+    return Tuple([(0, self.QUOTE_PROCEDURE), (1, Tuple([
+      (key, Tuple([(0, self.UNQUOTE_PROCEDURE), (1, value)]))
+      for key, value in tuple_.items()]))])
+
+def _loads_piece(args):
+  """Deserializes one piece of a `loads_parallel()` input in a worker process.
+  Returns a flag and either the expressions or the exception which was
+  raised. (An exception which cannot be pickled, as is the case for some of
+  those raised by LEPL, would otherwise leave the pool waiting forever, so
+  these are replaced by a `SyntaxError` with the same message.)"""
+  cls, engine, piece = args
+  try:
+    return True, cls(engine=engine).loads(piece)
+  except Exception, e:
+    try:
+      pickle.loads(pickle.dumps(e))
+    except Exception:
+      e = cls.SyntaxError(unicode(e))
+    return False, e
+
+class _per_class(object):
+  """A lazily built class attribute, such as the grammar of a pickler:
+  `build(cls)` is called the first time the attribute is read through a
+  class (or an instance of it), and the result is shared by everything which
+  reads it through that class from then on. Each subclass builds its own, so
+  that overrides of the token constants are taken into account."""
+  def __init__(self, build):
+    self.build, self.__doc__ = build, build.__doc__
+    self.values = {}
+  def __get__(self, instance, owner):
+    try:
+      return self.values[owner]
+    except KeyError:
+      value = self.values[owner] = self.build(owner)
+      return value
+
+class _Captured(object):
+  """Marks the end of the parts of a tuple on the stack of
+  `BasePickler._serialize_parts()`, whose encoding is to be cached."""
+  __slots__ = ('expression',)
+  def __init__(self, expression):
+    self.expression = expression
+
+class _BufferedWriter(object):
+  """Gathers the pieces of a pickled expression as they are generated, and
+  passes them on to the duck-typed `ostream` file-like object whenever at
+  least `buffer_size` characters are pending. If an `encoding` is given,
+  text is encoded incrementally on its way out (so that a byte-order mark,
+  for example, is only written once)."""
+  def __init__(self, ostream, buffer_size, encoding=None):
+    self.ostream, self.buffer_size = ostream, buffer_size
+    self.encoder = encoding and codecs.getincrementalencoder(encoding)()
+    self.pending, self.length = [], 0
+
+  def write(self, data):
+    # Pieces which would fill the buffer on their own (large symbols, for
+    # example) are passed straight through rather than copied into it.
+    if len(data) >= self.buffer_size:
+      self.flush()
+      self._write(data)
+      return
+    self.pending.append(data)
+    self.length += len(data)
+    if self.length >= self.buffer_size:
+      self.flush()
+
+  def flush(self, final=False):
+    if self.pending:
+      data = "".join(self.pending)
+      self.pending, self.length = [], 0
+      self._write(data)
+    if final and self.encoder is not None:
+      self._write(u"", final)
+
+  def _write(self, data, final=False):
+    if self.encoder is not None:
+      data = self.encoder.encode(data, final)
+    if data:
+      self.ostream.write(data)
+
+# Each kind of container, keyed by the token which opens it, with the token
+# that closes it.
+_NATIVE_CLOSERS = {
+  'tuple':     'tuple_close',
+  'eval_data': 'eval_data_close',
+  'sequence':  'sequence_close',
+}
+_NATIVE_OPENERS = dict((v, k) for k, v in _NATIVE_CLOSERS.items())
+
+# Placeholders for the keyword state of a `_Frame`: no keyword is pending, or
+# (for prefix association operators) the next expression is to be the key.
+# `None` cannot be used as it is itself a valid key.
+_NO_KEY    = object()
+_AWAIT_KEY = object()
+
+class _Frame(object):
+  "A container which is still open on a parse engine's explicit stack."
+  __slots__ = ('kind', 'args', 'kwargs', 'key', 'associable', 'quotes', 'offset')
+  def __init__(self, kind, quotes, offset):
+    self.kind, self.quotes, self.offset = kind, quotes, offset
+    self.args, self.kwargs = [], []
+    self.key, self.associable = _NO_KEY, False
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.pickle.cache --------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""A bounded side table of the serialized encodings of `Tuple` instances. A
+pickler constructed with a non-zero `cache_size` keeps one, so that an
+immutable sub-expression which has already been serialized can be written
+out again by copy, rather than by walking it a second time."""
+
+__all__ = [
+  'EncodingCache',
+]
+
+# ===----------------------------------------------------------------------===
+
+# Python standard library, container datatypes
+from collections import OrderedDict
+# Python standard library, weak references
+from weakref import KeyedRef
+
+class EncodingCache(object):
+  """Maps `Tuple` instances to their serialized encodings. Entries are keyed
+  by identity rather than by equality: equal tuples may serialize
+  differently (`{0:x}` and `{False:x}`, for example), and hashing a tuple
+  costs as much as serializing it. An entry is dropped as soon as its tuple
+  is garbage collected, and once the encodings held would exceed `max_size`
+  characters the least recently used entries are evicted. The `hits`,
+  `misses` and `evictions` counters record how well the cache is doing."""
+  def __init__(self, max_size):
+    self.max_size = max_size
+    self.size = 0
+    self.hits = self.misses = self.evictions = 0
+    self._entries = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  @property
+  def hit_rate(self):
+    "The fraction of lookups which were answered from the cache."
+    lookups = self.hits + self.misses
+    return lookups and float(self.hits) / lookups or 0.0
+
+  def get(self, tuple_):
+    """Returns the cached encoding of `tuple_`, or `None` if there is
+    none."""
+    entry = self._entries.pop(id(tuple_), None)
+    if entry is None or entry[0]() is not tuple_:
+      # An entry for another tuple, since collected, which had the same
+      # identity is dropped:
+      if entry is not None:
+        self.size -= len(entry[1])
+      self.misses += 1
+      return None
+    # Re-inserting the entry marks it as the most recently used:
+    self._entries[id(tuple_)] = entry
+    self.hits += 1
+    return entry[1]
+
+  def put(self, tuple_, encoding):
+    """Caches the `encoding` of `tuple_`, evicting older entries as
+    needed. Encodings larger than the whole cache are not kept."""
+    if len(encoding) > self.max_size:
+      return
+    entry = self._entries.pop(id(tuple_), None)
+    if entry is not None:
+      self.size -= len(entry[1])
+    while self.size + len(encoding) > self.max_size:
+      ref, evicted = self._entries.popitem(last=False)[1]
+      self.size -= len(evicted)
+      self.evictions += 1
+    self._entries[id(tuple_)] = (KeyedRef(tuple_, self._discard, id(tuple_)),
+                                 encoding)
+    self.size += len(encoding)
+
+  def clear(self):
+    "Drops every entry, leaving the counters as they are."
+    self._entries.clear()
+    self.size = 0
+
+  def _discard(self, ref):
+    # Called once a cached tuple has been garbage collected. The check guards
+    # against the entry having been evicted, and the object's identity since
+    # reused, in the meantime.
+    entry = self._entries.get(ref.key)
+    if entry is not None and entry[0] is ref:
+      del self._entries[ref.key]
+      self.size -= len(entry[1])
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
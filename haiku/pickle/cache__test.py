@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.pickle.cache__test --------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, garbage collection
+import gc
+
+# Python standard library, unit-testing
+import unittest2
+
+# Python patterns, scenario unit-testing
+from python_patterns.unittest.scenario import ScenarioMeta
+
+# Haiku language, pickler encoding cache
+from haiku.pickle import (
+  CanonicalExpressionPickler, EncodingCache, SimpleExpressionPickler)
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, scenario testing
+from haiku.utils.testing import PicklerDumpScenarioTest
+
+# Haiku language, pickler unit-test scenarios
+from haiku.pickle import canonical__test, simple__test
+
+class TestEncodingCache(unittest2.TestCase):
+  """Test the bookkeeping of `EncodingCache`: identity keying, least-
+  recently-used eviction, and dropping entries for collected tuples."""
+  def test_identity(self):
+    cache = EncodingCache(64)
+    a, b = Tuple([(0, 'a')]), Tuple([(0, 'a')])
+    cache.put(a, '[1:a]')
+    self.assertEqual(cache.get(a), '[1:a]')
+    self.assertEqual(cache.get(b), None)
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+    self.assertEqual(cache.hit_rate, 0.5)
+
+  def test_eviction(self):
+    cache = EncodingCache(10)
+    a, b, c = Tuple([(0, 'a')]), Tuple([(0, 'b')]), Tuple([(0, 'c')])
+    cache.put(a, 'aaaa')
+    cache.put(b, 'bbbb')
+    cache.get(a)
+    cache.put(c, 'cccc')
+    self.assertEqual(cache.get(b), None)
+    self.assertEqual(cache.get(a), 'aaaa')
+    self.assertEqual((len(cache), cache.size, cache.evictions), (2, 8, 1))
+    cache.put(Tuple(), 'x' * 11)
+    self.assertEqual(len(cache), 2)
+
+  def test_collected(self):
+    cache = EncodingCache(64)
+    cache.put(Tuple([(0, 'a')]), '[1:a]')
+    gc.collect()
+    self.assertEqual((len(cache), cache.size), (0, 0))
+
+  def test_stale(self):
+    cache = EncodingCache(64)
+    a = Tuple([(0, 'a')])
+    cache.put(a, '[1:a]')
+    cache.put(a, '[1:a]')
+    self.assertEqual((len(cache), cache.size), (1, 5))
+    # The entry of a collected tuple whose identity `a` has taken, found
+    # before the weak reference callback has dropped it:
+    cache._entries[id(a)] = (lambda:None, '[1:a]')
+    self.assertEqual(cache.get(a), None)
+    self.assertEqual((len(cache), cache.size), (0, 0))
+
+class TestCanonicalExpressionPicklerCache(unittest2.TestCase):
+  """Test that serialization of Lisp code with `CanonicalExpressionPickler`
+  is unchanged by caching, and that a shared sub-expression is served from
+  the cache."""
+  __metaclass__ = ScenarioMeta
+  _pickler = CanonicalExpressionPickler(cache_size=2**16)
+  class test_dump(PicklerDumpScenarioTest):
+    scenarios = canonical__test.SCENARIOS
+
+  def test_shared_subexpression(self):
+    pickler = CanonicalExpressionPickler(cache_size=2**16)
+    shared = Tuple([(0, '+'), (1, 1), (2, 2)])
+    expression = Tuple([(0, 'list'), (1, shared), (2, shared)])
+    self.assertEqual(pickler.dumps(expression),
+                     CanonicalExpressionPickler().dumps(expression))
+    self.assertEqual(pickler.cache.hits, 1)
+    pickler.cache = None
+    self.assertEqual(pickler.dumps(expression),
+                     CanonicalExpressionPickler().dumps(expression))
+
+class TestSimpleExpressionPicklerCache(unittest2.TestCase):
+  """Test that serialization of Lisp code with `SimpleExpressionPickler` is
+  unchanged by caching."""
+  __metaclass__ = ScenarioMeta
+  _pickler = SimpleExpressionPickler(cache_size=2**16)
+  class test_dump(PicklerDumpScenarioTest):
+    scenarios = simple__test.SCENARIOS
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -36,7 +36,9 @@
 # Haiku language, type definitions
 from haiku.types import *
 
-from .base import BasePickler
+from .base import (
+  BasePickler, _BufferedWriter, _Frame, _NATIVE_CLOSERS, _NATIVE_OPENERS,
+  _NO_KEY, _AWAIT_KEY, _per_class)
 
 __all__ = [
   'CanonicalExpressionPickler',
@@ -61,6 +63,14 @@ from copy import copy
 
 # Python standard library, iteration tools
 from itertools import count, izip
+# Python standard library, memory-mapped files
+import mmap
+# Python standard library, intrinsic operators
+from operator import itemgetter
+# Python standard library, operating system services
+import os
+# Python standard library, regular expressions
+import re
 
 # LEPL: Recursive descent parser for Python applications
 import lepl
@@ -72,6 +82,28 @@ class CanonicalExpressionPickler(BasePickler):
   ""
   ASSOCIATION_OPERATOR = u"="
 
+  # Canonical expressions are unambiguous and length-prefixed, so the native
+  # engine is used by default: it reads each byte-array header and then
+  # slices out the whole payload in one step, making the cost of decoding
+  # proportional to the number of tokens rather than the number of bytes.
+  # The LEPL grammar is kept as the reference implementation.
+  ENGINES        = ('lepl', 'native')
+  DEFAULT_ENGINE = 'native'
+
+  # Byte arrays of at least this many bytes are returned by `load_mmap()` as
+  # views of the mapped file, rather than copied out of it.
+  VIEW_SIZE = 2**12
+
+  def dump(self, ostream, *args):
+    """Serializes a Python-represented haiku expression into canonical-
+    expression notation, and writes the resulting bytes to the duck-typed
+    `ostream` file-like object. Output is written as it is generated,
+    `buffer_size` bytes at a time, so the full string is never held in
+    memory."""
+    writer = _BufferedWriter(ostream, self.buffer_size)
+    self._serialize_parts([(arg,) for arg in args], writer.write)
+    writer.flush(final=True)
+
   def dumps(self, *args):
     """Serialize a Python-represented haiku expression into canonical-
     expression notation.
@@ -83,172 +115,339 @@ class CanonicalExpressionPickler(BasePickler):
     """
     # `dumps()` is allowed an infinite number of positional arguemnts, each of
     # which must be a Python-represented haiku expression. These are converted
-    # into simple-expression notation, then joined together.
-    if len(args) < 1:
-      return ''
-    elif len(args) > 1:
-      return ''.join(map(self.dumps, args))
-
-    # Otherwise only one positional arguement is given, and our task is to
-    # convert it to s-expression notation.
-    return self._serialize(args[0])
+    # into canonical-expression notation, then joined together.
+    pieces = []
+    self._serialize_parts([(arg,) for arg in args], pieces.append)
+    return ''.join(pieces)
 
   def loads(self, expression):
     """Deserializes a haiku expression from a Unicode represented string in
     “Canonical Expression” notation to Python objects."""
+    if self.engine == 'native':
+      return self._loads_native(expression)
     return self._matcher.parse(expression)
 
-  def _serialize(self, expression):
-    """Translates a Python-represented haiku expression into a byte string
-    in “Canonical Expression” notation."""
-    # None/nil/omega value:
-    if isinstance(expression, OmegaCompatible):
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        s2varstring('nil'),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Boolean literals:
-    elif isinstance(expression, BooleanCompatible):
-      if expression:
-        return ''.join([
-          self.TUPLE_OPEN.encode('utf-8'),
-          s2varstring('true'),
-          self.TUPLE_CLOSE.encode('utf-8')])
+  def load_mmap(self, path):
+    """Deserializes the haiku expressions in the canonical-expression file at
+    `path`, which is memory-mapped rather than read into memory. Byte arrays
+    of at least `VIEW_SIZE` bytes are not copied out of the mapping, but
+    returned as `SymbolView`s over it; the mapping stays open for as long as
+    any of these are alive. The native engine is always used, whichever
+    engine the pickler was constructed with."""
+    with open(path, 'rb') as file_:
+      # An empty file cannot be mapped (and holds no expressions):
+      if not os.fstat(file_.fileno()).st_size:
+        return []
+      mapping = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+    return self._loads_native(mapping, view_size=self.VIEW_SIZE)
+
+  def _loads_native(self, expression, view_size=None):
+    """Deserializes canonical-expression notation without LEPL. `expression`
+    may be any object supporting `len()`, indexing and slicing (a byte
+    string, a buffer, or a memory map). Containers are assembled on an
+    explicit stack of `_Frame`s, so there is no Python recursion per level of
+    nesting. If `view_size` is given, byte arrays of at least that many bytes
+    are returned as `SymbolView`s of `expression` instead of copies."""
+    header   = self._header.match
+    tokens   = self._tokens
+    length   = len(expression)
+    position = 0
+
+    # The top-level frame collects the sequence of expressions which is the
+    # return value. `quotes` holds the quoting operators which have been read
+    # but are still waiting on the expression they apply to.
+    frame  = _Frame(None, [], position)
+    stack  = []
+    quotes = []
+
+    while position < length:
+      offset = position
+      kind   = tokens.get(expression[position])
+
+      # Byte arrays: a decimal length and a colon, followed by that many
+      # bytes of payload:
+      if kind is None:
+        token = header(expression, position)
+        if token is None:
+          raise self.SyntaxError(
+            u"expected byte-array length at offset %d" % offset)
+        position = token.end()
+        size = int(token.group(1) or 0)
+        end  = position + size
+        if end > length:
+          raise self.SyntaxError(
+            u"byte array at offset %d runs past end of input" % offset)
+        if view_size is not None and size >= view_size:
+          value = SymbolView(expression, position, size)
+        else:
+          value = Symbol(expression[position:end])
+        position = end
+
       else:
-        return ''.join([
-          self.TUPLE_OPEN.encode('utf-8'),
-          s2varstring('false'),
-          self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Integral numeric literals:
-    elif isinstance(expression, IntegerCompatible):
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        s2varstring('integer'),
-        self.QUOTE_OPERATOR.encode('utf-8'),
-        s2varstring(expression and i2bytearray(expression) or ''),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Rational numeric literals:
-    elif isinstance(expression, FractionCompatible):
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        s2varstring('rational'),
-        self._serialize(expression.numerator),
-        self._serialize(expression.denominator),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Unicode literals:
-    elif isinstance(expression, UnicodeCompatible):
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        s2varstring('decode'),
-        self.QUOTE_OPERATOR.encode('utf-8'),
-        s2varstring(expression.encode('utf-8')),
-        self.ASSOCIATION_OPERATOR.encode('utf-8'),
-        self.QUOTE_OPERATOR.encode('utf-8'),
-        s2varstring('encoding'),
-        self.QUOTE_OPERATOR.encode('utf-8'),
-        s2varstring('utf-8'),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Byte-array literals:
-    elif isinstance(expression, SymbolCompatible):
-      return s2varstring(expression)
-
-    # Sets:
-    elif isinstance(expression, SetCompatible):
-      canonelems = [self._serialize(elem) for elem in expression]
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        s2varstring('set'),
-        ''.join(elem for elem in sorted(canonelems)),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Tuples(/maps/dictionaries):
-    elif isinstance(expression, TupleCompatible):
-      special_pattern = lambda expr:(
-        len(expr) == 2 and set(expr.keys()) == set(range(2)))
-      # Output special forms:
-      if special_pattern(expression):
-        if expression[0] == self.QUOTE_PROCEDURE:
-          if (isinstance(expression[1], TupleCompatible) and
-              all(isinstance(expression[1][key], TupleCompatible) and
-                  special_pattern(expression[1][key])             and
-                  expression[1][key][0] == self.UNQUOTE_PROCEDURE
-                  for key in expression[1])):
-            return ''.join([
-              self.EVAL_DATA_OPEN.encode('utf-8'),
-              self._serialize(Tuple((key, expression[1][key][1])
-                                    for key in expression[1]))[1:-1],
-              self.EVAL_DATA_CLOSE.encode('utf-8')])
-          return ''.join([
-            self.QUOTE_OPERATOR.encode('utf-8'),
-            self._serialize(expression[1])])
-        if expression[0] == self.UNQUOTE_PROCEDURE:
-          return ''.join([
-            self.UNQUOTE_OPERATOR.encode('utf-8'),
-            self._serialize(expression[1])])
-        if expression[0] == self.UNQUOTE_SPLICE_PROCEDURE:
-          return ''.join([
-            self.UNQUOTE_SPLICE_OPERATOR.encode('utf-8'),
-            self._serialize(expression[1])])
-
-      args = []
-      kwargs_keys = dict([
-        (self._serialize(key),
-         self._serialize(expression[key]))
-        for key in expression.keys()
-      ])
-      for key in count():
-        key = self._serialize(key)
-        if key in kwargs_keys:
-          args.append(kwargs_keys[key])
-          del kwargs_keys[key]
+        position += 1
+
+        # Prefix operators apply to whatever expression comes next, which
+        # might not be complete for some time:
+        if kind in self._quotes:
+          quotes.append(self._quotes[kind])
+          continue
+
+        # The association operator is also prefix: the next two expressions
+        # are a key and its value.
+        elif kind == 'association':
+          if frame.kind not in ('tuple', 'eval_data') or frame.key is not _NO_KEY or quotes:
+            raise self.SyntaxError(
+              u"unexpected %s at offset %d" % (
+                repr(self.ASSOCIATION_OPERATOR), offset))
+          frame.key = _AWAIT_KEY
+          continue
+
+        # Opening a container saves the pending quoting operators with the
+        # new frame, to be applied once the container has been closed:
+        elif kind in _NATIVE_CLOSERS:
+          stack.append(frame)
+          frame  = _Frame(kind, quotes, offset)
+          quotes = []
+          continue
+
+        else: # Closing a container:
+          if frame.kind != _NATIVE_OPENERS[kind] or frame.key is not _NO_KEY or quotes:
+            raise self.SyntaxError(
+              u"unexpected %s at offset %d" % (
+                repr(expression[offset]), offset))
+          if frame.kind == 'sequence':
+            value = Sequence(frame.args)
+          else:
+            value = self._build_tuple(frame.args, frame.kwargs)
+            if frame.kind == 'eval_data':
+              value = self._build_eval_data(value)
+          quotes = frame.quotes
+          frame  = stack.pop()
+
+      # A complete expression has been read. Apply any quoting operators,
+      # innermost first, then hand it to the enclosing frame:
+      while quotes:
+        value = Tuple([(0, quotes.pop()), (1, value)])
+      if frame.key is _NO_KEY:
+        frame.args.append(value)
+      elif frame.key is _AWAIT_KEY:
+        frame.key = value
+      else:
+        frame.kwargs.append((frame.key, value))
+        frame.key = _NO_KEY
+
+    if stack or quotes:
+      raise self.SyntaxError(
+        u"unexpected end of input (unclosed expression at offset %d)" % (
+          frame.offset if stack else length))
+    return frame.args
+
+  def _top_level_ends(self, expression):
+    """Yields the offset just past each top-level expression, found by
+    counting brackets and skipping over byte-array payloads."""
+    header   = self._header.match
+    tokens   = self._tokens
+    length   = len(expression)
+    position = depth = 0
+    while position < length:
+      kind = tokens.get(expression[position])
+      if kind is None:
+        token = header(expression, position)
+        if token is None:
+          # Malformed input, for `loads()` to report:
+          return
+        position = token.end() + int(token.group(1) or 0)
+      else:
+        position += 1
+        if kind in _NATIVE_CLOSERS:
+          depth += 1
+          continue
+        elif kind in _NATIVE_OPENERS:
+          depth -= 1
         else:
-          break
-      return ''.join([
-        self.TUPLE_OPEN.encode('utf-8'),
-        ''.join([
-          ''.join(args),
-          ''.join(
-            ''.join([
-              self.ASSOCIATION_OPERATOR.encode('utf-8'),
-              serialized_key,
-              kwargs_keys[serialized_key],
-            ]) for serialized_key in sorted(kwargs_keys.keys()))]),
-        self.TUPLE_CLOSE.encode('utf-8')])
-
-    # Relations:
-    elif isinstance(expression, RelationCompatible):
-      raise NotImplementedError
-
-    # Sequences(/lists):
-    elif isinstance(expression, SequenceCompatible):
-      return ''.join([
-        self.SEQUENCE_OPEN.encode('utf-8'),
-        ''.join(self._serialize(elem) for elem in expression),
-        self.SEQUENCE_CLOSE.encode('utf-8')])
-
-    # Matrices:
-    elif isinstance(expression, MatrixCompatible):
-      raise NotImplementedError
-
-    # Procedures(/lambdas):
-    elif isinstance(expression, Procedure):
-      raise NotImplementedError
-
-    # That's it! We should have matched one of the previous cases and returned
-    # already if we were a valid Python-represented haiku expression. So we
-    # can assume the caller passed us something in error and report the
-    # problem:
-    raise ValueError(
-      u"unrecognized input (not a valid expression): '%s'" % repr(expression))
-
-  def __init__(self, *args, **kwargs):
-    "Sets up a parser using the LEPL package."
-    super(CanonicalExpressionPickler, self).__init__(*args, **kwargs)
+          # Prefix operators, which are part of the expression which follows:
+          continue
+      if not depth:
+        yield position
+
+  def _serialize_to_string(self, expression):
+    """Translates a Python-represented haiku expression into a byte string
+    in “Canonical Expression” notation. Used where the serialized form of a
+    sub-expression decides its position within its container."""
+    pieces = []
+    self._serialize(expression, pieces.append)
+    return ''.join(pieces)
+
+  def _serialize_elements(self, expression, write, unquote=False):
+    """Translates the elements of a tuple into “Canonical Expression”
+    notation, without the enclosing brackets: positional elements in order,
+    followed by keyword elements in the sort order of their serialized keys.
+    If `unquote` is set, each value is an unquote form of which only the
+    operand is written (as in the body of eval-data)."""
+    # Positional elements are those with the keys 0, 1, 2, ... up to the first
+    # missing integer. Only keys which would be serialized as integers count
+    # (not, for example, `True` or `Fraction(1)`, which compare equal to 1),
+    # and these are recognized by type without having to serialize them.
+    integers = set(key for key in expression
+                   if isinstance(key, IntegerCompatible) and
+                      not isinstance(key, BooleanCompatible))
+    positional = 0
+    while positional in integers:
+      positional += 1
+    for key in xrange(positional):
+      value = expression[key]
+      if unquote:
+        value = value[1]
+      write((value,))
+
+    # Each remaining key is serialized exactly once, to determine its order:
+    keywords = sorted(
+      ((self._serialize_to_string(key), key) for key in expression
+       if not (key in integers and 0 <= key < positional)),
+      key = itemgetter(0))
+    association = self._lexemes['association']
+    for serialized_key, key in keywords:
+      value = expression[key]
+      if unquote:
+        value = value[1]
+      write(association)
+      write(serialized_key)
+      write((value,))
+
+  def _serialize_tuple(self, expression, write):
+    """Translates a tuple into “Canonical Expression” notation, using the
+    quote operators and eval-data syntax for the quote special forms."""
+    lexemes = self._lexemes
+    special_pattern = lambda expr:(
+      len(expr) == 2 and 0 in expr and 1 in expr)
+    # Output special forms:
+    if special_pattern(expression):
+      if expression[0] == self.QUOTE_PROCEDURE:
+        if (isinstance(expression[1], TupleCompatible) and
+            all(isinstance(expression[1][key], TupleCompatible) and
+                special_pattern(expression[1][key])             and
+                expression[1][key][0] == self.UNQUOTE_PROCEDURE
+                for key in expression[1])):
+          write(lexemes['eval_data'])
+          self._serialize_elements(expression[1], write, unquote=True)
+          write(lexemes['eval_data_close'])
+          return
+        write(lexemes['quote'])
+        write((expression[1],))
+        return
+      if expression[0] == self.UNQUOTE_PROCEDURE:
+        write(lexemes['unquote'])
+        write((expression[1],))
+        return
+      if expression[0] == self.UNQUOTE_SPLICE_PROCEDURE:
+        write(lexemes['unquote_splice'])
+        write((expression[1],))
+        return
+
+    write(lexemes['tuple'])
+    self._serialize_elements(expression, write)
+    write(lexemes['tuple_close'])
+
+  # Handlers of the kinds of node, in the order in which they are tried by
+  # `_serialize_node()`:
+
+  def _serialize_omega(self, expression, write):
+    "None/nil/omega value."
+    write(self._lexemes['nil'])
+
+  def _serialize_boolean(self, expression, write):
+    "Boolean literals."
+    if expression:
+      write(self._lexemes['true'])
+    else:
+      write(self._lexemes['false'])
+
+  def _serialize_integer(self, expression, write):
+    "Integral numeric literals."
+    lexemes = self._lexemes
+    write(''.join([
+      lexemes['integer'],
+      s2varstring(expression and i2bytearray(expression) or ''),
+      lexemes['tuple_close']]))
+
+  def _serialize_fraction(self, expression, write):
+    "Rational numeric literals."
+    lexemes = self._lexemes
+    write(lexemes['rational'])
+    write((expression.numerator,))
+    write((expression.denominator,))
+    write(lexemes['tuple_close'])
+
+  def _serialize_unicode(self, expression, write):
+    "Unicode literals."
+    write(''.join([
+      self._lexemes['decode'],
+      s2varstring(expression.encode('utf-8')),
+      self._lexemes['encoding']]))
+
+  def _serialize_symbol(self, expression, write):
+    "Byte-array literals."
+    # The length prefix and the payload are written separately, so that
+    # large byte arrays are not copied just to be prefixed. (`str()` is a
+    # no-op for a `Symbol`, but copies out the bytes of a `SymbolView`.)
+    write(i2varnumber(len(expression)))
+    write(str(expression))
+
+  def _serialize_set(self, expression, write):
+    "Sets."
+    canonelems = [self._serialize_to_string(elem) for elem in expression]
+    write(self._lexemes['set'])
+    for elem in sorted(canonelems):
+      write(elem)
+    write(self._lexemes['tuple_close'])
+
+  def _serialize_sequence(self, expression, write):
+    "Sequences(/lists)."
+    write(self._lexemes['sequence'])
+    for elem in expression:
+      write((elem,))
+    write(self._lexemes['sequence_close'])
+
+  def _serialize_unsupported(self, expression, write):
+    "Relations, matrices and procedures(/lambdas)."
+    raise NotImplementedError
+
+  # Tuples(/maps/dictionaries) are translated by `_serialize_tuple()`. Other
+  # types of node can be supported by registering the names of their handler
+  # methods here, which are looked up on the pickler so that subclasses may
+  # override them:
+  serializers = TypeDispatch(
+    (OmegaCompatible,    '_serialize_omega'),
+    (BooleanCompatible,  '_serialize_boolean'),
+    (IntegerCompatible,  '_serialize_integer'),
+    (FractionCompatible, '_serialize_fraction'),
+    (UnicodeCompatible,  '_serialize_unicode'),
+    (SymbolCompatible,   '_serialize_symbol'),
+    (SetCompatible,      '_serialize_set'),
+    (TupleCompatible,    '_serialize_tuple'),
+    (RelationCompatible, '_serialize_unsupported'),
+    (SequenceCompatible, '_serialize_sequence'),
+    (MatrixCompatible,   '_serialize_unsupported'),
+    (Procedure,          '_serialize_unsupported'))
+
+  def _serialize_node(self, expression, write):
+    """Translates one node of a Python-represented haiku expression into
+    “Canonical Expression” notation, passing the generated bytes and the
+    sub-expressions still to be translated to `write()` (see
+    `_serialize_parts()`). The node is handed to the handler for its type in
+    `serializers`."""
+    handler = self.serializers.lookup(expression)
+    # If there is none, we can assume the caller passed us something in error
+    # and report the problem:
+    if handler is None:
+      raise ValueError(
+        u"unrecognized input (not a valid expression): '%s'" % repr(expression))
+    getattr(self, handler)(expression, write)
+
+  @_per_class
+  def _matcher(cls):
+    """The grammar of the LEPL parse engine, built the first time it is used
+    and shared by every instance of the class."""
 
     Expression = lepl.Delayed()
 
@@ -270,28 +469,28 @@ class CanonicalExpressionPickler(BasePickler):
 
     # Special forms for quoting:
     _QuoteSyntax = lambda expr:Tuple([
-      (0, self.QUOTE_PROCEDURE),
+      (0, cls.QUOTE_PROCEDURE),
       (1, expr)])
     QuoteSyntax = (
-      ~lepl.Literal(self.QUOTE_OPERATOR) & Expression) >> _QuoteSyntax
+      ~lepl.Literal(cls.QUOTE_OPERATOR) & Expression) >> _QuoteSyntax
 
     _UnquoteSyntax = lambda expr:Tuple([
-      (0, self.UNQUOTE_PROCEDURE),
+      (0, cls.UNQUOTE_PROCEDURE),
       (1, expr)])
     UnquoteSyntax = (
-      ~lepl.Literal(self.UNQUOTE_OPERATOR) & Expression) >> _UnquoteSyntax
+      ~lepl.Literal(cls.UNQUOTE_OPERATOR) & Expression) >> _UnquoteSyntax
 
     _UnquoteSpliceSyntax = lambda expr:Tuple([
-      (0, self.UNQUOTE_SPLICE_PROCEDURE),
+      (0, cls.UNQUOTE_SPLICE_PROCEDURE),
       (1, expr)])
     UnquoteSpliceSyntax = (
-      ~lepl.Literal(self.UNQUOTE_SPLICE_OPERATOR) & Expression) >> _UnquoteSyntax
+      ~lepl.Literal(cls.UNQUOTE_SPLICE_OPERATOR) & Expression) >> _UnquoteSpliceSyntax
 
     # A keyword expression is a component of the tuple definition: a mapping
     # of one data to another (the key/value pair).
     _KeywordExpression = lambda parts:len(parts)-1 and tuple(parts) or parts[0]
     KeywordExpression = ((
-        ~lepl.Literal(self.ASSOCIATION_OPERATOR.encode('utf-8'))
+        ~lepl.Literal(cls.ASSOCIATION_OPERATOR.encode('utf-8'))
         & Expression & Expression
       ) | Expression) > _KeywordExpression
 
@@ -307,36 +506,36 @@ class CanonicalExpressionPickler(BasePickler):
       args   = filter(lambda arg:arg not in kwargs, parts)
       tuple_ = Tuple(kwargs)
       if len(kwargs) != len(tuple_):
-        raise self.SyntaxError(
+        raise cls.SyntaxError(
           u"duplicate keys in keyword arguments")
       tuple_ = Tuple([x for x in izip(icount(), args)] + kwargs)
       if len(parts) != len(tuple_):
         dups = filter(lambda x:x in tuple_, xrange(len(args)))
-        raise self.SyntaxError(
+        raise cls.SyntaxError(
           u"redundant parameter(s) specified positionally and as keyword arguments")
       return tuple_
     TupleSyntax = (
-      ~lepl.Literal(self.TUPLE_OPEN) &
+      ~lepl.Literal(cls.TUPLE_OPEN) &
       KeywordExpression[0:] &
-      ~lepl.Literal(self.TUPLE_CLOSE)) > _TupleSyntax
+      ~lepl.Literal(cls.TUPLE_CLOSE)) > _TupleSyntax
 
     # Eval-data special form:
     def _EvalDataSyntax(parts):
       tuple_ = _TupleSyntax(parts)
       tuple_ = Tuple([(key, _UnquoteSyntax(value)) for key, value in tuple_.items()])
-      tuple_ = Tuple([(0, self.QUOTE_PROCEDURE), (1, tuple_)])
+      tuple_ = Tuple([(0, cls.QUOTE_PROCEDURE), (1, tuple_)])
       return tuple_
     EvalDataSyntax = (
-      ~lepl.Literal(self.EVAL_DATA_OPEN) &
+      ~lepl.Literal(cls.EVAL_DATA_OPEN) &
       KeywordExpression[0:] &
-      ~lepl.Literal(self.EVAL_DATA_CLOSE)) > _EvalDataSyntax
+      ~lepl.Literal(cls.EVAL_DATA_CLOSE)) > _EvalDataSyntax
 
     # Sequence special form:
     _SequenceSyntax = lambda args:Sequence(args)
     SequenceSyntax = (
-      ~lepl.Literal(self.SEQUENCE_OPEN) &
+      ~lepl.Literal(cls.SEQUENCE_OPEN) &
       Expression[0:] &
-      ~lepl.Literal(self.SEQUENCE_CLOSE)) > _SequenceSyntax
+      ~lepl.Literal(cls.SEQUENCE_CLOSE)) > _SequenceSyntax
 
     # Now that we've defined each component, we can go back and complete
     # Expression's definition:
@@ -347,8 +546,60 @@ class CanonicalExpressionPickler(BasePickler):
     # separated by whitespace.
     Syntax = Expression[0:] & ~lepl.Eos()
 
-    # Save the `Syntax` matcher for use by other methods:
-    self._matcher = Syntax
+    return Syntax
+
+  # The native engine recognizes punctuation by looking up single bytes, and
+  # byte-array headers with a regular expression:
+  _header = re.compile(r"([1-9][0-9]*)?:")
+
+  @_per_class
+  def _tokens(cls):
+    "The kind of each punctuation token, keyed by its encoded form."
+    return dict((token.encode('utf-8'), kind) for token, kind in [
+      (cls.QUOTE_OPERATOR,          'quote'),
+      (cls.UNQUOTE_OPERATOR,        'unquote'),
+      (cls.UNQUOTE_SPLICE_OPERATOR, 'unquote_splice'),
+      (cls.ASSOCIATION_OPERATOR,    'association'),
+      (cls.TUPLE_OPEN,              'tuple'),
+      (cls.TUPLE_CLOSE,             'tuple_close'),
+      (cls.EVAL_DATA_OPEN,          'eval_data'),
+      (cls.EVAL_DATA_CLOSE,         'eval_data_close'),
+      (cls.SEQUENCE_OPEN,           'sequence'),
+      (cls.SEQUENCE_CLOSE,          'sequence_close'),
+    ])
+
+  @_per_class
+  def _quotes(cls):
+    "The procedure named by each kind of quote operator."
+    return {
+      'quote':          cls.QUOTE_PROCEDURE,
+      'unquote':        cls.UNQUOTE_PROCEDURE,
+      'unquote_splice': cls.UNQUOTE_SPLICE_PROCEDURE,
+    }
+
+  @_per_class
+  def _lexemes(cls):
+    """The encoded form of each punctuation token, along with the fixed parts
+    of the literal forms, for use by the serializer."""
+    lexemes = dict((kind, token) for token, kind in cls._tokens.items())
+    lexemes.update({
+      'nil':      ''.join([lexemes['tuple'], s2varstring('nil'),
+                           lexemes['tuple_close']]),
+      'true':     ''.join([lexemes['tuple'], s2varstring('true'),
+                           lexemes['tuple_close']]),
+      'false':    ''.join([lexemes['tuple'], s2varstring('false'),
+                           lexemes['tuple_close']]),
+      'integer':  ''.join([lexemes['tuple'], s2varstring('integer'),
+                           lexemes['quote']]),
+      'rational': ''.join([lexemes['tuple'], s2varstring('rational')]),
+      'decode':   ''.join([lexemes['tuple'], s2varstring('decode'),
+                           lexemes['quote']]),
+      'encoding': ''.join([lexemes['association'], lexemes['quote'],
+                           s2varstring('encoding'), lexemes['quote'],
+                           s2varstring('utf-8'), lexemes['tuple_close']]),
+      'set':      ''.join([lexemes['tuple'], s2varstring('set')]),
+    })
+    return lexemes
 
 # ===----------------------------------------------------------------------===
 # End of File
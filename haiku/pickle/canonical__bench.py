@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.pickle.canonical__bench ---------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Throughput of the `CanonicalExpressionPickler` serializer on expressions of
+increasing depth and width, where it should stay flat (the cost of `dumps()`
+being linear in the size of its input), and of the native parse engine on the
+nested expressions. Run with:
+
+  python -m haiku.pickle.canonical__bench
+"""
+
+# Haiku language, c-expression pickler
+from haiku.pickle import CanonicalExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, benchmarking harness
+from haiku.utils.benchmark import measure, report
+
+def main():
+  # Serialization of a chain of nested tuples, [f [f [f ... 1:x]]], and its
+  # deserialization by the native engine. Both keep explicit stacks, so
+  # throughput should stay flat far beyond the recursion limit:
+  pickler = CanonicalExpressionPickler(engine='native')
+  dump_rows, load_rows = [], []
+  for depth in (10, 100, 1000, 10000, 100000):
+    expression = 'x'
+    for level in xrange(depth):
+      expression = Tuple([(0, 'f'), (1, expression)])
+    lisp = pickler.dumps(expression)
+    dump_rows.append((u"depth %d" % depth,
+                      measure(lambda:pickler.dumps(expression), repeat=1),
+                      2 * depth + 1, u"nodes"))
+    load_rows.append((u"depth %d" % depth,
+                      measure(lambda:pickler.loads(lisp), repeat=1),
+                      2 * depth + 1, u"nodes"))
+  report(u"dumps() of nested tuples", dump_rows)
+  report(u"loads() of nested tuples (native engine)", load_rows)
+  pickler = CanonicalExpressionPickler()
+
+  # ...and of a single flat tuple mixing positional and keyword elements:
+  rows = []
+  for width in (10, 100, 1000, 10000):
+    expression = Tuple([(index, index) for index in xrange(width)] +
+                       [(u"key%d" % index, 'value') for index in xrange(width)])
+    rows.append((u"width %d" % (2 * width),
+                 measure(lambda:pickler.dumps(expression)),
+                 4 * width, u"nodes"))
+  report(u"dumps() of flat tuples", rows)
+
+if __name__ == '__main__':
+  main()
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -33,6 +33,13 @@
 # DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # ===----------------------------------------------------------------------===
 
+# Python standard library, base64 encoding
+from base64 import urlsafe_b64encode
+# Python standard library, operating system services
+import os
+# Python standard library, temporary files
+import tempfile
+
 # Python standard library, unit-testing
 import unittest2
 
@@ -181,6 +188,11 @@ SCENARIOS = [
   dict(lisp='[]', python=[{}],                           skip=['eval']),
   dict(lisp='{}', python=[{0:'quote',1:{}}], eval_=[{}]),
   dict(lisp='()', python=[()],               eval_=[()]),
+  # Eval-data whose elements happen to resemble a quote form:
+  dict(lisp   = '{5:quote1:x}',
+       python = [{0:'quote',1:{0:{0:'unquote',1:'quote'},
+                               1:{0:'unquote',1:'x'}}}],
+       skip   = ['eval']),
   # FIXME: implement correct pattern matching detection of eval-data tuples,
   #   and implement associated unit tests
 
@@ -631,6 +643,120 @@ class TestCanonicalExpressionPickler(unittest2.TestCase):
   class test_eval(EvaluateScenarioTest):
     scenarios = SCENARIOS
 
+class TestCanonicalExpressionPicklerStreamingDump(unittest2.TestCase):
+  """Test incremental serialization of Lisp code with
+  `CanonicalExpressionPickler.dump()`, flushing after every byte so that
+  output is written as the expression tree is walked."""
+  __metaclass__ = ScenarioMeta
+  _pickler = CanonicalExpressionPickler(buffer_size=1)
+  class test_dump(PicklerDumpScenarioTest):
+    scenarios = SCENARIOS
+
+  def test_large_byte_array_is_not_copied(self):
+    writes = []
+    class ostream(object):
+      write = staticmethod(writes.append)
+    payload = 'x' * 1024
+    CanonicalExpressionPickler(buffer_size=16).dump(ostream, (payload,))
+    self.assertEqual(''.join(writes), '(1024:' + payload + ')')
+    self.assertTrue(any(write is payload for write in writes))
+
+class TestCanonicalExpressionPicklerSubclass(unittest2.TestCase):
+  """Test that `CanonicalExpressionPickler` serializes nodes with the
+  handlers overridden by a subclass."""
+  def test_overrides(self):
+    class NilPickler(CanonicalExpressionPickler):
+      def _serialize_boolean(self, expression, write):
+        self._serialize_omega(None, write)
+    self.assertEqual(NilPickler().dumps([True, [False]]),
+                     CanonicalExpressionPickler().dumps([None, [None]]))
+
+class TestCanonicalExpressionPicklerLEPLEngine(unittest2.TestCase):
+  """Test deserialization of Lisp code to Python objects using the
+  `CanonicalExpressionPickler` class with its reference LEPL parse engine."""
+  __metaclass__ = ScenarioMeta
+  _pickler = CanonicalExpressionPickler(engine='lepl')
+  _environment = Environment(parent=builtinEnvironment)
+  _interpreter = BaseInterpreter(pickler=_pickler, environment=_environment)
+  class test_load(PicklerLoadScenarioTest):
+    scenarios = SCENARIOS
+  class test_eval(EvaluateScenarioTest):
+    scenarios = SCENARIOS
+
+class TestCanonicalExpressionPicklerLoadMmap(unittest2.TestCase):
+  """Test deserialization of Lisp code from a memory-mapped file with
+  `CanonicalExpressionPickler.load_mmap()`."""
+  def _load_mmap(self, data):
+    fd, path = tempfile.mkstemp()
+    try:
+      os.write(fd, data)
+      os.close(fd)
+      return CanonicalExpressionPickler().load_mmap(path)
+    finally:
+      os.unlink(path)
+
+  def test_scenarios(self):
+    for scenario in SCENARIOS:
+      if 'load' not in scenario.get('skip', []):
+        self.assertEqual(self._load_mmap(scenario['lisp']), scenario['python'])
+
+  def test_large_byte_arrays_are_views(self):
+    blob = os.urandom(CanonicalExpressionPickler.VIEW_SIZE)
+    expression = Tuple([(0, 'a'), (1, blob)])
+    result = self._load_mmap(CanonicalExpressionPickler().dumps(expression))
+    self.assertEqual(result, [expression])
+    self.assertTrue(isinstance(result[0][0], Symbol))
+    self.assertTrue(isinstance(result[0][1], SymbolView))
+    self.assertEqual(str(result[0][1]), blob)
+    self.assertEqual(CanonicalExpressionPickler().dumps(*result),
+                     CanonicalExpressionPickler().dumps(expression))
+
+  def test_views_evaluate_as_symbols(self):
+    blob = u'\xe9'.encode('utf-8') * CanonicalExpressionPickler.VIEW_SIZE
+    view, = self._load_mmap(CanonicalExpressionPickler().dumps(blob))
+    self.assertTrue(isinstance(view, SymbolView))
+    environment = Environment(parent=builtinEnvironment)
+    environment[Symbol('blob')] = view
+    environment[Symbol('x')]    = 'x'
+    interpreter = BaseInterpreter(pickler=CanonicalExpressionPickler(),
+                                  environment=environment)
+    for name, args, result in [
+        ('decode',    ['blob'],      blob.decode('utf-8')),
+        ('b64encode', ['blob'],      urlsafe_b64encode(blob)),
+        ('cat',       ['blob', 'x'], blob + 'x')]:
+      expression = Tuple([(0, Symbol(name))] +
+        [(index, Symbol(arg)) for index, arg in enumerate(args, 1)])
+      self.assertEqual(interpreter.evaluate(expression), result)
+      self.assertEqual(interpreter.compile(expression)(), result)
+
+class TestCanonicalExpressionPicklerLoadsParallel(unittest2.TestCase):
+  """Test that `CanonicalExpressionPickler.loads_parallel()` splits a
+  document between top-level expressions, and gives the same results as
+  `loads()`."""
+  def test_same_as_loads(self):
+    inputs = [scenario['lisp'] for scenario in SCENARIOS
+              if 'load' not in scenario.get('skip', [])]
+    document = ''.join(inputs * 3)
+    for engine in CanonicalExpressionPickler.ENGINES:
+      pickler = CanonicalExpressionPickler(engine=engine)
+      pickler.PARALLEL_MIN_SIZE = 0
+      self.assertTrue(len(pickler._split(document, 8)) > 1)
+      self.assertEqual(pickler.loads_parallel(document, processes=2),
+                       pickler.loads(document))
+
+class TestCanonicalExpressionPicklerDeepNesting(unittest2.TestCase):
+  """Test that expressions nested far deeper than the recursion limit are
+  serialized, and read back by the native parse engine."""
+  DEPTH = 5000
+  def test_deep_nesting(self):
+    expression = Symbol('x')
+    for index in xrange(self.DEPTH):
+      expression = Tuple([(0, Symbol('f')), (1, (expression,))])
+    pickler = CanonicalExpressionPickler(engine='native')
+    lisp = pickler.dumps(expression)
+    self.assertEqual(lisp, '[1:f(' * self.DEPTH + '1:x' + ')]' * self.DEPTH)
+    self.assertEqual(pickler.dumps(*pickler.loads(lisp)), lisp)
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
@@ -37,7 +37,9 @@
 from haiku.types import *
 
 # Haiku language, pickler abstract base class
-from .base import BasePickler
+from .base import (
+  BasePickler, _BufferedWriter, _Frame, _NATIVE_CLOSERS, _NATIVE_OPENERS,
+  _NO_KEY, _per_class)
 
 __all__ = [
   'SimpleExpressionPickler',
@@ -51,10 +53,14 @@ __all__ = [
 
 # Python standard library, Base64 encoding
 from base64 import urlsafe_b64encode as b64encode
+# Python standard library, codec registry
+import codecs
 # Python standard library, iteration tools
 from itertools import count, izip
 # Python standard library, intrinsic operators
 from operator import mul
+# Python standard library, regular expressions
+import re
 
 # LEPL: Recursive descent parser for Python applications
 import lepl
@@ -99,18 +105,26 @@ class SimpleExpressionPickler(BasePickler):
   SYMBOL_INITIAL    = set(u"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ!?*+-/%\\&|^_~<=>")
   SYMBOL_SUBSEQUENT = SYMBOL_INITIAL.union(INTEGER_DIGIT)
 
+  # Two interchangeable parse engines are available. The LEPL grammar is the
+  # reference implementation; the native engine is a hand-written, single-
+  # pass tokenizer which builds the same `Tuple`/`Sequence`/`Symbol` values
+  # using an explicit stack, and runs in time linear to the input.
+  ENGINES        = ('lepl', 'native')
+  DEFAULT_ENGINE = 'lepl'
+
   def dump(self, ostream, *args, **kwargs):
     """Serializes a Python-represented haiku expression into simple-expression
     notation with Unicode encoding (`'utf-8'` unless overridden with the
     optional keyword parameter `'encoding'`), and writes the resulting string
-    to the duck-typed `ostream` file-like object."""
+    to the duck-typed `ostream` file-like object. Output is written as it is
+    generated, `buffer_size` characters at a time, so the full string is
+    never held in memory."""
     encoding = kwargs.pop('encoding', 'utf-8')
-    # FIXME: `dump()` and `dumps()` should be rewritten so that `dump()` does
-    #   all of the work, and `dumps()` calls dump with a `StringIO` object.
-    #   That way simple-expressions can be written to disk as they are
-    #   generated, instead of having to generate the entire s-expression
-    #   string first, as is the case now.
-    return ostream.write(self.dumps(*args, **kwargs).encode(encoding))
+    writer = _BufferedWriter(ostream, self.buffer_size, encoding)
+    parts = []
+    self._serialize_each(args, parts.append)
+    self._serialize_parts(parts, writer.write)
+    writer.flush(final=True)
 
   def dumps(self, *args):
     """Serialize a Python-represented haiku expression into simple-expression
@@ -124,162 +138,268 @@ class SimpleExpressionPickler(BasePickler):
     # `dumps()` is allowed an infinite number of positional arguemnts, each of
     # which must be a Python-represented haiku expression. These are converted
     # into simple-expression notation, then joined together with whitespace.
-    if len(args) < 1:
-      return u""
-    elif len(args) > 1:
-      return u" ".join(map(self.dumps, args))
-
-    # Otherwise only one positional arguement is given, and our task is to
-    # convert it to s-expression notation.
-    return self._serialize(args[0])
+    parts, pieces = [], []
+    self._serialize_each(args, parts.append)
+    self._serialize_parts(parts, pieces.append)
+    return u"".join(pieces)
 
   def load(self, istream, **kwargs):
     """Deserializes a haiku expression from an input stream in “Simple
     Expression” notation to Python objects."""
-    # FIXME: refactor `loads()` functionality into `load()`, performing
-    #        tokenization with a buffer so that large expressions can be
-    #        deserialized without having to first load the entire expression
-    #        into memory.
+    # The native engine tokenizes with a buffer, so that large expressions
+    # can be deserialized without having to first load the entire input into
+    # memory. The LEPL grammar, however, requires the whole input up front.
+    if self.engine == 'native':
+      return list(self.iterload(istream, **kwargs))
     encoding = kwargs.pop('encoding', 'utf-8')
     expression = istream.read().decode(encoding)
     return self.loads(expression, **kwargs)
 
+  def iterload(self, istream, **kwargs):
+    """Deserializes haiku expressions from an input stream in “Simple
+    Expression” notation, yielding each top-level expression as soon as it
+    is complete. The stream is read and decoded (as `'utf-8'` unless
+    overridden with the optional keyword parameter `'encoding'`)
+    `buffer_size` bytes at a time, so that only the expression being parsed
+    and a bounded buffer are held in memory. The native engine is always
+    used, whichever engine the pickler was constructed with.
+
+      >>> from StringIO import StringIO
+      >>> from haiku.pickle import SimpleExpressionPickler
+      >>> pickler = SimpleExpressionPickler()
+      >>> for expression in pickler.iterload(StringIO('[+ 1 2] [* 3 4]')):
+      ...   print expression
+      frozendict({0L: '+', 1L: 1L, 2L: 2L})
+      frozendict({0L: '*', 1L: 3L, 2L: 4L})
+    """
+    encoding = kwargs.pop('encoding', 'utf-8')
+    decoder  = codecs.getincrementaldecoder(encoding)()
+    parser   = _NativeParser(self)
+    while True:
+      chunk = istream.read(self.buffer_size)
+      final = not chunk
+      for expression in parser.feed(decoder.decode(chunk, final), final):
+        yield expression
+      if final:
+        break
+
   def loads(self, expression):
     """Deserializes a haiku expression from a Unicode represented string in
     “Simple Expression” notation to Python objects."""
+    if self.engine == 'native':
+      return _NativeParser(self).feed(expression, final=True)
     return self._matcher.parse(expression)
 
-  def _serialize(self, expression):
-    """Translates a Python-represented haiku expression into a Unicode string
-    in “Simple Expression” notation."""
-    # None/nil/omega value:
-    if isinstance(expression, OmegaCompatible):
-      return u"".join([self.CONSTANT_INDICATOR, u"nil"])
-
-    # Boolean literals:
-    elif isinstance(expression, BooleanCompatible):
-      if expression:
-        return u"".join([self.CONSTANT_INDICATOR, u"t"])
+  def _top_level_ends(self, expression):
+    """Yields the offset of the first token after each top-level tuple, eval-
+    data or sequence expression, found by counting brackets outside of
+    string literals and comments. (Cutting before, rather than after, the
+    whitespace which follows an expression keeps the LEPL engine happy, as it
+    does not accept leading whitespace.)"""
+    brackets, skip = self._brackets.finditer, self._separator.match
+    depth = 0
+    for token in brackets(expression):
+      if token.lastgroup == 'open':
+        depth += 1
+      elif token.lastgroup == 'close':
+        depth -= 1
+        if not depth:
+          yield skip(expression, token.end()).end()
+
+  @_per_class
+  def _brackets(cls):
+    "Matches the brackets, string literals and comments of the input."
+    return re.compile(u"|".join([
+      ur'"[^"\\]*(?:\\.[^"\\]*)*"',
+      u"%s[^\n]*" % re.escape(cls.COMMENT_INDICATOR),
+      u"(?P<open>[%s])" % u"".join(map(re.escape, [
+        cls.TUPLE_OPEN, cls.EVAL_DATA_OPEN, cls.SEQUENCE_OPEN])),
+      u"(?P<close>[%s])" % u"".join(map(re.escape, [
+        cls.TUPLE_CLOSE, cls.EVAL_DATA_CLOSE, cls.SEQUENCE_CLOSE])),
+    ]), re.DOTALL | re.UNICODE)
+
+  @_per_class
+  def _separator(cls):
+    "Matches any whitespace and comments."
+    return re.compile(ur"(?:[\t\n\x0b\x0c\r ]|%s[^\n]*)*" % (
+      re.escape(cls.COMMENT_INDICATOR)), re.UNICODE)
+
+  def _native_constant(self, name):
+    "Maps the name of a `#`-prefixed constant to its value."
+    name = name.lower()
+    if name in ('nil',):
+      return Omega()
+    if name in ('f','false'):
+      return Boolean(False)
+    if name in ('t','true'):
+      return Boolean(True)
+    if name in ('empty',):
+      return Symbol('')
+    raise self.SyntaxError(
+      u"unrecognized constant name: %s" % repr(name))
+
+  def _serialize_each(self, expressions, write):
+    """Passes the parts of each of a sequence of Python-represented haiku
+    expressions to `write()`, separated by whitespace (see
+    `_serialize_parts()`)."""
+    for index, expression in enumerate(expressions):
+      if index:
+        write(u" ")
+      write((expression,))
+
+  def _serialize_tuple(self, expression, write):
+    """Translates a tuple into “Simple Expression” notation, using the
+    quote operators for the quote special forms."""
+    special_pattern = lambda expr:(
+      len(expr) == 2 and set(expr.keys()) == set(range(2)))
+    # Output special forms:
+    if special_pattern(expression):
+      if expression[0] == self.QUOTE_PROCEDURE:
+        #if (isinstance(expression[1], TupleCompatible) and
+        #    all(special_pattern(expression[1][key]) and
+        #        expression[1][key][0] == self.UNQUOTE_PROCEDURE
+        #        for key in expression[1].keys())):
+        #  write(self.EVAL_DATA_OPEN)
+        #  write((expression[1],))
+        #  write(self.EVAL_DATA_CLOSE)
+        #  return
+        write(self.QUOTE_OPERATOR)
+        write((expression[1],))
+        return
+      if expression[0] == self.UNQUOTE_PROCEDURE:
+        write(self.UNQUOTE_OPERATOR)
+        write((expression[1],))
+        return
+      if expression[0] == self.UNQUOTE_SPLICE_PROCEDURE:
+        write(self.UNQUOTE_SPLICE_OPERATOR)
+        write((expression[1],))
+        return
+
+    args = []
+    kwargs_keys = expression.keys()
+    for key in count():
+      if key in kwargs_keys:
+        kwargs_keys.remove(key)
+        args.append(expression[key])
       else:
-        return u"".join([self.CONSTANT_INDICATOR, u"f"])
-
-    # Integral numeric literals:
-    elif isinstance(expression, IntegerCompatible):
-      return unicode(expression)
-
-    # Rational numeric literals:
-    elif isinstance(expression, FractionCompatible):
-      return u"".join([
-        self.dumps(expression.numerator),
-        u"/",
-        self.dumps(expression.denominator)])
-
-    # Unicode literals:
-    elif isinstance(expression, UnicodeCompatible):
-      return u"".join([u'"', expression.encode('unicode_escape')
-                                       .replace(u"\"",u"\\\""), u'"'])
-
-    # Symbols literals:
-    elif isinstance(expression, SymbolCompatible):
-      # An empty symbol is the #empty value
-      if not len(expression):
-        return u"".join([self.CONSTANT_INDICATOR, u"empty"])
-
-      # A symbol that meets the definition of an identifier is embedded
-      # directly:
-      if expression[0] in self.SYMBOL_INITIAL:
-        if all(c in self.SYMBOL_SUBSEQUENT for c in expression[1:]):
-          return unicode(expression)
-
-      # All other symbols are Base64-encoded:
-      return u"".join([
+        break
+    write(self.TUPLE_OPEN)
+    self._serialize_each(args, write)
+    if args and kwargs_keys:
+      write(u" ")
+    for index, key in enumerate(sorted(kwargs_keys)):
+      if index:
+        write(u" ")
+      write((key,))
+      write(self.ASSOCIATION_OPERATOR)
+      write((expression[key],))
+    write(self.TUPLE_CLOSE)
+
+  # Handlers of the kinds of node, in the order in which they are tried by
+  # `_serialize_node()`:
+
+  def _serialize_omega(self, expression, write):
+    "None/nil/omega value."
+    write(u"".join([self.CONSTANT_INDICATOR, u"nil"]))
+
+  def _serialize_boolean(self, expression, write):
+    "Boolean literals."
+    if expression:
+      write(u"".join([self.CONSTANT_INDICATOR, u"t"]))
+    else:
+      write(u"".join([self.CONSTANT_INDICATOR, u"f"]))
+
+  def _serialize_integer(self, expression, write):
+    "Integral numeric literals."
+    write(unicode(expression))
+
+  def _serialize_fraction(self, expression, write):
+    "Rational numeric literals."
+    write((expression.numerator,))
+    write(u"/")
+    write((expression.denominator,))
+
+  def _serialize_unicode(self, expression, write):
+    "Unicode literals."
+    write(u"".join([u'"', expression.encode('unicode_escape')
+                                    .replace(u"\"",u"\\\""), u'"']))
+
+  def _serialize_symbol(self, expression, write):
+    "Symbols literals."
+    # An empty symbol is the #empty value
+    if not len(expression):
+      write(u"".join([self.CONSTANT_INDICATOR, u"empty"]))
+
+    # A symbol that meets the definition of an identifier is embedded
+    # directly:
+    elif (expression[0] in self.SYMBOL_INITIAL and
+          all(c in self.SYMBOL_SUBSEQUENT for c in expression[1:])):
+      write(unicode(expression))
+
+    # All other symbols are Base64-encoded:
+    else:
+      write(u"".join([
         self.TUPLE_OPEN,
         u" ".join([
           u"b64decode",
-          u''.join(['\'', b64encode(expression).strip()]),
+          u''.join(['\'', b64encode(str(expression)).strip()]),
         ]),
-        self.TUPLE_CLOSE])
-
-    # Sets:
-    elif isinstance(expression, SetCompatible):
-      return u"".join([
-        self.TUPLE_OPEN,
-        u" ".join([u"set", self.dumps(*sorted(expression))]),
-        self.TUPLE_CLOSE])
-
-    # FIXME: implement meta-values
-
-    # Tuples(/maps/dictionaries):
-    elif isinstance(expression, TupleCompatible):
-      special_pattern = lambda expr:(
-        len(expr) == 2 and set(expr.keys()) == set(range(2)))
-      # Output special forms:
-      if special_pattern(expression):
-        if expression[0] == self.QUOTE_PROCEDURE:
-          #if (isinstance(expression[1], TupleCompatible) and
-          #    all(special_pattern(expression[1][key]) and
-          #        expression[1][key][0] == self.UNQUOTE_PROCEDURE
-          #        for key in expression[1].keys())):
-          #  return u"".join([
-          #    self.EVAL_DATA_OPEN,
-          #    self.dumps(expression[1]),
-          #    self.EVAL_DATA_CLOSE])
-          return u"".join([self.QUOTE_OPERATOR, self.dumps(expression[1])])
-        if expression[0] == self.UNQUOTE_PROCEDURE:
-          return u"".join([self.UNQUOTE_OPERATOR, self.dumps(expression[1])])
-        if expression[0] == self.UNQUOTE_SPLICE_PROCEDURE:
-          return u"".join([self.UNQUOTE_SPLICE_OPERATOR, self.dumps(expression[1])])
-
-      args = []
-      kwargs_keys = expression.keys()
-      for key in count():
-        if key in kwargs_keys:
-          kwargs_keys.remove(key)
-          args.append(expression[key])
-        else:
-          break
-      return u"".join([
-        self.TUPLE_OPEN,
-        u"".join([
-          self.dumps(*args),
-          (len(args) and len(kwargs_keys)) and u" " or u"",
-          u" ".join(
-            u"".join([
-              self.dumps(key),
-              self.ASSOCIATION_OPERATOR,
-              self.dumps(expression[key]),
-            ]) for key in sorted(kwargs_keys))]),
-        self.TUPLE_CLOSE])
-
-    # Relations:
-    elif isinstance(expression, RelationCompatible):
-      raise NotImplementedError
-
-    # Sequences(/lists):
-    elif isinstance(expression, SequenceCompatible):
-      return u"".join([
-        self.SEQUENCE_OPEN,
-        self.dumps(*expression),
-        self.SEQUENCE_CLOSE])
-
-    # Matrices:
-    elif isinstance(expression, MatrixCompatible):
-      raise NotImplementedError
-
-    # Procedures(/lambdas):
-    elif isinstance(expression, Procedure):
-      raise NotImplementedError
-
-    # That's it! We should have matched one of the previous cases and returned
-    # already if we were a valid Python-represented haiku expression. So we
-    # can assume the caller passed us something in error and report the
-    # problem:
-    raise ValueError(
-      u"unrecognized input (not a valid expression): '%s'" % repr(expression))
-
-  def __init__(self, *args, **kwargs):
-    "Sets up a parser using the LEPL package."
-    super(SimpleExpressionPickler, self).__init__(*args, **kwargs)
+        self.TUPLE_CLOSE]))
+
+  def _serialize_set(self, expression, write):
+    "Sets."
+    write(u"".join([self.TUPLE_OPEN, u"set "]))
+    self._serialize_each(sorted(expression), write)
+    write(self.TUPLE_CLOSE)
+
+  # FIXME: implement meta-values
+
+  def _serialize_sequence(self, expression, write):
+    "Sequences(/lists)."
+    write(self.SEQUENCE_OPEN)
+    self._serialize_each(expression, write)
+    write(self.SEQUENCE_CLOSE)
+
+  def _serialize_unsupported(self, expression, write):
+    "Relations, matrices and procedures(/lambdas)."
+    raise NotImplementedError
+
+  # Tuples(/maps/dictionaries) are translated by `_serialize_tuple()`. Other
+  # types of node can be supported by registering the names of their handler
+  # methods here, which are looked up on the pickler so that subclasses may
+  # override them:
+  serializers = TypeDispatch(
+    (OmegaCompatible,    '_serialize_omega'),
+    (BooleanCompatible,  '_serialize_boolean'),
+    (IntegerCompatible,  '_serialize_integer'),
+    (FractionCompatible, '_serialize_fraction'),
+    (UnicodeCompatible,  '_serialize_unicode'),
+    (SymbolCompatible,   '_serialize_symbol'),
+    (SetCompatible,      '_serialize_set'),
+    (TupleCompatible,    '_serialize_tuple'),
+    (RelationCompatible, '_serialize_unsupported'),
+    (SequenceCompatible, '_serialize_sequence'),
+    (MatrixCompatible,   '_serialize_unsupported'),
+    (Procedure,          '_serialize_unsupported'))
+
+  def _serialize_node(self, expression, write):
+    """Translates one node of a Python-represented haiku expression into
+    “Simple Expression” notation, passing the generated text and the sub-
+    expressions still to be translated to `write()` (see
+    `_serialize_parts()`). The node is handed to the handler for its type in
+    `serializers`."""
+    handler = self.serializers.lookup(expression)
+    # If there is none, we can assume the caller passed us something in error
+    # and report the problem:
+    if handler is None:
+      raise ValueError(
+        u"unrecognized input (not a valid expression): '%s'" % repr(expression))
+    getattr(self, handler)(expression, write)
+
+  @_per_class
+  def _matcher(cls):
+    """The grammar of the LEPL parse engine, built the first time it is used
+    and shared by every instance of the class."""
 
     # “Whitespace” is any formatting characters (spaces, newlines, comments,
     # etc.) which are used to separate tokens, but are not represented except
@@ -295,24 +415,24 @@ class SimpleExpressionPickler(BasePickler):
     # FIXME: add support for hex strings a la D
     _Identifier = lambda lexemes:Symbol(u"".join(lexemes).encode('utf-8'))
     Identifier = (
-      lepl.Any(self.SYMBOL_INITIAL) &
-      lepl.Any(self.SYMBOL_SUBSEQUENT)[0:]) > _Identifier
+      lepl.Any(cls.SYMBOL_INITIAL) &
+      lepl.Any(cls.SYMBOL_SUBSEQUENT)[0:]) > _Identifier
 
     # FIXME: add support for binary, octal, hex, and perhaps other integer
     #   representations
     _UnsignedInteger = lambda lexemes:Integer(u"".join(
       filter(
-        lambda lexeme:lexeme not in self.INTEGER_SEPARATOR,
+        lambda lexeme:lexeme not in cls.INTEGER_SEPARATOR,
         lexemes)))
     UnsignedInteger = (
-        lepl.Any(self.INTEGER_DIGIT) |
-        lepl.Any(self.INTEGER_SEPARATOR)
+        lepl.Any(cls.INTEGER_DIGIT) |
+        lepl.Any(cls.INTEGER_SEPARATOR)
       )[1:] > _UnsignedInteger
 
     _IntegerSign = (lambda lexeme:
-      lexeme in self.INTEGER_SIGN_NEGATIVE and Integer(-1)
+      lexeme in cls.INTEGER_SIGN_NEGATIVE and Integer(-1)
                                             or Integer(1))
-    IntegerSign = lepl.Any(self.INTEGER_SIGN) >> _IntegerSign
+    IntegerSign = lepl.Any(cls.INTEGER_SIGN) >> _IntegerSign
 
     _SignedInteger = lambda parts:reduce(mul, parts)
     SignedInteger = (
@@ -357,35 +477,35 @@ class SimpleExpressionPickler(BasePickler):
           return Boolean(True)
         if symbol in ('empty',):
           return Symbol('')
-        raise self.SyntaxError(
+        raise cls.SyntaxError(
           u"unrecognized constant name: %s" % repr(symbol))
       Constant = (~lepl.Literal(u"#") & Identifier) >> _Constant
 
       # Special forms for quoting:
       _QuoteSyntax = lambda expr:Tuple([
-        (0, self.QUOTE_PROCEDURE),
+        (0, cls.QUOTE_PROCEDURE),
         (1, expr)])
       QuoteSyntax = (
-        ~lepl.Literal(self.QUOTE_OPERATOR) & Expression) >> _QuoteSyntax
+        ~lepl.Literal(cls.QUOTE_OPERATOR) & Expression) >> _QuoteSyntax
 
       _UnquoteSyntax = lambda expr:Tuple([
-        (0, self.UNQUOTE_PROCEDURE),
+        (0, cls.UNQUOTE_PROCEDURE),
         (1, expr)])
       UnquoteSyntax = (
-        ~lepl.Literal(self.UNQUOTE_OPERATOR) & Expression) >> _UnquoteSyntax
+        ~lepl.Literal(cls.UNQUOTE_OPERATOR) & Expression) >> _UnquoteSyntax
 
       _UnquoteSpliceSyntax = lambda expr:Tuple([
-        (0, self.UNQUOTE_SPLICE_PROCEDURE),
+        (0, cls.UNQUOTE_SPLICE_PROCEDURE),
         (1, expr)])
       UnquoteSpliceSyntax = (
-        ~lepl.Literal(self.UNQUOTE_SPLICE_OPERATOR) & Expression) >> _UnquoteSyntax
+        ~lepl.Literal(cls.UNQUOTE_SPLICE_OPERATOR) & Expression) >> _UnquoteSpliceSyntax
 
       # A keyword expression is a component of the tuple definition: a mapping
       # of one data to another (the key/value pair).
       _KeywordExpression = lambda parts:len(parts)-1 and tuple(parts) or parts[0]
       KeywordExpression = ((
         Expression &
-        ~lepl.Literal(self.ASSOCIATION_OPERATOR) &
+        ~lepl.Literal(cls.ASSOCIATION_OPERATOR) &
         Expression) | Expression) > _KeywordExpression
 
       # The creation of tuple values is a little tricky as keys may be
@@ -400,36 +520,36 @@ class SimpleExpressionPickler(BasePickler):
         args   = filter(lambda arg:arg not in kwargs, parts)
         tuple_ = Tuple(kwargs)
         if len(kwargs) != len(tuple_):
-          raise self.SyntaxError(
+          raise cls.SyntaxError(
             u"duplicate keys in keyword arguments")
         tuple_ = Tuple([x for x in izip(icount(), args)] + kwargs)
         if len(parts) != len(tuple_):
           dups = filter(lambda x:x in tuple_, xrange(len(args)))
-          raise self.SyntaxError(
+          raise cls.SyntaxError(
             u"redundant parameter(s) specified positionally and as keyword arguments")
         return tuple_
       TupleSyntax = (
-        ~lepl.Literal(self.TUPLE_OPEN) &
+        ~lepl.Literal(cls.TUPLE_OPEN) &
         KeywordExpression[0:] &
-        ~lepl.Literal(self.TUPLE_CLOSE)) > _TupleSyntax
+        ~lepl.Literal(cls.TUPLE_CLOSE)) > _TupleSyntax
 
       # Eval-data special form:
       def _EvalDataSyntax(parts):
         tuple_ = _TupleSyntax(parts)
         tuple_ = Tuple([(key, _UnquoteSyntax(value)) for key, value in tuple_.items()])
-        tuple_ = Tuple([(0, self.QUOTE_PROCEDURE), (1, tuple_)])
+        tuple_ = Tuple([(0, cls.QUOTE_PROCEDURE), (1, tuple_)])
         return tuple_
       EvalDataSyntax = (
-        ~lepl.Literal(self.EVAL_DATA_OPEN) &
+        ~lepl.Literal(cls.EVAL_DATA_OPEN) &
         KeywordExpression[0:] &
-        ~lepl.Literal(self.EVAL_DATA_CLOSE)) > _EvalDataSyntax
+        ~lepl.Literal(cls.EVAL_DATA_CLOSE)) > _EvalDataSyntax
 
       # Sequence special form:
       _SequenceSyntax = lambda args:Sequence(args)
       SequenceSyntax = (
-        ~lepl.Literal(self.SEQUENCE_OPEN) &
+        ~lepl.Literal(cls.SEQUENCE_OPEN) &
         Expression[0:] &
-        ~lepl.Literal(self.SEQUENCE_CLOSE)) > _SequenceSyntax
+        ~lepl.Literal(cls.SEQUENCE_CLOSE)) > _SequenceSyntax
 
       # Now that we've defined each component, we can go back and complete
       # Expression's definition:
@@ -441,8 +561,178 @@ class SimpleExpressionPickler(BasePickler):
       # separated by whitespace.
       Syntax = Expression[0:] & ~lepl.Eos()
 
-    # Save the `Syntax` matcher for use by other methods:
-    self._matcher = Syntax
+    return Syntax
+
+  @_per_class
+  def _scanner(cls):
+    """The tokenizer of the native parse engine: a single regular expression
+    with one named group per kind of token, built out of the same character
+    classes as the LEPL grammar. Alternatives are tried in the same order as
+    `Expression`, so that (for example) u"+3" is an integer but u"+a" is a
+    symbol."""
+    _Class = lambda chars:u"[%s]" % u"".join(map(re.escape, sorted(chars)))
+    _Token = lambda name, pattern:u"(?P<%s>%s)" % (name, pattern)
+    whitespace = ur"(?:[\t\n\x0b\x0c\r ]|%s[^\n]*(?:\n|\Z))" % (
+      re.escape(cls.COMMENT_INDICATOR))
+    identifier = u"%s%s*" % (
+      _Class(cls.SYMBOL_INITIAL), _Class(cls.SYMBOL_SUBSEQUENT))
+    unsigned   = u"%s+" % _Class(cls.INTEGER_DIGIT.union(cls.INTEGER_SEPARATOR))
+    signed     = u"%s?%s" % (_Class(cls.INTEGER_SIGN), unsigned)
+    return re.compile(u"|".join([
+      _Token('whitespace',      u"%s+" % whitespace),
+      _Token('quote',           re.escape(cls.QUOTE_OPERATOR)),
+      _Token('unquote',         re.escape(cls.UNQUOTE_OPERATOR)),
+      _Token('unquote_splice',  re.escape(cls.UNQUOTE_SPLICE_OPERATOR)),
+      _Token('association',     re.escape(cls.ASSOCIATION_OPERATOR)),
+      _Token('tuple',           re.escape(cls.TUPLE_OPEN)),
+      _Token('tuple_close',     re.escape(cls.TUPLE_CLOSE)),
+      _Token('eval_data',       re.escape(cls.EVAL_DATA_OPEN)),
+      _Token('eval_data_close', re.escape(cls.EVAL_DATA_CLOSE)),
+      _Token('sequence',        re.escape(cls.SEQUENCE_OPEN)),
+      _Token('sequence_close',  re.escape(cls.SEQUENCE_CLOSE)),
+      _Token('string',          ur'"(?P<characters>[^"\\]*(?:\\.[^"\\]*)*)"'),
+      _Token('rational',        u"(?P<numerator>%s)/(?P<denominator>%s)" % (
+                                  signed, unsigned)),
+      _Token('integer',         signed),
+      _Token('constant',        u"%s%s*(?P<name>%s)" % (
+                                  re.escape(cls.CONSTANT_INDICATOR),
+                                  whitespace, identifier)),
+      _Token('identifier',      identifier),
+    ]), re.DOTALL | re.UNICODE)
+
+class _NativeParser(object):
+  """The state of the native engine part way through a simple-expression
+  document. Tokens are recognized one at a time by a single compiled regular
+  expression, and containers are assembled on an explicit stack of
+  `_Frame`s, so there is neither backtracking nor Python recursion per level
+  of nesting. Text may be supplied a piece at a time to `feed()`, which
+  returns the top-level expressions completed so far."""
+  # Tokens which might yet continue into text not seen so far, and so are not
+  # consumed within the last two characters of a partial buffer: u"1/" might
+  # become u"1/2", and u"abc" might become u"abcd".
+  EXTENSIBLE = frozenset(['whitespace', 'rational', 'integer', 'constant', 'identifier'])
+
+  def __init__(self, pickler):
+    self.pickler = pickler
+    # Unconsumed input, and the offset of its first character in the input
+    # as a whole (for error messages):
+    self.buffer, self.offset = u"", 0
+    # `stack` holds the open containers enclosing `frame`, the innermost.
+    # `quotes` holds the quoting operators which have been read but are still
+    # waiting on the expression they apply to.
+    self.frame, self.stack, self.quotes = _Frame(None, [], 0), [], []
+
+  def feed(self, text, final=False):
+    """Parses as much of the input so far as possible, and returns a list of
+    the top-level expressions which were completed. `final` indicates the
+    end of input, at which point every expression must be complete."""
+    pickler    = self.pickler
+    match      = pickler._scanner.match
+    extensible = self.EXTENSIBLE
+    partial    = (u'"', pickler.CONSTANT_INDICATOR)
+    expression = self.buffer + text
+    length     = len(expression)
+    position   = 0
+    base       = self.offset
+    frame, stack, quotes = self.frame, self.stack, self.quotes
+    results = []
+
+    while position < length:
+      token = match(expression, position)
+      if token is None:
+        # An unterminated string or constant might be completed by input
+        # which has not been read yet:
+        if not final and expression[position] in partial:
+          break
+        raise pickler.SyntaxError(
+          u"unexpected character %s at offset %d" % (
+            repr(expression[position]), base + position))
+      kind = token.lastgroup
+      if not final and kind in extensible and token.end() + 1 >= length:
+        break
+      offset, position = base + position, token.end()
+
+      if kind == 'whitespace':
+        continue
+
+      # Atomic values:
+      elif kind == 'identifier':
+        value = Symbol(token.group().encode('utf-8'))
+      elif kind == 'integer':
+        value = Integer(token.group().replace(u"_", u""))
+      elif kind == 'rational':
+        numerator, denominator = token.group('numerator', 'denominator')
+        value = Fraction(Integer(numerator.replace(u"_", u"")),
+                         Integer(denominator.replace(u"_", u"")))
+      elif kind == 'string':
+        value = token.group('characters')
+        value = value and Unicode(value).decode('unicode_escape') or Unicode(u"")
+      elif kind == 'constant':
+        value = pickler._native_constant(token.group('name'))
+
+      # Prefix operators apply to whatever expression comes next, which might
+      # not be complete for some time:
+      elif kind == 'quote':
+        quotes.append(pickler.QUOTE_PROCEDURE);          continue
+      elif kind == 'unquote':
+        quotes.append(pickler.UNQUOTE_PROCEDURE);        continue
+      elif kind == 'unquote_splice':
+        quotes.append(pickler.UNQUOTE_SPLICE_PROCEDURE); continue
+
+      # The association operator turns the most recent positional element of
+      # the enclosing tuple into the key for the next expression:
+      elif kind == 'association':
+        if frame.kind not in ('tuple', 'eval_data') or not frame.associable or quotes:
+          raise pickler.SyntaxError(
+            u"unexpected %s at offset %d" % (
+              repr(pickler.ASSOCIATION_OPERATOR), offset))
+        frame.key        = frame.args.pop()
+        frame.associable = False
+        continue
+
+      # Opening a container saves the pending quoting operators with the new
+      # frame, to be applied once the container has been closed:
+      elif kind in _NATIVE_CLOSERS:
+        stack.append(frame)
+        frame  = _Frame(kind, quotes, offset)
+        quotes = []
+        continue
+
+      else: # Closing a container:
+        if frame.kind != _NATIVE_OPENERS[kind] or frame.key is not _NO_KEY or quotes:
+          raise pickler.SyntaxError(
+            u"unexpected %s at offset %d" % (repr(token.group()), offset))
+        if frame.kind == 'sequence':
+          value = Sequence(frame.args)
+        else:
+          value = pickler._build_tuple(frame.args, frame.kwargs)
+          if frame.kind == 'eval_data':
+            value = pickler._build_eval_data(value)
+        quotes = frame.quotes
+        frame  = stack.pop()
+
+      # A complete expression has been read. Apply any quoting operators,
+      # innermost first, then hand it to the enclosing frame (or return it,
+      # if it is at the top level):
+      while quotes:
+        value = Tuple([(0, quotes.pop()), (1, value)])
+      if not stack:
+        results.append(value)
+      elif frame.key is not _NO_KEY:
+        frame.kwargs.append((frame.key, value))
+        frame.key        = _NO_KEY
+        frame.associable = False
+      else:
+        frame.args.append(value)
+        frame.associable = True
+
+    self.buffer, self.offset = expression[position:], base + position
+    self.frame, self.stack, self.quotes = frame, stack, quotes
+    if final and (stack or quotes):
+      raise pickler.SyntaxError(
+        u"unexpected end of input (unclosed expression at offset %d)" % (
+          frame.offset if stack else self.offset))
+    return results
 
 # ===----------------------------------------------------------------------===
 # End of File
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.pickle.simple__bench ------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Throughput comparison of the `SimpleExpressionPickler` parse engines, using
+the scenarios of `haiku.pickle.simple__test` as input, and of the serializer
+and native engine on chains of nested tuples far deeper than the recursion
+limit. Run with:
+
+  python -m haiku.pickle.simple__bench
+"""
+
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, simple-expression unit-test scenarios
+from haiku.pickle.simple__test import SCENARIOS
+
+# Haiku language, benchmarking harness
+from haiku.utils.benchmark import measure, report
+
+def main():
+  engines = [(engine, SimpleExpressionPickler(engine=engine))
+             for engine in SimpleExpressionPickler.ENGINES]
+
+  # Each scenario that is expected to load, parsed one at a time:
+  inputs = [scenario['lisp'] for scenario in SCENARIOS
+            if 'load' not in scenario.get('skip', [])]
+  size = sum(map(len, inputs))
+  report(u"%d simple__test scenarios, one loads() call each" % len(inputs), [
+    (engine,
+     measure(lambda:[pickler.loads(lisp) for lisp in inputs]),
+     size, u"chars")
+    for engine, pickler in engines])
+
+  # The same scenarios concatenated into documents of increasing size, which
+  # is closer to the multi-megabyte inputs this engine exists for. (The LEPL
+  # grammar does not accept whitespace ahead of the first expression of a
+  # document, so the blank and comment-only scenarios are left out.)
+  inputs = filter(lambda lisp:lisp[:1] not in u" \n;", inputs)
+  for copies in (1, 10, 50):
+    document = u"\n".join(inputs * copies)
+    report(u"%d scenarios in a single %d character document" % (
+        len(inputs) * copies, len(document)), [
+      (engine,
+       measure(lambda:pickler.loads(document), repeat=1),
+       len(document), u"chars")
+      for engine, pickler in engines])
+
+  # A chain of nested tuples, [f [f [f ... x]]], serialized and read back:
+  pickler = SimpleExpressionPickler(engine='native')
+  dump_rows, load_rows = [], []
+  for depth in (10, 100, 1000, 10000, 100000):
+    expression = Symbol('x')
+    for level in xrange(depth):
+      expression = Tuple([(0, Symbol('f')), (1, expression)])
+    lisp = pickler.dumps(expression)
+    dump_rows.append((u"depth %d" % depth,
+                      measure(lambda:pickler.dumps(expression), repeat=1),
+                      2 * depth + 1, u"nodes"))
+    load_rows.append((u"depth %d" % depth,
+                      measure(lambda:pickler.loads(lisp), repeat=1),
+                      2 * depth + 1, u"nodes"))
+  report(u"dumps() of nested tuples", dump_rows)
+  report(u"loads() of nested tuples (native engine)", load_rows)
+
+if __name__ == '__main__':
+  main()
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
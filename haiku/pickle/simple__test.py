@@ -284,6 +284,26 @@ SCENARIOS = [
   dict(lisp   = u'[cat "Hello, " "world!"]',
        python = [{0:'cat', 1:u"Hello, ", 2:u"world!"}],
        eval_  = [u"Hello, world!"]),
+
+  # Conditionals, which do not evaluate the branches not taken:
+  dict(lisp   = u'[if [= 1 1] "yes" "no"]',
+       python = [{0:'if', 1:{0:'=',1:1L,2:1L}, 2:u"yes", 3:u"no"}],
+       eval_  = [u"yes"]),
+  dict(lisp=u'[if #t 1 [/ 1 0]]',   python=[{0:'if',1:True,2:1L,3:{0:'/',1:1L,2:0L}}],   eval_=[1L]),
+  dict(lisp=u'[if #f [/ 1 0] 2]',   python=[{0:'if',1:False,2:{0:'/',1:1L,2:0L},3:2L}],  eval_=[2L]),
+  dict(lisp=u'[if #f 1]',           python=[{0:'if',1:False,2:1L}],                      eval_=[None]),
+  dict(lisp=u'[and]',               python=[{0:'and'}],                                  eval_=[True]),
+  dict(lisp=u'[and 1 2]',           python=[{0:'and',1:1L,2:2L}],                        eval_=[2L]),
+  dict(lisp=u'[and 1 #f [/ 1 0]]',  python=[{0:'and',1:1L,2:False,3:{0:'/',1:1L,2:0L}}], eval_=[False]),
+  dict(lisp=u'[or]',                python=[{0:'or'}],                                   eval_=[False]),
+  dict(lisp=u'[or #f 0]',           python=[{0:'or',1:False,2:0L}],                      eval_=[0L]),
+  dict(lisp=u'[or #f 2 [/ 1 0]]',   python=[{0:'or',1:False,2:2L,3:{0:'/',1:1L,2:0L}}],  eval_=[2L]),
+  dict(lisp=u'[cond]',              python=[{0:'cond'}],                                 eval_=[None]),
+  dict(lisp=u'[cond #f 1 #t 2 [/ 1 0]]',
+       python = [{0:'cond',1:False,2:1L,3:True,4:2L,5:{0:'/',1:1L,2:0L}}],
+       eval_  = [2L]),
+  dict(lisp=u'[cond #f 1 #f 2 3]',  python=[{0:'cond',1:False,2:1L,3:False,4:2L,5:3L}], eval_=[3L]),
+  dict(lisp=u'[cond #f 1]',         python=[{0:'cond',1:False,2:1L}],                    eval_=[None]),
 ]
 
 from haiku.builtin import builtinEnvironment
@@ -303,6 +323,115 @@ class TestSimpleExpressionPickler(unittest2.TestCase):
   class test_eval_load(EvaluateScenarioTest):
     scenarios = SCENARIOS
 
+class TestSimpleExpressionPicklerStreamingDump(unittest2.TestCase):
+  """Test incremental serialization of Lisp code with
+  `SimpleExpressionPickler.dump()`, flushing after every character so that
+  output is written as the expression tree is walked."""
+  __metaclass__ = ScenarioMeta
+  _pickler = SimpleExpressionPickler(buffer_size=1)
+  class test_dump(PicklerDumpScenarioTest):
+    scenarios = SCENARIOS
+
+  def test_writes_as_generated(self):
+    writes = []
+    class ostream(object):
+      write = staticmethod(writes.append)
+    self._pickler.dump(ostream, Tuple([(0, 'a'), (1, u"b")]), 'c',
+                       encoding='utf-16')
+    self.assertTrue(len(writes) > 1)
+    self.assertEqual(''.join(writes).decode('utf-16'), u'[a "b"] c')
+
+class TestSimpleExpressionPicklerNativeEngine(unittest2.TestCase):
+  """Test deserialization of Lisp code to Python objects using the
+  `SimpleExpressionPickler` class with its native (non-LEPL) parse engine."""
+  __metaclass__ = ScenarioMeta
+  _pickler = SimpleExpressionPickler(engine='native')
+  _environment = Environment(parent=builtinEnvironment)
+  _interpreter = BaseInterpreter(_pickler, environment=_environment)
+  class test_load(PicklerLoadScenarioTest):
+    scenarios = SCENARIOS
+  class test_eval_load(EvaluateScenarioTest):
+    scenarios = SCENARIOS
+
+class TestSimpleExpressionPicklerIterload(unittest2.TestCase):
+  """Test incremental deserialization of Lisp code with
+  `SimpleExpressionPickler.iterload()`, reading one byte at a time so that
+  every token is split across reads."""
+  __metaclass__ = ScenarioMeta
+  _pickler = SimpleExpressionPickler(engine='native', buffer_size=1)
+  class test_load(PicklerLoadScenarioTest):
+    scenarios = SCENARIOS
+
+  def test_yields_before_end_of_input(self):
+    expressions = self._pickler.iterload(StringIO('[a 1] \'b [c'))
+    self.assertEqual(expressions.next(), Tuple([(0, 'a'), (1, 1)]))
+    self.assertEqual(expressions.next(), Tuple([(0, 'quote'), (1, 'b')]))
+    self.assertRaises(SimpleExpressionPickler.SyntaxError, expressions.next)
+
+class TestSimpleExpressionPicklerGrammar(unittest2.TestCase):
+  """Test that the grammars of `SimpleExpressionPickler` are built once per
+  class, and rebuilt for subclasses which override the token constants."""
+  def test_shared_by_instances(self):
+    a, b = SimpleExpressionPickler(), SimpleExpressionPickler()
+    self.assertTrue(a._matcher is b._matcher)
+    self.assertTrue(a._scanner is b._scanner)
+
+  def test_subclass_overrides(self):
+    class AtPickler(SimpleExpressionPickler):
+      ASSOCIATION_OPERATOR = u"@"
+    for engine in SimpleExpressionPickler.ENGINES:
+      pickler = AtPickler(engine=engine)
+      self.assertEqual(pickler.loads(u"[a@b]"), [Tuple([('a', 'b')])])
+      self.assertEqual(SimpleExpressionPickler(engine=engine).loads(u"[a:b]"),
+                       [Tuple([('a', 'b')])])
+
+class TestSimpleExpressionPicklerSubclass(unittest2.TestCase):
+  """Test that `SimpleExpressionPickler` serializes nodes with the handlers
+  overridden by a subclass."""
+  def test_overrides(self):
+    class HexPickler(SimpleExpressionPickler):
+      def _serialize_integer(self, expression, write):
+        write(u"#x%x" % expression)
+    self.assertEqual(HexPickler().dumps([255, [16]]), u"(#xff (#x10))")
+    self.assertEqual(SimpleExpressionPickler().dumps([255]), u"(255)")
+
+class TestSimpleExpressionPicklerLoadsParallel(unittest2.TestCase):
+  """Test that `SimpleExpressionPickler.loads_parallel()` splits a document
+  between top-level expressions, and gives the same results as `loads()`."""
+  def test_same_as_loads(self):
+    # (The LEPL grammar does not accept whitespace ahead of the first
+    # expression of a document, so the blank and comment-only scenarios are
+    # left out.)
+    inputs = [scenario['lisp'] for scenario in SCENARIOS
+              if 'load' not in scenario.get('skip', []) and
+                 scenario['lisp'][:1] not in u" \n;"]
+    document = u"\n".join(inputs * 3)
+    for engine in SimpleExpressionPickler.ENGINES:
+      pickler = SimpleExpressionPickler(engine=engine)
+      pickler.PARALLEL_MIN_SIZE = 0
+      self.assertTrue(len(pickler._split(document, 8)) > 1)
+      self.assertEqual(pickler.loads_parallel(document, processes=2),
+                       pickler.loads(document))
+
+  def test_errors(self):
+    pickler = SimpleExpressionPickler(engine='lepl')
+    pickler.PARALLEL_MIN_SIZE = 0
+    self.assertRaises(SimpleExpressionPickler.SyntaxError,
+      pickler.loads_parallel, u"[a b] [c d] [e]]", processes=2)
+
+class TestSimpleExpressionPicklerDeepNesting(unittest2.TestCase):
+  """Test that expressions nested far deeper than the recursion limit are
+  serialized, and read back by the native parse engine."""
+  DEPTH = 5000
+  def test_deep_nesting(self):
+    expression = Symbol('x')
+    for index in xrange(self.DEPTH):
+      expression = Tuple([(0, Symbol('f')), (1, (expression,))])
+    pickler = SimpleExpressionPickler(engine='native')
+    lisp = pickler.dumps(expression)
+    self.assertEqual(lisp, u'[f (' * self.DEPTH + u'x' + u')]' * self.DEPTH)
+    self.assertEqual(pickler.dumps(*pickler.loads(lisp)), lisp)
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
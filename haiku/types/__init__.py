@@ -35,6 +35,7 @@
 
 from .alpha     import *
 from .boolean   import *
+from .dispatch  import *
 from .fraction  import *
 from .integer   import *
 from .matrix    import *
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.types.dispatch ------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Dispatch on the type of a value. The kinds of haiku values are abstract
+base classes, such as `IntegerCompatible`, to which other types may be
+registered, so classifying a value means asking `isinstance()` of each kind
+in turn, and `isinstance()` is slow for abstract base classes. A
+`TypeDispatch` instead maps the concrete class of a value to the handler
+registered for its kind, asking `isinstance()` only the first time a value
+of that class is seen."""
+
+__all__ = [
+  'TypeDispatch',
+]
+
+# ===----------------------------------------------------------------------===
+
+# Python standard library, abstract base classes
+from abc import ABCMeta
+
+class TypeDispatch(object):
+  """Maps the classes of values to handlers. Handlers are registered for
+  a type (or a tuple of types, as taken by `isinstance()`), and the handler
+  of a value is that of the first type registered of which it is an
+  instance. Lookups are cached by class; the cache is cleared whenever a
+  handler is registered, and whenever a class is registered with any
+  abstract base class, which may change the outcome of `isinstance()`."""
+  def __init__(self, *rules):
+    self._rules = []
+    self._cache = {}
+    self._abc_counter = None
+    for types, handler in rules:
+      self.register(types, handler)
+
+  def register(self, types, handler, index=None):
+    """Registers `handler` for values of `types`, after those registered
+    already, or at position `index` in the order in which types are
+    tried."""
+    if index is None:
+      index = len(self._rules)
+    self._rules.insert(index, (types, handler))
+    self._cache.clear()
+
+  def lookup(self, value, default=None):
+    "Returns the handler for `value`, or `default` if there is none."
+    if self._abc_counter != ABCMeta._abc_invalidation_counter:
+      self._cache.clear()
+      self._abc_counter = ABCMeta._abc_invalidation_counter
+    try:
+      handler = self._cache[value.__class__]
+    except KeyError:
+      for types, handler in self._rules:
+        if isinstance(value, types):
+          break
+      else:
+        handler = None
+      self._cache[value.__class__] = handler
+    if handler is None:
+      return default
+    return handler
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
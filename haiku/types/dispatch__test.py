@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.types.dispatch__test ------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, abstract base classes
+from abc import ABCMeta
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, type hierarchy
+from haiku.types import *
+
+class TestTypeDispatch(unittest2.TestCase):
+  """Test that `TypeDispatch` finds the same handlers as `isinstance()`
+  would, and that its cache follows registrations."""
+  def setUp(self):
+    self.dispatch = TypeDispatch(
+      (BooleanCompatible, 'boolean'),
+      (IntegerCompatible, 'integer'),
+      ((SymbolCompatible, UnicodeCompatible), 'string'))
+
+  def test_lookup(self):
+    for value, handler in [
+        (True,  'boolean'),
+        (1,     'integer'),
+        (1L,    'integer'),
+        ('a',   'string'),
+        (u"a",  'string'),
+        (None,  None),
+        (1.5,   None)]:
+      # Twice over, the second time from the cache:
+      for index in xrange(2):
+        self.assertEqual(self.dispatch.lookup(value), handler)
+    self.assertEqual(self.dispatch.lookup(None, 'default'), 'default')
+
+  def test_register(self):
+    self.assertEqual(self.dispatch.lookup(1.5), None)
+    self.dispatch.register(float, 'float')
+    self.assertEqual(self.dispatch.lookup(1.5), 'float')
+    self.dispatch.register(int, 'int', index=0)
+    self.assertEqual(self.dispatch.lookup(1), 'int')
+    self.assertEqual(self.dispatch.lookup(1L), 'integer')
+
+  def test_abc_register(self):
+    class Kind(object):
+      __metaclass__ = ABCMeta
+    class Value(object):
+      pass
+    self.dispatch.register(Kind, 'kind')
+    self.assertEqual(self.dispatch.lookup(Value()), None)
+    Kind.register(Value)
+    self.assertEqual(self.dispatch.lookup(Value()), 'kind')
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
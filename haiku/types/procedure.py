@@ -36,6 +36,9 @@
 "The procedure (lambda) type."
 
 __all__ = [
+  'MemoCache',
+  'MemoizedProcedure',
+  'NativeProcedure',
   'Procedure',
   'ProcedureCompatible',
 ]
@@ -44,23 +47,231 @@ __all__ = [
 
 # Python standard library, abstract base classes
 from abc import ABCMeta
+# Python standard library, container datatypes
+from collections import OrderedDict
+# Python standard library, system-specific parameters
+from sys import getsizeof
 
 # Haiku language, environment mapping
-from haiku.environment import Environment
+from haiku.environment import Signature
+# Haiku language, symbol type
+from haiku.types.symbol import SymbolView
+# Haiku language, tuple type
+from haiku.types.tuple_ import TupleCompatible
 
 class Procedure(object):
   def __init__(self, params, defaults, ellipsis, environment, body):
     (self.params, self.defaults, self.ellipsis, self.environment, self.body) = (
       params, defaults, ellipsis, environment, body)
+    self._signature = None
+
+  # A procedure refers to, rather than holds, the environment it closes
+  # over, so copies of values which hold procedures share them:
+  def __deepcopy__(self, memo):
+    return self
+
+  def bind(self, args):
+    """Returns the environment of a call to this procedure with `args`,
+    raising `TypeError` if they do not match its parameters. The parameters
+    are compiled into a `Signature` on first use, and again whenever they
+    are replaced."""
+    signature = self._signature
+    if (signature is None or
+        signature.params   is not self.params   or
+        signature.defaults is not self.defaults or
+        signature.ellipsis !=     self.ellipsis):
+      signature = self._signature = Signature(
+        self.params, self.defaults, self.ellipsis)
+    return signature.bind(args, self.environment)
+
+  def __call__(self, evaluate, args):
+    return evaluate(self.body, self.bind(args))
+
+def _sizeof(value):
+  """An estimate of the memory held by `value`, in bytes: its own size plus
+  that of the keys and elements of any containers within it."""
+  size, stack = 0, [value]
+  while stack:
+    value = stack.pop()
+    size += getsizeof(value)
+    if isinstance(value, TupleCompatible):
+      stack.extend(value.iterkeys())
+      stack.extend(value.itervalues())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+      stack.extend(value)
+  return size
+
+class MemoCache(object):
+  """Maps the arguments of calls to a procedure to their results. Once more
+  than `max_entries` results are held, or their arguments and results would
+  take more than `max_size` bytes (as estimated by `sys.getsizeof()`), the
+  least recently used entries are evicted. The `hits`, `misses` and
+  `evictions` counters record how well the cache is doing."""
+  def __init__(self, max_entries=2**10, max_size=2**24):
+    self.max_entries = max_entries
+    self.max_size = max_size
+    self.size = 0
+    self.hits = self.misses = self.evictions = 0
+    self._entries = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  @property
+  def hit_rate(self):
+    "The fraction of lookups which were answered from the cache."
+    lookups = self.hits + self.misses
+    return lookups and float(self.hits) / lookups or 0.0
+
+  def get(self, key, default=None):
+    "Returns the result cached for `key`, or `default` if there is none."
+    entry = self._entries.pop(key, None)
+    if entry is None:
+      self.misses += 1
+      return default
+    # Re-inserting the entry marks it as the most recently used:
+    self._entries[key] = entry
+    self.hits += 1
+    return entry[0]
+
+  def put(self, key, value):
+    """Caches `value` as the result for `key`, evicting older entries as
+    needed. Entries larger than the whole cache are not kept."""
+    size = _sizeof(key) + _sizeof(value)
+    if size > self.max_size or not self.max_entries:
+      return
+    if key in self._entries:
+      self.size -= self._entries.pop(key)[1]
+    while (len(self._entries) >= self.max_entries or
+           self.size + size > self.max_size):
+      self.size -= self._entries.popitem(last=False)[1][1]
+      self.evictions += 1
+    self._entries[key] = (value, size)
+    self.size += size
+
+  def clear(self):
+    "Drops every entry, leaving the counters as they are."
+    self._entries.clear()
+    self.size = 0
+
+def _typed(value):
+  """Returns a hashable stand-in for `value` which records the type of each
+  key and value within it, at any depth, so that values which are equal but
+  made of different types (such as `1` and `True`) have unequal stand-ins.
+  Raises `TypeError` if `value` is not hashable."""
+  results, stack = [], [(value, False)]
+  while stack:
+    value, expanded = stack.pop()
+    if not isinstance(value, TupleCompatible):
+      results.append((value.__class__, value))
+    elif not expanded:
+      stack.append((value, True))
+      for key, item in value.iteritems():
+        stack.extend([(key, False), (item, False)])
+    else:
+      # The stand-ins of the items of `value` are the last ones made, as
+      # (item, key) pairs:
+      count = len(results) - 2*len(value)
+      items = results[count:]
+      del results[count:]
+      results.append((value.__class__,
+                      frozenset(zip(items[::2], items[1::2]))))
+  return results[0]
+
+_missing = object()
+
+class MemoizedProcedure(Procedure):
+  """A procedure which remembers its results, for procedures which are pure:
+  whose result depends on nothing but their arguments, and which have no
+  side effects. Results are cached in `self.cache`, a `MemoCache`, keyed by
+  the argument `Tuple` and the types of the keys and values within it, as
+  `1` and `True` are equal but may give different results. Calls with
+  unhashable arguments, and calls which raise an error, are not cached."""
+  def __init__(self, params, defaults, ellipsis, environment, body,
+               max_entries=2**10, max_size=2**24):
+    super(MemoizedProcedure, self).__init__(
+      params, defaults, ellipsis, environment, body)
+    self.cache = MemoCache(max_entries, max_size)
+
+  def __call__(self, evaluate, args):
+    try:
+      key = _typed(args)
+      hash(key)
+    except TypeError:
+      return super(MemoizedProcedure, self).__call__(evaluate, args)
+    value = self.cache.get(key, _missing)
+    if value is _missing:
+      value = super(MemoizedProcedure, self).__call__(evaluate, args)
+      self.cache.put(key, value)
+    return value
+
+class NativeProcedure(Procedure):
+  """A procedure implemented by a Python `function`, which is passed the
+  arguments of a call directly: those with integer keys positionally, in
+  order of their keys, and the others by keyword, with any defaults filled
+  in. Unlike other procedures, a native procedure takes no ellipsis, and no
+  environment is built for its calls. The arguments are instead checked
+  against a layout of the parameters worked out once, when the procedure is
+  constructed, and the classes of the values which have passed the type
+  check of each parameter are remembered, so that the `isinstance()` check
+  is made once per class. A call which does not pass these checks is made
+  as for any other procedure, raising the same errors. The procedure's
+  `body` calls `function` with the arguments bound in an environment.
+
+  `SymbolView`s are passed to `function` as the `Symbol`s they stand for, so
+  that values loaded by `CanonicalExpressionPickler.load_mmap()` can be used
+  wherever others can."""
+  def __init__(self, params, defaults, environment, function):
+    super(NativeProcedure, self).__init__(
+      params, defaults, False, environment, self._call_body)
+    self.function = function
+    # Booleans are integers to Python, but not positions to haiku:
+    positional = sorted(key for key in params
+                        if isinstance(key, (int, long)) and
+                           not isinstance(key, bool) and key > 0)
+    keywords = [key for key in params if key not in positional]
+    self._positional = len(positional)
+    self._keywords = tuple(keywords)
+    # One (key, default, type, accepted classes) entry per parameter:
+    self._layout = tuple(
+      (key, defaults.get(key, _missing), params[key], set())
+      for key in positional + keywords)
+
+  def _call_body(self, evaluate, environment):
+    values = [environment[entry[0]] for entry in self._layout]
+    return self._call_function([
+      value.__class__ is SymbolView and str(value) or value
+      for value in values])
+
+  def _call_function(self, values):
+    if self._keywords:
+      return self.function(*values[:self._positional],
+                           **dict(zip(self._keywords,
+                                      values[self._positional:])))
+    return self.function(*values)
 
   def __call__(self, evaluate, args):
-    environment = Environment(
-      self.params,
-      self.defaults,
-      self.ellipsis,
-      args,
-      self.environment)
-    return evaluate(self.body, environment)
+    values, found = [], 0
+    for key, default, type_, accepted in self._layout:
+      if key in args:
+        value = args[key]
+        found += 1
+      elif default is not _missing:
+        value = default
+      else:
+        break
+      if value.__class__ not in accepted:
+        if not isinstance(value, type_):
+          break
+        accepted.add(value.__class__)
+      if value.__class__ is SymbolView:
+        value = str(value)
+      values.append(value)
+    else:
+      if found == len(args):
+        return self._call_function(values)
+    # Missing, extra, or wrongly-typed arguments:
+    return super(NativeProcedure, self).__call__(evaluate, args)
 
 class ProcedureCompatible(object):
   __metaclass__ = ABCMeta
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.types.procedure__test -----------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+class TestMemoCache(unittest2.TestCase):
+  """Test the bookkeeping of `MemoCache`: least-recently-used eviction
+  within its entry and byte budgets, and its statistics."""
+  def test_get(self):
+    cache = MemoCache()
+    cache.put('a', None)
+    self.assertEqual(cache.get('a', 0), None)
+    self.assertEqual(cache.get('b', 0), 0)
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+    self.assertEqual(cache.hit_rate, 0.5)
+
+  def test_entries(self):
+    cache = MemoCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    self.assertEqual(cache.get('b'), None)
+    self.assertEqual(cache.get('a'), 1)
+    self.assertEqual((len(cache), cache.evictions), (2, 1))
+    cache.put('a', 4)
+    self.assertEqual((len(cache), cache.get('a')), (2, 4))
+
+  def test_size(self):
+    entry = MemoCache()
+    entry.put('a', u'x' * 100)
+    cache = MemoCache(max_size=entry.size * 2)
+    for key in 'abc':
+      cache.put(key, u'x' * 100)
+    self.assertEqual((len(cache), cache.size), (2, entry.size * 2))
+    self.assertEqual(cache.evictions, 1)
+    cache.put('d', u'x' * 1000)
+    self.assertEqual(cache.get('d'), None)
+    cache.clear()
+    self.assertEqual((len(cache), cache.size), (0, 0))
+
+  def test_size_tuple(self):
+    # The keys and values within a Tuple are counted towards its size, at
+    # any depth, whether it is an argument or a result:
+    value = Tuple([(1, Tuple([(index, u'x' * 1000)
+                              for index in xrange(100)]))])
+    entry = MemoCache()
+    entry.put(Tuple(), value)
+    self.assertGreater(entry.size, 100 * 1000)
+    cache = MemoCache(max_size=entry.size * 2)
+    for key in xrange(3):
+      cache.put(Tuple([(1, key), (2, value)]), Tuple())
+    self.assertEqual((len(cache), cache.evictions), (1, 2))
+    cache.put(Tuple(), value)
+    self.assertEqual((len(cache), cache.evictions), (1, 3))
+
+class TestMemoizedProcedure(unittest2.TestCase):
+  """Test that a `MemoizedProcedure` runs its body once per distinct set of
+  arguments, through either evaluation engine."""
+  def setUp(self):
+    self.calls = []
+    self.environment = Environment(parent=builtinEnvironment)
+    def body(eval_, env):
+      self.calls.append(env[1])
+      return env[1] * 2
+    self.proc = Procedure(
+      params      = Tuple([(1, AlphaCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = body)
+    self.environment[Symbol('f')] = self.proc
+
+  def interpreters(self):
+    for engine in BaseInterpreter.ENGINES:
+      yield BaseInterpreter(
+        pickler     = SimpleExpressionPickler(),
+        environment = self.environment,
+        engine      = engine)
+
+  def test_memoize(self):
+    for interpreter in self.interpreters():
+      self.calls[:] = []
+      proc = interpreter.evaluate(interpreter.read(u"[memoize f 'entries:2]")[0])
+      self.assertTrue(isinstance(proc, MemoizedProcedure))
+      self.environment[Symbol('g')] = proc
+      for lisp, result in [
+          (u'[g 1]', 2), (u'[g 2]', 4), (u'[g 1]', 2), (u'[g 3]', 6),
+          (u'[g 2]', 4), (u'[g #t]', 2),
+          (Tuple([(0, Symbol('g')), (1, [1])]), [1, 1])]:
+        if isinstance(lisp, unicode):
+          lisp = interpreter.read(lisp)[0]
+        self.assertEqual(interpreter.evaluate(lisp), result)
+      # The call with 2 was evicted, as was that with 1 by the one with True,
+      # which is equal but of another type, and the call with a list is
+      # not cached:
+      self.assertEqual(self.calls, [1, 2, 3, 2, True, [1]])
+      self.assertEqual((proc.cache.hits, proc.cache.misses), (1, 5))
+      proc.cache.clear()
+      interpreter.evaluate(interpreter.read(u'[g 3]')[0])
+      self.assertEqual(self.calls[-1], 3)
+
+  def test_haiku_body(self):
+    self.environment[Symbol('h')] = MemoizedProcedure(
+      params      = Tuple([(1, AlphaCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = self.environment,
+      body        = Tuple([(0, Symbol('f')), (1, 1)]))
+    for interpreter in self.interpreters():
+      self.calls[:] = []
+      for index in xrange(3):
+        self.assertEqual(
+          interpreter.evaluate(interpreter.read(u'[h 5]')[0]), 2)
+      self.assertEqual(self.calls, [1])
+      self.environment[Symbol('h')].cache.clear()
+
+  def test_nested_types(self):
+    proc = MemoizedProcedure(
+      params      = Tuple([(1, TupleCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = lambda eval_,env:[(type(key), type(value))
+                                      for key, value in env[1].items()])
+    evaluate = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment).evaluate
+    # Arguments which are equal but hold values of other types, at any
+    # depth, are cached apart:
+    for args, result in [
+        (Tuple([(1, Tuple([(1, 1)]))]),     [(int, int)]),
+        (Tuple([(1, Tuple([(1, True)]))]),  [(int, bool)]),
+        (Tuple([(1, Tuple([(True, 1)]))]),  [(bool, int)]),
+        (Tuple([(1, Tuple([(1, 1)]))]),     [(int, int)])]:
+      self.assertEqual(proc(evaluate, args), result)
+    self.assertEqual((proc.cache.hits, proc.cache.misses), (1, 3))
+
+  def test_errors(self):
+    proc = MemoizedProcedure(
+      params      = Tuple([(1, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = lambda eval_,env:1 / env[1])
+    evaluate = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment).evaluate
+    for index in xrange(2):
+      self.assertRaises(ZeroDivisionError, proc, evaluate, Tuple([(1, 0)]))
+      self.assertRaises(TypeError, proc, evaluate, Tuple([(1, u"a")]))
+    self.assertEqual(len(proc.cache), 0)
+
+class TestNativeProcedure(unittest2.TestCase):
+  """Test that a `NativeProcedure` is passed its arguments like a Python
+  function, and that it raises the same errors as a `Procedure` with the
+  same parameters."""
+  def setUp(self):
+    self.native = NativeProcedure(
+      params      = Tuple([
+          (1,       IntegerCompatible),
+          (2,       (IntegerCompatible, UnicodeCompatible)),
+          ('scale', IntegerCompatible),
+        ]),
+      defaults    = Tuple([('scale', 1)]),
+      environment = builtinEnvironment,
+      function    = lambda a,b,scale:(a, b, scale))
+    self.proc = Procedure(
+      params      = self.native.params,
+      defaults    = self.native.defaults,
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = lambda eval_,env:(env[1], env[2], env['scale']))
+    self.evaluate = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = builtinEnvironment).evaluate
+
+  def test_call(self):
+    for args, result in [
+        (Tuple([(1, 1), (2, 2)]),                  (1, 2, 1)),
+        (Tuple([(1, 1), (2, u"b")]),               (1, u"b", 1)),
+        (Tuple([(2, 2), (1, 1), ('scale', 3)]),    (1, 2, 3))]:
+      self.assertEqual(self.native(self.evaluate, args), result)
+      self.assertEqual(self.native.body(self.evaluate, Environment(
+        self.native.params, self.native.defaults, False, args)), result)
+      self.assertEqual(self.proc(self.evaluate, args), result)
+
+  def test_errors(self):
+    for args in [
+        Tuple([(1, 1)]),
+        Tuple([(1, 1), (2, 2), (3, 3)]),
+        Tuple([(1, 1), (2, 2), ('offset', 3)]),
+        Tuple([(1, 1), (2, 2.5)]),
+        Tuple([(1, 1), (2, 2), ('scale', u"c")])]:
+      with self.assertRaises(TypeError) as native:
+        self.native(self.evaluate, args)
+      with self.assertRaises(TypeError) as proc:
+        self.proc(self.evaluate, args)
+      self.assertEqual(native.exception.args, proc.exception.args)
+
+  def test_accepted(self):
+    self.native(self.evaluate, Tuple([(1, 1), (2, u"b")]))
+    self.assertEqual([entry[3] for entry in self.native._layout],
+                     [set([int]), set([unicode]), set([int])])
+
+  def test_boolean_keys(self):
+    native = NativeProcedure(
+      params      = Tuple([(True, IntegerCompatible)]),
+      defaults    = Tuple(),
+      environment = builtinEnvironment,
+      function    = lambda **kwargs:kwargs)
+    self.assertEqual((native._positional, native._keywords), (0, (True,)))
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
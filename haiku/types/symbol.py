@@ -40,6 +40,7 @@ format of other types."""
 __all__ = [
   'Symbol',
   'SymbolCompatible',
+  'SymbolView',
 ]
 
 # ===----------------------------------------------------------------------===
@@ -56,6 +57,38 @@ class SymbolCompatible(object):
 # values are instances of the `Unicode` type, not `Symbol`.
 SymbolCompatible.register(Symbol)
 
+class SymbolView(object):
+  """A read-only view of `size` bytes at `offset` within some other object
+  supporting the buffer interface (such as a memory-mapped file), standing
+  in for a `Symbol` of the same value without copying it. The bytes are
+  only copied out when the view is converted with `str()`. Views compare
+  and hash equal to the `Symbol`s with the same contents."""
+  __slots__ = ('_buffer',)
+  def __init__(self, obj, offset=0, size=None):
+    if size is None:
+      self._buffer = buffer(obj, offset)
+    else:
+      self._buffer = buffer(obj, offset, size)
+  def __len__(self):
+    return len(self._buffer)
+  def __getitem__(self, index):
+    return self._buffer[index]
+  def __iter__(self):
+    return iter(self._buffer)
+  def __str__(self):
+    return str(self._buffer)
+  def __eq__(self, other):
+    if not isinstance(other, (Symbol, SymbolView)) or len(other) != len(self):
+      return False
+    return str(self) == str(other)
+  def __ne__(self, other):
+    return not self == other
+  def __hash__(self):
+    return hash(str(self))
+  def __repr__(self):
+    return 'SymbolView(%r)' % str(self)
+SymbolCompatible.register(SymbolView)
+
 # ===----------------------------------------------------------------------===
 # End of File
 # ===----------------------------------------------------------------------===
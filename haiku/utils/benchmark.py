@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.utils.benchmark -----------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Minimal timing harness shared by the `*__bench.py` modules. Benchmarks are
+not unit tests: they are run by hand (`python -m haiku.pickle.simple__bench`)
+and print a small table to standard output."""
+
+__all__ = [
+  'measure',
+  'report',
+]
+
+# ===----------------------------------------------------------------------===
+
+# Python standard library, system-specific parameters
+import sys
+
+# Python standard library, small code-snippet timing
+from timeit import default_timer
+
+def measure(func, repeat=3, min_time=0.2):
+  """Calls `func` repeatedly until at least `min_time` seconds have elapsed,
+  `repeat` times over, and returns the best observed time per call in
+  seconds."""
+  best = None
+  for trial in xrange(repeat):
+    number, elapsed = 0, 0.0
+    start = default_timer()
+    while elapsed < min_time:
+      func()
+      number += 1
+      elapsed = default_timer() - start
+    per_call = elapsed / number
+    if best is None or per_call < best:
+      best = per_call
+  return best
+
+def report(title, rows, stream=None):
+  """Writes a table of `(label, seconds_per_call, units_per_call, unit)` rows
+  to `stream` (standard output by default), with throughput figures and the
+  speedup of each row relative to the first."""
+  stream = stream or sys.stdout
+  stream.write(u"%s\n" % title)
+  baseline = rows and rows[0][1] or None
+  for label, seconds, units, unit in rows:
+    stream.write(u"  %-32s %12.3f us/call %14.1f %s/s %8.2fx\n" % (
+      label,
+      seconds * 1e6,
+      units / seconds,
+      unit,
+      baseline / seconds))
+  stream.write(u"\n")
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
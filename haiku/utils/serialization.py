@@ -39,28 +39,57 @@
 from haiku.types import *
 
 __all__ = [
+  'bytearray2i',
+  'bytearrays2i',
   'i2bytearray',
+  'i2bytearrays',
   'i2varnumber',
   's2varstring',
 ]
 
 # ===----------------------------------------------------------------------===
 
-from bitstring import Bits
+# Python standard library, binary/ASCII conversions
+from binascii import hexlify, unhexlify
 
 def i2bytearray(i):
-  "Serializes an integer into a little-endian byte-array."
+  """Serializes an integer into a little-endian, two's-complement byte-array
+  of the fewest whole bytes which have room for a sign bit."""
+  if -128 <= i < 128:
+    return _SMALL_BYTEARRAYS[i]
   i = long(i)
-  b = bin(i<0 and -i-1 or i).lstrip('-').rstrip('L')[2:]
-  l = 1 + len(b)
-  m = l % 8
-  l = l + (m and 8-m or 0)
-  return Symbol(Bits(intle=i, length=l).bytes)
+  # Size the representation by the magnitude of the non-negative value with
+  # the same bits as `i` (less its sign), plus one sign bit:
+  length = ((i < 0 and ~i or i).bit_length() + 8) >> 3
+  if i < 0:
+    i += 1 << (length << 3)
+  return Symbol(unhexlify('%0*x' % (length << 1, i))[::-1])
 
 def bytearray2i(b):
   "Deserializes a little-endian integer representation."
-  if not b: return 0
-  else:     return Bits(bytes=b).intle
+  if len(b) < 2:
+    return b and _SMALL_INTEGERS[b] or 0
+  i = int(hexlify(b[::-1]), 16)
+  if ord(b[-1]) & 0x80:
+    i -= 1 << (len(b) << 3)
+  return i
+
+# The single-byte encodings are looked up rather than computed, as they are
+# by far the most common:
+_SMALL_BYTEARRAYS = dict((i, Symbol(chr(i & 0xff))) for i in xrange(-128, 128))
+_SMALL_INTEGERS   = dict((b, i) for i, b in _SMALL_BYTEARRAYS.items())
+
+def i2bytearrays(integers):
+  """Serializes each of a sequence of integers into a little-endian byte-
+  array, returning a list."""
+  small, encode = _SMALL_BYTEARRAYS, i2bytearray
+  return [small[i] if -128 <= i < 128 else encode(i) for i in integers]
+
+def bytearrays2i(bytearrays):
+  """Deserializes each of a sequence of little-endian integer
+  representations, returning a list."""
+  small, decode = _SMALL_INTEGERS, bytearray2i
+  return [small[b] if b in small else decode(b) for b in bytearrays]
 
 # ===----------------------------------------------------------------------===
 
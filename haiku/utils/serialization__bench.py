@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.utils.serialization__bench ------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Throughput of the integer <-> byte-array conversions of
+`haiku.utils.serialization`, from single-byte integers through 10,000-bit
+bignums, one at a time and in bulk. For comparison, the `bitstring`-based
+implementation these replaced is also timed if that package is installed.
+Run with:
+
+  python -m haiku.utils.serialization__bench
+"""
+
+# Python standard library, pseudo-random numbers
+import random
+
+# Haiku language, serialization primitives
+from haiku.utils.serialization import (
+  bytearray2i, bytearrays2i, i2bytearray, i2bytearrays)
+
+# Haiku language, benchmarking harness
+from haiku.utils.benchmark import measure, report
+
+try:
+  # bitstring: simple construction, analysis and modification of binary data
+  from bitstring import Bits
+except ImportError:
+  Bits = None
+
+def bits_i2bytearray(i):
+  i = long(i)
+  b = bin(i<0 and -i-1 or i).lstrip('-').rstrip('L')[2:]
+  l = 1 + len(b)
+  m = l % 8
+  l = l + (m and 8-m or 0)
+  return Bits(intle=i, length=l).bytes
+
+def bits_bytearray2i(b):
+  if not b: return 0
+  else:     return Bits(bytes=b).intle
+
+def main():
+  rng = random.Random(0)
+  for bits in (7, 64, 1000, 10000):
+    integers = [rng.randrange(-2**bits, 2**bits) for index in xrange(1000)]
+    bytearrays = i2bytearrays(integers)
+    rows = []
+    if Bits is not None:
+      rows.extend([
+        (u"bitstring encode",
+         measure(lambda:map(bits_i2bytearray, integers)),
+         len(integers), u"ints"),
+        (u"bitstring decode",
+         measure(lambda:map(bits_bytearray2i, bytearrays)),
+         len(integers), u"ints")])
+    rows.extend([
+      (u"i2bytearray()",  measure(lambda:map(i2bytearray, integers)),
+       len(integers), u"ints"),
+      (u"i2bytearrays()", measure(lambda:i2bytearrays(integers)),
+       len(integers), u"ints"),
+      (u"bytearray2i()",  measure(lambda:map(bytearray2i, bytearrays)),
+       len(integers), u"ints"),
+      (u"bytearrays2i()", measure(lambda:bytearrays2i(bytearrays)),
+       len(integers), u"ints")])
+    report(u"1000 integers of up to %d bits" % bits, rows)
+
+if __name__ == '__main__':
+  main()
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.utils.serialization__test -------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, serialization primitives
+from haiku.utils.serialization import (
+  bytearray2i, bytearrays2i, i2bytearray, i2bytearrays)
+
+# Little-endian, two's-complement encodings, each the fewest whole bytes with
+# room for a sign bit:
+VECTORS = [
+  (0,        '\x00'),
+  (1,        '\x01'),
+  (-1,       '\xff'),
+  (127,      '\x7f'),
+  (-128,     '\x80'),
+  (128,      '\x80\x00'),
+  (-129,     '\x7f\xff'),
+  (255,      '\xff\x00'),
+  (256,      '\x00\x01'),
+  (32767,    '\xff\x7f'),
+  (-32768,   '\x00\x80'),
+  (32768,    '\x00\x80\x00'),
+  (2**64,    '\x00' * 8 + '\x01'),
+  (-2**64,   '\x00' * 8 + '\xff'),
+  (2**63-1,  '\xff' * 7 + '\x7f'),
+]
+
+class TestIntegerByteArrays(unittest2.TestCase):
+  """Test conversion between integers and little-endian byte-arrays."""
+  def test_i2bytearray(self):
+    for i, b in VECTORS:
+      self.assertEqual(i2bytearray(i), b)
+    self.assertEqual(i2bytearrays(i for i, b in VECTORS),
+                     [b for i, b in VECTORS])
+
+  def test_bytearray2i(self):
+    for i, b in VECTORS:
+      self.assertEqual(bytearray2i(b), i)
+    self.assertEqual(bytearray2i(''), 0)
+    self.assertEqual(bytearray2i('\xff\xff\xff'), -1)
+    self.assertEqual(bytearrays2i(b for i, b in VECTORS),
+                     [i for i, b in VECTORS])
+
+  def test_round_trip(self):
+    for bits in xrange(1, 10000, 97):
+      for i in (2**bits, 2**bits - 1, -2**bits, -2**bits - 1):
+        self.assertEqual(bytearray2i(i2bytearray(i)), i)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -39,6 +39,9 @@ from StringIO import StringIO
 # Python patterns, scenario unit-testing
 from python_patterns.unittest.scenario import ScenarioTest
 
+# Haiku language, virtual machine
+from haiku.vm import Machine
+
 __all__ = [
   'EvaluateScenarioTest',
   'PicklerDumpScenarioTest',
@@ -129,11 +132,23 @@ class EvaluateScenarioTest(ScenarioTest):
       else:                     lisp        = self._lisp
       # Compare interpreter.evaluate(loads(lisp)) vs hand-computed value:
       self.assertEqual(eval_, interpreter.evaluate(pickler.loads(lisp)))
+      # Compare interpreter.compile(loads(lisp))() vs hand-computed value:
+      self.assertEqual(eval_, interpreter.compile(pickler.loads(lisp))())
+      # Compare Machine(interpreter).evaluate(loads(lisp)) vs hand-computed value:
+      self.assertEqual(eval_, Machine(interpreter).evaluate(pickler.loads(lisp)))
+      # Compare interpreter.compile(loads(lisp), fold=True)() vs hand-computed value:
+      self.assertEqual(eval_, interpreter.compile(pickler.loads(lisp), fold=True)())
     if not skip_eval_python:
       if 'python'    in kwargs: python      = kwargs.get('python')
       else:                     python      = self._python
       # Compare interpreter.evaluate(python) vs hand-computed value:
       self.assertEqual(eval_, interpreter.evaluate(python))
+      # Compare interpreter.compile(python)() vs hand-computed value:
+      self.assertEqual(eval_, interpreter.compile(python)())
+      # Compare Machine(interpreter).evaluate(python) vs hand-computed value:
+      self.assertEqual(eval_, Machine(interpreter).evaluate(python))
+      # Compare interpreter.compile(python, fold=True)() vs hand-computed value:
+      self.assertEqual(eval_, interpreter.compile(python, fold=True)())
 
 # ===----------------------------------------------------------------------===
 # End of File
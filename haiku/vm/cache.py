@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.cache ------------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""A directory of compiled `Code`, shared between processes. Entries are
+keyed by a digest of the source document and the instruction set `VERSION`,
+so that a process which has seen a document before, or whose predecessor has,
+can skip both parsing and compilation."""
+
+__all__ = [
+  'CodeCache',
+]
+
+# ===----------------------------------------------------------------------===
+
+# Python standard library, serialization of Python objects
+import cPickle as pickle
+# Python standard library, secure hashes
+import hashlib
+# Python standard library, operating system interfaces
+import os
+# Python standard library, temporary files
+import tempfile
+# Python standard library, time access
+import time
+
+# Haiku language, s-expression pickler
+from haiku.pickle import CanonicalExpressionPickler
+
+# Haiku language, virtual machine instruction set and compiler
+from .compiler import compile_expression
+from .opcodes import VERSION
+
+class CodeCache(object):
+  """Persists the compiled form of haiku documents to `directory`, one file
+  per document. `load()` takes a document in the encoding of `pickler`
+  (canonical expressions by default) and `compile()` an already parsed
+  expression, keyed by its canonical encoding.
+
+  Writers never leave a partial entry behind: each entry is written to a
+  temporary file which is then renamed into place, so processes may share
+  one directory freely. Once the entries exceed `max_size` bytes on disk the
+  least recently used are deleted. The `hits`, `misses` and `evictions`
+  counters are per process.
+
+  Entries are Python pickles, so the directory must be no more writable
+  than the code that uses it."""
+  SUFFIX = '.code'
+
+  # Temporary files older than this many seconds are assumed to have been
+  # left behind by a writer which died, and are deleted during eviction:
+  STALE_AGE = 3600
+
+  def __init__(self, directory, max_size=2**26, pickler=None):
+    self.directory = directory
+    self.max_size  = max_size
+    self.pickler   = pickler or CanonicalExpressionPickler()
+    self.hits = self.misses = self.evictions = 0
+    if not os.path.isdir(directory):
+      try:
+        os.makedirs(directory)
+      except OSError:
+        # Another process may have created it first:
+        if not os.path.isdir(directory):
+          raise
+    self._size = sum(size for path, size, mtime in self._entries())
+
+  def digest(self, document, pickler=None):
+    """Returns the key under which the compiled form of `document`, in the
+    encoding of `pickler`, is stored."""
+    pickler = pickler or self.pickler
+    if isinstance(document, unicode):
+      document = document.encode('utf-8')
+    hash_ = hashlib.sha1('%d\0%s.%s\0' % (VERSION,
+      pickler.__class__.__module__, pickler.__class__.__name__))
+    hash_.update(document)
+    return hash_.hexdigest()
+
+  def load(self, document):
+    """Returns a list of `Code`, one per expression of `document`, parsing
+    and compiling it only if it is not in the cache already."""
+    key = self.digest(document)
+    codes = self._read(key)
+    if codes is None:
+      codes = map(compile_expression, self.pickler.loads(document))
+      self._write(key, codes)
+    return codes
+
+  def compile(self, expression):
+    """Returns the `Code` of a parsed expression, compiling it only if it is
+    not in the cache already."""
+    canonical = CanonicalExpressionPickler()
+    try:
+      encoding = canonical.dumps(expression)
+    except ValueError:
+      # Expressions containing Python callables have no encoding to key on:
+      return compile_expression(expression)
+    key = self.digest(encoding, canonical)
+    codes = self._read(key)
+    if codes is None:
+      codes = [compile_expression(expression)]
+      self._write(key, codes)
+    return codes[0]
+
+  def clear(self):
+    "Deletes every entry, leaving the counters as they are."
+    for path, size, mtime in self._entries():
+      self._remove(path)
+    self._size = 0
+
+  def _path(self, key):
+    return os.path.join(self.directory, key + self.SUFFIX)
+
+  def _read(self, key):
+    # Any failure to read an entry, such as its concurrent eviction or its
+    # having been written by an incompatible version of Python, is a miss:
+    path = self._path(key)
+    try:
+      with open(path, 'rb') as istream:
+        codes = pickle.load(istream)
+      # Marks the entry as recently used:
+      os.utime(path, None)
+    except Exception:
+      self.misses += 1
+      return None
+    self.hits += 1
+    return codes
+
+  def _write(self, key, codes):
+    try:
+      data = pickle.dumps(codes, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError):
+      # Code which refers to Python callables cannot be persisted:
+      return
+    if len(data) > self.max_size:
+      return
+    fd, temp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+    try:
+      with os.fdopen(fd, 'wb') as ostream:
+        ostream.write(data)
+      os.rename(temp, self._path(key))
+    except:
+      self._remove(temp)
+      raise
+    self._size += len(data)
+    if self._size > self.max_size:
+      self._evict()
+
+  def _evict(self):
+    # Other processes write to the same directory, so the sizes are taken
+    # afresh from disk before deciding what to delete:
+    entries = sorted(self._entries(), key=lambda entry:entry[2])
+    self._size = sum(size for path, size, mtime in entries)
+    for path, size, mtime in entries:
+      if self._size <= self.max_size:
+        break
+      if self._remove(path):
+        self.evictions += 1
+      self._size -= size
+    stale = time.time() - self.STALE_AGE
+    for name in os.listdir(self.directory):
+      if name.endswith('.tmp'):
+        path = os.path.join(self.directory, name)
+        try:
+          if os.stat(path).st_mtime < stale:
+            self._remove(path)
+        except OSError:
+          pass
+
+  def _entries(self):
+    "Yields a `(path, size, mtime)` triple for each entry on disk."
+    for name in os.listdir(self.directory):
+      if name.endswith(self.SUFFIX):
+        path = os.path.join(self.directory, name)
+        try:
+          stat = os.stat(path)
+        except OSError:
+          continue
+        yield (path, stat.st_size, stat.st_mtime)
+
+  def _remove(self, path):
+    "Deletes a file, returning `False` if another process did so first."
+    try:
+      os.remove(path)
+    except OSError:
+      return False
+    return True
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
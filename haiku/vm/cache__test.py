@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.cache__test ------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, operating system interfaces
+import os
+# Python standard library, high-level file operations
+import shutil
+# Python standard library, temporary files
+import tempfile
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, s-expression pickler
+from haiku.pickle import CanonicalExpressionPickler, SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine
+from haiku.vm import CodeCache, compile_expression
+
+DOCUMENT = CanonicalExpressionPickler().dumps(
+  Tuple([(0, Symbol('+')), (1, 1), (2, Tuple([
+    (0, Symbol('*')), (1, 2), (2, 3)]))]),
+  Symbol('x'))
+
+class TestCodeCache(unittest2.TestCase):
+  "Test the persistence, sharing and eviction of compiled code."
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def files(self):
+    return sorted(os.listdir(self.directory))
+
+  def test_load(self):
+    cache = CodeCache(self.directory)
+    expected = [compile_expression(expression).disassemble()
+                for expression in CanonicalExpressionPickler().loads(DOCUMENT)]
+    codes = cache.load(DOCUMENT)
+    self.assertEqual([code.disassemble() for code in codes], expected)
+    self.assertEqual((cache.hits, cache.misses), (0, 1))
+    # A second cache on the same directory, as another process would have:
+    other = CodeCache(self.directory)
+    codes = other.load(DOCUMENT)
+    self.assertEqual([code.disassemble() for code in codes], expected)
+    self.assertEqual((other.hits, other.misses), (1, 0))
+    self.assertEqual(len(self.files()), 1)
+    self.assertTrue(self.files()[0].endswith(CodeCache.SUFFIX))
+
+  def test_keys(self):
+    cache = CodeCache(self.directory)
+    self.assertNotEqual(cache.digest(u'x'), cache.digest(u'y'))
+    self.assertNotEqual(cache.digest(u'x'),
+                        cache.digest(u'x', SimpleExpressionPickler()))
+    # An expression is keyed by its canonical encoding:
+    expression = Tuple([(0, Symbol('+')), (1, 1), (2, 2)])
+    cache.compile(expression)
+    self.assertEqual(self.files(), [
+      cache.digest(CanonicalExpressionPickler().dumps(expression)) +
+      CodeCache.SUFFIX])
+    cache.compile(Tuple(expression))
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+  def test_unpicklable(self):
+    # Code which refers to a Python callable is returned, but not kept:
+    cache = CodeCache(self.directory)
+    native = lambda eval_,env:1
+    self.assertEqual(cache.compile(native).disassemble(),
+                     [('NATIVE', native), ('RETURN', None)])
+    self.assertEqual(self.files(), [])
+
+  def test_eviction(self):
+    cache = CodeCache(self.directory, max_size=1024)
+    for index in xrange(64):
+      cache.compile(Tuple([(0, Symbol('f%d' % index))]))
+    self.assertTrue(cache.evictions)
+    self.assertTrue(sum(os.path.getsize(os.path.join(self.directory, name))
+                        for name in self.files()) <= 1024)
+    cache.clear()
+    self.assertEqual(self.files(), [])
+
+  def test_corrupt(self):
+    cache = CodeCache(self.directory)
+    cache.load(DOCUMENT)
+    with open(os.path.join(self.directory, self.files()[0]), 'wb') as ostream:
+      ostream.write('garbage')
+    self.assertEqual(len(cache.load(DOCUMENT)), 2)
+    self.assertEqual((cache.hits, cache.misses), (0, 2))
+    self.assertEqual(len(cache.load(DOCUMENT)), 2)
+    self.assertEqual(cache.hits, 1)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.compiler ---------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Translation of Python-expressed haiku expressions into `Code` for the
+virtual machine. The translation mirrors `BaseInterpreter.evaluate()` case
+for case, and is itself iterative, so that arbitrarily deep expressions can be
+compiled."""
+
+# Haiku language, built-in primitives
+from haiku.builtin import special_form
+from haiku.builtin.special import (
+  and_form, check_recur, cond_form, if_form, loop_form, or_form, recur_form,
+  while_form)
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine instruction set
+from .opcodes import *
+
+__all__ = [
+  'compile_expression',
+]
+
+# ===----------------------------------------------------------------------===
+
+_SELF_EVALUATING = (
+  OmegaCompatible,
+  BooleanCompatible,
+  IntegerCompatible,
+  FractionCompatible,
+  UnicodeCompatible)
+
+# Marks the work items of `compile_expression()` which are evaluated in the
+# global environment, where no symbol has a lexical address:
+_GLOBAL = object()
+
+_quote = Symbol('quote')
+
+class _Context(object):
+  """Marks the work items of `compile_expression()` which are evaluated in the
+  frame of an iteration form (see `haiku.builtin.special`): the scope of its
+  body, and for those in tail position within it, the label of the start of
+  an iteration and the variables which a recur form may rebind (else
+  None)."""
+  __slots__ = ('scope', 'top', 'names')
+
+  def __init__(self, scope, top=None, names=None):
+    self.scope, self.top, self.names = scope, top, names
+
+def _nontail(kind):
+  "Returns the kind of the subexpressions of an expression of `kind`."
+  if kind.__class__ is _Context and kind.top is not None:
+    return _Context(kind.scope)
+  return kind
+
+class _Label(object):
+  """A position in the code being compiled, which jumps forward to it are
+  patched with once it is known. A work item `(_Label, label)` marks it."""
+  __slots__ = ('target',)
+
+_JUMPS = frozenset([JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP,
+                    JUMP_IF_TRUE_OR_POP])
+
+def compile_expression(expression, scope=None):
+  """Returns the `Code` which leaves the value of `expression` on the stack
+  and returns it.
+
+  If `expression` is the body of a procedure, `scope` describes the frames it
+  will be run in, innermost first, as `(layout, closed)` pairs: the symbols
+  certainly bound in the frame, and whether nothing else can be. A symbol in
+  the layout of a frame at a given depth, with only closed frames in between,
+  is loaded from that frame directly by its lexical address instead of being
+  resolved by name at run time (see `Environment.lexical_chain()`). Other
+  symbols are resolved by name, starting from the first frame which is not
+  closed, and through an `InlineCache` wherever that frame is the same on
+  every run."""
+  code = Code()
+  emit = code.emit
+  scope = scope or ()
+  # The work stack holds `(op, operand)` instructions still to be emitted,
+  # and entries for subexpressions still to be compiled, in reverse order:
+  # `(None, expression)` for those evaluated in the local environment,
+  # `(_GLOBAL, expression)` for those evaluated in the global one (the keys
+  # of an application, and their subexpressions), and `(context, expression)`
+  # for those evaluated in the frame of an iteration form.
+  work = [(None, expression)]
+  while work:
+    op, expression = work.pop()
+    if op is _Label:
+      expression.target = len(code)
+      continue
+    if op is not None and op is not _GLOBAL and op.__class__ is not _Context:
+      emit(op, expression)
+      continue
+    kind = op
+    if kind.__class__ is _Context:
+      local_scope = kind.scope
+    else:
+      local_scope = scope
+
+    # Handle (trivial) self-evaluating types:
+    if isinstance(expression, _SELF_EVALUATING):
+      emit(CONST, expression)
+
+    # Variable reference (lookup in local environment)
+    elif isinstance(expression, SymbolCompatible):
+      if kind is not _GLOBAL:
+        depth, bound = _lexical_address(expression, local_scope)
+      else:
+        depth, bound = 0, False
+      if bound and depth:
+        emit(LOAD_OUTER, (depth, expression))
+      elif bound:
+        emit(LOAD_LOCAL, expression)
+      # Resolution by name starting from a frame which is new on every call
+      # would never hit in a cache:
+      elif depth == 0 and local_scope and kind is not _GLOBAL:
+        emit(LOAD, expression)
+      else:
+        emit(LOAD_GLOBAL, InlineCache(expression, depth))
+
+    # Non-tuple container types, whose elements are evaluated in order:
+    elif isinstance(expression, (
+      SequenceCompatible,
+      SetCompatible)):
+      elems = list(expression)
+      work.append((BUILD, (expression.__class__, len(elems))))
+      work.extend((_nontail(kind), elem) for elem in reversed(elems))
+
+    # Unsupported by `evaluate()` as well:
+    elif isinstance(expression, (
+      MatrixCompatible,
+      RelationCompatible)):
+      emit(RAISE, (NotImplementedError,))
+
+    # Procedure application:
+    elif isinstance(expression, TupleCompatible):
+      work.extend(reversed(
+        _compile_application(expression, kind, local_scope)))
+
+    # Procedures (built-in):
+    elif callable(expression):
+      emit(NATIVE, expression)
+
+    else:
+      emit(RAISE, (ValueError,))
+  emit(RETURN)
+  # Every label has been reached by now, so jumps can be given their targets:
+  for index, op in enumerate(code.ops):
+    if op in _JUMPS:
+      code.args[index] = code.args[index].target
+    elif op == SPECIAL_GUARD:
+      proc_name, label = code.args[index]
+      code.args[index] = (proc_name, label.target)
+  return code
+
+def _compile_application(expression, kind, scope):
+  """Returns the work items applying the procedure expressed by a tuple, in
+  the order they are to be run."""
+  if 0 not in expression:
+    return [(RAISE, (SyntaxError, u"expected procedure name in position 0"))]
+  proc_name = expression[0]
+  keys = filter(lambda key:key!=0, expression.keys())
+  local = _nontail(kind)
+  items = [(local, proc_name)]
+  # Argument keys are evaluated in the global environment, but usually they
+  # are constants and become part of the APPLY instruction instead:
+  constant = all(isinstance(key, _SELF_EVALUATING) for key in keys)
+  form = special_form(proc_name)
+  if form is None:
+    items.extend(_apply_items(expression, keys, constant, local,
+                              APPLY, APPLY_KEYS))
+    return items
+  # The arguments of a special form are passed to it unevaluated. Those of
+  # the conditionals and iteration forms are compiled instead, with jumps
+  # over what is not to be evaluated and back to what is to be evaluated
+  # again, for as long as their names are bound to the builtins:
+  native = _NATIVE.get(form, lambda *args:None)(expression, keys, kind, scope)
+  if not native:
+    items.extend(_apply_items(expression, keys, constant, CONST,
+                              SPECIAL, SPECIAL_KEYS))
+    return items
+  special, end = _Label(), _Label()
+  items.append((SPECIAL_GUARD, (proc_name, special)))
+  items.extend(native(expression, kind, end))
+  items.append((JUMP, end))
+  items.append((_Label, special))
+  items.extend(_apply_items(expression, keys, constant, CONST,
+                              SPECIAL, SPECIAL_KEYS))
+  items.append((_Label, end))
+  return items
+
+def _apply_items(expression, keys, constant, kind, apply_, apply_keys):
+  """Returns the work items which evaluate the keys and values of the
+  arguments of an application (the latter as `kind`) and apply the procedure
+  already on the stack to them, with `apply_` if the keys are constant and
+  `apply_keys` otherwise."""
+  items = []
+  if constant:
+    op = (apply_, (tuple(keys), expression[0]))
+  else:
+    items.append((ENTER_GLOBAL, None))
+    items.extend((_GLOBAL, key) for key in keys)
+    items.append((LEAVE_GLOBAL, None))
+    op = (apply_keys, (len(keys), expression[0]))
+  items.extend((kind, expression[key]) for key in keys)
+  items.append(op)
+  return items
+
+def _positional(keys):
+  "Returns true if `keys` are the positions 1 to n."
+  return (all(isinstance(key, _SELF_EVALUATING) for key in keys) and
+          sorted(keys) == range(1, len(keys)+1))
+
+def _compile_if(expression, kind, end):
+  "[if condition consequent alternative]"
+  alternative = _Label()
+  items = [
+    (_nontail(kind), expression[1]),
+    (JUMP_IF_FALSE, alternative),
+    (kind, expression[2]),
+    (JUMP, end),
+    (_Label, alternative)]
+  if 3 in expression:
+    items.append((kind, expression[3]))
+  else:
+    items.append((CONST, None))
+  return items
+
+def _compile_boolean(jump, empty):
+  "[and ...] and [or ...]"
+  def compile_(expression, kind, end):
+    if len(expression) == 1:
+      return [(CONST, empty)]
+    items = []
+    for key in xrange(1, len(expression)-1):
+      items.append((_nontail(kind), expression[key]))
+      items.append((jump, end))
+    items.append((kind, expression[len(expression)-1]))
+    return items
+  return compile_
+
+def _compile_cond(expression, kind, end):
+  "[cond test1 value1 test2 value2 ... default]"
+  items, count = [], len(expression) - 1
+  for key in xrange(1, count, 2):
+    alternative = _Label()
+    items.extend([
+      (_nontail(kind), expression[key]),
+      (JUMP_IF_FALSE, alternative),
+      (kind, expression[key+1]),
+      (JUMP, end),
+      (_Label, alternative)])
+  if count % 2:
+    items.append((kind, expression[count]))
+  else:
+    items.append((CONST, None))
+  return items
+
+def _variables(expression, keys, positional, required):
+  """Returns the variables of an iteration or recur form, as `(name, key)`
+  pairs, if its arguments are valid and its keys constant, or else None: the
+  form is then applied at run time, to raise its error. Variables are given
+  under quoted symbols."""
+  variables = []
+  for key in keys:
+    if (isinstance(key, TupleCompatible) and len(key) == 2 and
+        key.get(0) in (_quote,) and isinstance(key.get(1), SymbolCompatible)):
+      variables.append((key[1], key))
+    elif not isinstance(key, _SELF_EVALUATING) or key not in positional:
+      return None
+  if not all(key in expression for key in positional[:required]):
+    return None
+  return variables
+
+def _iteration_items(expression, kind, scope, variables):
+  """Returns the work items entering the frame of an iteration form, and the
+  kinds of the expressions evaluated in it, in tail position and not."""
+  items = [(_nontail(kind), expression[key]) for name, key in variables]
+  names = tuple(name for name, key in variables)
+  items.append((ENTER_LOOP, names))
+  # The environment the form is evaluated in is the parent of its frame,
+  # which addresses it by depth like any other:
+  scope = [(frozenset(names), True)] + list(scope or [(frozenset(), False)])
+  top = _Label()
+  items.append((_Label, top))
+  return items, _Context(scope, top, frozenset(names)), _Context(scope)
+
+def _compile_loop(scope, variables):
+  "[loop body 'var:init ...]"
+  def compile_(expression, kind, end):
+    items, tail, local = _iteration_items(expression, kind, scope, variables)
+    items.extend([
+      (tail, expression[1]),
+      (LEAVE_LOOP, None)])
+    return items
+  return compile_
+
+def _compile_while(scope, variables):
+  "[while test body result 'var:init ...]"
+  def compile_(expression, kind, end):
+    items, tail, local = _iteration_items(expression, kind, scope, variables)
+    done = _Label()
+    items.extend([
+      (local, expression[1]),
+      (JUMP_IF_FALSE, done),
+      (tail, expression[2]),
+      (POP, None),
+      (JUMP, tail.top),
+      (_Label, done)])
+    if 3 in expression:
+      items.append((local, expression[3]))
+    else:
+      items.append((CONST, None))
+    items.append((LEAVE_LOOP, None))
+    return items
+  return compile_
+
+def _compile_recur(variables):
+  "[recur 'var:value ...]"
+  def compile_(expression, kind, end):
+    items = [(_nontail(kind), expression[key]) for name, key in variables]
+    items.extend([
+      (REBIND, tuple(name for name, key in variables)),
+      (JUMP, kind.top)])
+    return items
+  return compile_
+
+def _native_recur(expression, keys, kind, scope):
+  "Returns the compiler of a recur form in tail position, else None."
+  if kind.__class__ is not _Context or kind.top is None:
+    return None
+  variables = _variables(expression, keys, (), 0)
+  if variables is None or not all(
+      name in kind.names for name, key in variables):
+    return None
+  return _compile_recur(variables)
+
+def _native_iteration(compile_, positional, required):
+  "Returns the compiler of an iteration form, or None."
+  def native(expression, keys, kind, scope):
+    if kind is _GLOBAL:
+      return None
+    variables = _variables(expression, keys, positional, required)
+    if variables is None:
+      return None
+    try:
+      for key in positional:
+        if key in expression:
+          check_recur(expression[key], key == positional[required-1])
+    except SyntaxError:
+      return None
+    return compile_(scope, variables)
+  return native
+
+# The special forms compiled natively: each entry takes an application, its
+# keys, and the kind and scope of the work item, and returns a function
+# compiling it, or None if the application is to be left to the form at run
+# time (to raise its error, for instance).
+_NATIVE = {
+  if_form:    lambda expression, keys, kind, scope:(
+                set(keys) in (set([1, 2]), set([1, 2, 3])) and _compile_if),
+  and_form:   lambda expression, keys, kind, scope:(
+                _positional(keys) and
+                _compile_boolean(JUMP_IF_FALSE_OR_POP, True)),
+  or_form:    lambda expression, keys, kind, scope:(
+                _positional(keys) and
+                _compile_boolean(JUMP_IF_TRUE_OR_POP, False)),
+  cond_form:  lambda expression, keys, kind, scope:(
+                _positional(keys) and _compile_cond),
+  loop_form:  _native_iteration(_compile_loop, (1,), 1),
+  while_form: _native_iteration(_compile_while, (1, 2, 3), 2),
+  recur_form: _native_recur,
+}
+
+def _lexical_address(symbol, scope):
+  """Returns the depth of the frame of `scope` which `symbol` will be found
+  in and `True`, or if that cannot be known ahead of time, the depth of the
+  frame from which it is to be resolved by name and `False`."""
+  for depth, (layout, closed) in enumerate(scope):
+    if symbol in layout:
+      return depth, True
+    if not closed:
+      return depth, False
+  return 0, False
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.fold -------------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""Constant folding: an optimization pass over Python-expressed haiku
+expressions which replaces applications of pure built-in procedures to
+constant arguments by their results, ahead of evaluation. The pass returns a
+new expression, and may be applied to stored expressions once, before they
+are compiled or evaluated any number of times."""
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment, pureBuiltins, special_form
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine compiler
+from .compiler import _SELF_EVALUATING
+
+__all__ = [
+  'fold_constants',
+]
+
+# ===----------------------------------------------------------------------===
+
+_quote, _unquote, _unquote_splice = map(Symbol,
+'quote   unquote   unquote-splice'.split())
+
+# The special forms whose arguments are all expressions, evaluated (if at all)
+# in the environment of the application, and so can be folded. The arguments
+# of any other are left as they are:
+_FOLDABLE_FORMS = frozenset(map(Symbol,
+'if   and   or   cond'.split()))
+
+def _has_unquote(expression):
+  "Returns true if a quotation of `expression` would evaluate any part of it."
+  stack = [expression]
+  while stack:
+    expression = stack.pop()
+    if isinstance(expression, TupleCompatible):
+      if 0 in expression and expression[0] in (_unquote, _unquote_splice):
+        return True
+      stack.extend(expression.itervalues())
+  return False
+
+def fold_constants(expression, environment=None, pure=None):
+  """Returns `expression` with each application of a procedure in `pure`
+  (by default, the pure built-ins) to constant arguments replaced by its
+  result, so that evaluating the returned expression in `environment` (by
+  default, the built-in environment) gives the same result as evaluating
+  `expression` would. Arguments are constant if they are self-evaluating,
+  quoted, or themselves folded, and a procedure name is only folded if it is
+  bound to the very same procedure in `environment`, so names shadowed there
+  are left alone. Applications which raise an error are also left alone, for
+  the error to be raised when the expression is evaluated. Subexpressions
+  which are not folded are shared with `expression`."""
+  if environment is None:
+    environment = builtinEnvironment
+  if pure is None:
+    pure = pureBuiltins
+  pure = frozenset(map(id, pure))
+
+  def lookup(symbol):
+    try:
+      return environment.resolve(symbol)[symbol]
+    except KeyError:
+      return None
+  # Quotation is how constant arguments are recognized, and how results which
+  # are not self-evaluating are written, so it must not be shadowed either:
+  quote = lookup(_quote) is builtinEnvironment[_quote]
+
+  def constant(expression):
+    "Returns a 1-tuple of the value of a constant `expression`, or None."
+    if isinstance(expression, _SELF_EVALUATING):
+      return (expression,)
+    if (quote and isinstance(expression, TupleCompatible) and
+        len(expression) == 2 and 1 in expression and
+        expression.get(0) in (_quote,) and
+        not _has_unquote(expression[1])):
+      return (expression[1],)
+    return None
+
+  def literal(value):
+    "Returns an expression which evaluates to `value`, or None."
+    if isinstance(value, _SELF_EVALUATING):
+      return value
+    if (quote and isinstance(value, (SymbolCompatible, TupleCompatible)) and
+        not _has_unquote(value)):
+      return Tuple([(0, _quote), (1, value)])
+    return None
+
+  def apply(expression):
+    "Returns the folded form of an application whose arguments are folded."
+    proc_name = expression[0]
+    if not isinstance(proc_name, SymbolCompatible):
+      return expression
+    proc = lookup(proc_name)
+    if id(proc) not in pure:
+      return expression
+    args = []
+    for key, value in expression.iteritems():
+      if key == 0:
+        continue
+      # Argument keys are evaluated in the global environment:
+      if not isinstance(key, _SELF_EVALUATING):
+        return expression
+      value = constant(value)
+      if value is None:
+        return expression
+      args.append((key, value[0]))
+    try:
+      result = proc.body(None, Environment(proc.params, proc.defaults,
+        proc.ellipsis, Tuple(args), proc.environment))
+    except Exception:
+      return expression
+    result = literal(result)
+    if result is None:
+      return expression
+    return result
+
+  # Expressions are folded bottom-up, with an explicit stack of the container
+  # nodes being rebuilt: each frame holds a node, an iterator over its
+  # (key, subexpression) items, the folded items so far, and whether any of
+  # them differs from the original.
+  def enter(expression):
+    if isinstance(expression, TupleCompatible):
+      # The arguments of a quotation, or other special form, are not
+      # evaluated as they are, so are not folded:
+      if 0 not in expression:
+        return None
+      if (special_form(expression[0]) is not None and
+          expression[0] not in _FOLDABLE_FORMS):
+        return None
+      return [expression, expression.iteritems(), [], False]
+    if isinstance(expression, (SequenceCompatible, SetCompatible)):
+      return [expression, enumerate(expression), [], False]
+    return None
+
+  def leave(expression, items, changed):
+    if changed:
+      if isinstance(expression, TupleCompatible):
+        expression = Tuple(items)
+      else:
+        expression = expression.__class__(value for key, value in items)
+    if isinstance(expression, TupleCompatible):
+      expression = apply(expression)
+    return expression
+
+  root = enter(expression)
+  if root is None:
+    return expression
+  stack = [root]
+  while True:
+    frame = stack[-1]
+    for key, value in frame[1]:
+      frame[2].append((key, value))
+      child = enter(value)
+      if child is not None:
+        stack.append(child)
+        break
+    else:
+      stack.pop()
+      result = leave(frame[0], frame[2], frame[3])
+      if not stack:
+        return result
+      parent = stack[-1]
+      key, value = parent[2][-1]
+      if result is not value:
+        parent[2][-1] = (key, result)
+        parent[3] = True
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.fold__test -------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine
+from haiku.vm import Machine, fold_constants
+
+class TestFoldConstants(unittest2.TestCase):
+  """Test the constant-folding pass beyond the evaluation scenarios, which
+  it is run against by `EvaluateScenarioTest`."""
+  def setUp(self):
+    self.pickler = SimpleExpressionPickler(engine='native')
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(
+      pickler     = self.pickler,
+      environment = self.environment)
+    self.environment[Symbol('x')] = 1
+
+  def fold(self, lisp, environment=None):
+    return self.pickler.dumps(fold_constants(self.pickler.loads(lisp)[0],
+      environment or self.environment))
+
+  def test_fold(self):
+    for lisp, folded in [
+        (u'[* 3 [+ 1 6]]',                u'21'),
+        (u'[rational 1 3]',               u'1/3'),
+        (u'[+ x [* 2 3]]',                u'[+ x 6]'),
+        (u'[cat [quote ab] [quote cd]]',  u"'abcd"),
+        (u'[tuple 1 [+ 1 1]]',            u"'[1 2]"),
+        (u'[b64decode [b64encode \'ab]]', u"'ab"),
+        (u'(1 [- 3 1])',                  u'(1 2)')]:
+      self.assertEqual(self.fold(lisp), folded)
+      self.assertEqual(
+        self.interpreter.evaluate(self.pickler.loads(folded)[0]),
+        self.interpreter.evaluate(self.pickler.loads(lisp)[0]))
+
+  def test_not_folded(self):
+    for lisp in [
+        u'[+ x 1]',                       # not a constant argument
+        u'[/ 1 0]',                       # raises an error when evaluated
+        u'[quote [+ 1 2]]',               # not evaluated at all
+        u'[quote [+ 1 [unquote x]]]',
+        u'[tuple [quote [unquote x]]]',   # not a constant argument
+        u'[pickle 1]']:                   # not pure
+      self.assertEqual(self.fold(lisp),
+                       self.pickler.dumps(self.pickler.loads(lisp)[0]))
+
+  def test_shadowing(self):
+    lisp = u'[* 3 [+ 1 6]]'
+    self.environment[Symbol('+')] = Procedure(
+      params      = Tuple([(1, IntegerCompatible), (2, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = builtinEnvironment,
+      body        = lambda eval_,env:env[1])
+    self.assertEqual(self.fold(lisp), lisp)
+    self.assertEqual(self.fold(lisp, builtinEnvironment), u'21')
+    # Rebinding a name to the same pure built-in does not shadow it:
+    self.environment[Symbol('+')] = builtinEnvironment[Symbol('-')]
+    self.assertEqual(self.fold(lisp), u'-15')
+    # Nor are results quoted if quotation itself is shadowed:
+    self.environment[Symbol('quote')] = builtinEnvironment[Symbol('cat')]
+    self.assertEqual(self.fold(u'[tuple 1 2]'), u'[tuple 1 2]')
+    self.assertEqual(self.fold(u"[cat 'a 'b]"), u"[cat 'a 'b]")
+
+  def test_compile(self):
+    expression = self.pickler.loads(u'[+ [* 2 3] x]')[0]
+    self.assertEqual(self.interpreter.compile(expression, fold=True)(), 7)
+    code = Machine(self.interpreter).compile(expression, fold=True)
+    self.assertEqual(code.disassemble()[1], ('CONST', 6))
+    self.assertEqual(Machine(self.interpreter).run(code), 7)
+
+  def test_deep(self):
+    expression = 1
+    for level in xrange(5000):
+      expression = Tuple([(0, Symbol('+')), (1, expression), (2, 1)])
+    self.assertEqual(fold_constants(expression), 5001)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.machine ----------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""A stack machine running `Code` compiled from haiku expressions. Calls to
+procedures whose body is itself a haiku expression push a frame onto the
+machine's own call stack instead of recursing in Python, so the depth of
+haiku-level calls is bounded by memory, not by the Python recursion limit.
+Procedures implemented in Python (the builtins) are called directly.
+
+Procedure bodies are compiled with the lexical addresses of the symbols bound
+in the procedure's own frame, and in any enclosing procedure frames, so that
+these are loaded without searching the chain of environments by name."""
+
+# Python standard library, iteration tools
+from itertools import chain
+# Python standard library, weak references
+from weakref import WeakKeyDictionary, ref
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment, call_special_form, special_form
+# Haiku language, environment mapping
+from haiku.environment import Environment, LoopFrame
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine instruction set, compiler and optimizer
+from .compiler import compile_expression
+from .fold import fold_constants
+from .opcodes import *
+
+__all__ = [
+  'Machine',
+]
+
+# ===----------------------------------------------------------------------===
+
+def _pop_many(stack, count):
+  "Pops the top `count` values off `stack`, returning them in order."
+  if not count:
+    return []
+  values = stack[-count:]
+  del stack[-count:]
+  return values
+
+class Machine(object):
+  """Runs compiled haiku code in the global environment and with the syntax
+  errors of an interpreter, counting the instructions executed."""
+  def __init__(self, interpreter, *args, **kwargs):
+    super(Machine, self).__init__(*args, **kwargs)
+    self._environment = interpreter._environment
+    self.SyntaxError  = interpreter.SyntaxError
+    self._bodies      = WeakKeyDictionary()
+    self.counts       = [0] * len(OPNAMES)
+
+  def compile(self, expression, fold=False):
+    """Compiles a Python-expressed haiku expression into `Code`, folding its
+    constant subexpressions first if `fold` is true, as with
+    `BaseInterpreter.compile()`."""
+    if fold:
+      expression = fold_constants(expression, self._environment)
+    return compile_expression(expression)
+
+  def evaluate(self, expression, environment=None):
+    """Evaluate a Python-expressed haiku expression in the context of an
+    environment, like `BaseInterpreter.evaluate()`."""
+    return self.run(compile_expression(expression), environment)
+
+  @property
+  def instructions(self):
+    "The total number of instructions executed."
+    return sum(self.counts)
+
+  def instruction_counts(self):
+    "Returns the number of instructions executed, by opcode name."
+    return dict((name, count) for name, count in zip(OPNAMES, self.counts)
+                if count)
+
+  def reset_counts(self):
+    "Resets the instruction counters to zero."
+    self.counts[:] = [0] * len(OPNAMES)
+
+  def _body_code(self, proc):
+    """Returns the compiled body of a procedure, compiling it on first use,
+    and the frames outside of its own which it addresses lexically."""
+    signature = (proc.params, proc.defaults, proc.ellipsis, proc.environment,
+                 proc.body)
+    entry = self._bodies.get(proc)
+    if entry is None or any(a is not b for a, b in zip(entry[0], signature)):
+      outer = proc.environment.lexical_chain()
+      scope = [(frozenset(chain(proc.params, proc.defaults)),
+                not proc.ellipsis)]
+      scope.extend((frame._layout, frame._closed) for frame in outer)
+      entry = self._bodies[proc] = (
+        signature, compile_expression(proc.body, scope), outer)
+    return entry[1], entry[2]
+
+  def run(self, code, environment=None):
+    "Runs `code` in the context of an environment, returning its value."
+    # To make things easy, the global environment will be used if no
+    # environment is specified.
+    if None == environment:
+      environment = self._environment
+    counts, evaluate = self.counts, self.evaluate
+    ops, opargs, pc, env, outer = code.ops, code.args, 0, environment, ()
+    stack, frames, saved = [], [], []
+    push, pop = stack.append, stack.pop
+    while True:
+      op, arg = ops[pc], opargs[pc]
+      pc += 1
+      counts[op] += 1
+
+      if op == CONST:
+        push(arg)
+
+      elif op == LOAD_LOCAL:
+        push(env[arg])
+
+      elif op == LOAD_GLOBAL:
+        if arg.depth:
+          start = outer[arg.depth-1]
+        else:
+          start = env
+        version, environment, value = arg.entry
+        if version != Environment.version or environment() is not start:
+          version, symbol = Environment.version, arg.symbol
+          value = start.resolve(symbol)[symbol]
+          arg.entry = (version, ref(start), value)
+        push(value)
+
+      elif op == LOAD:
+        push(env.resolve(arg)[arg])
+
+      elif op == LOAD_OUTER:
+        depth, symbol = arg
+        push(outer[depth-1][symbol])
+
+      elif op == APPLY or op == APPLY_KEYS:
+        if op == APPLY:
+          keys, proc_name = arg
+          values = _pop_many(stack, len(keys))
+        else:
+          count, proc_name = arg
+          values = _pop_many(stack, count)
+          keys   = _pop_many(stack, count)
+        proc = pop()
+        args = Tuple(zip(keys, values))
+        if not callable(proc):
+          raise self.SyntaxError(
+            u"procedure is not callable: %s" % repr(proc_name))
+        # Procedures run in a new environment, and those with a haiku body
+        # in a new frame of this machine. Anything else, including subclasses
+        # of Procedure which may have their own calling convention, is called
+        # like `evaluate()` would:
+        if type(proc) is Procedure:
+          callee = proc.bind(args)
+          if callable(proc.body):
+            push(proc.body(evaluate, callee))
+          else:
+            frames.append((ops, opargs, pc, env, outer))
+            body, outer = self._body_code(proc)
+            ops, opargs, pc, env = body.ops, body.args, 0, callee
+        else:
+          push(proc(evaluate, args))
+
+      elif op == JUMP_IF_FALSE:
+        if not pop():
+          pc = arg
+
+      elif op == JUMP:
+        pc = arg
+
+      elif op == JUMP_IF_FALSE_OR_POP:
+        if stack[-1]:
+          pop()
+        else:
+          pc = arg
+
+      elif op == JUMP_IF_TRUE_OR_POP:
+        if stack[-1]:
+          pc = arg
+        else:
+          pop()
+
+      elif op == SPECIAL_GUARD:
+        proc_name, target = arg
+        if stack[-1] is dict.get(builtinEnvironment, proc_name):
+          pop()
+        else:
+          pc = target
+
+      elif op == SPECIAL or op == SPECIAL_KEYS:
+        if op == SPECIAL:
+          keys, proc_name = arg
+          values = _pop_many(stack, len(keys))
+        else:
+          count, proc_name = arg
+          values = _pop_many(stack, count)
+          keys   = _pop_many(stack, count)
+        proc = pop()
+        args = Tuple(zip(keys, values))
+        if not callable(proc):
+          raise self.SyntaxError(
+            u"procedure is not callable: %s" % repr(proc_name))
+        # The form is looked up again, as it may have been registered anew
+        # since the code was compiled:
+        form = special_form(proc_name)
+        if form is not None:
+          push(call_special_form(form, evaluate, proc, args, env))
+        else:
+          push(proc(evaluate, Tuple([(key, evaluate(value, env))
+                                     for key, value in args.iteritems()])))
+
+      elif op == REBIND:
+        env.rebind(zip(arg, _pop_many(stack, len(arg))))
+
+      elif op == ENTER_LOOP:
+        frame = LoopFrame(zip(arg, _pop_many(stack, len(arg))), env)
+        saved.append((env, outer))
+        outer = (env,) + tuple(outer)
+        env = frame
+
+      elif op == LEAVE_LOOP:
+        env, outer = saved.pop()
+
+      elif op == POP:
+        pop()
+
+      elif op == RETURN:
+        if not frames:
+          return pop()
+        ops, opargs, pc, env, outer = frames.pop()
+
+      elif op == BUILD:
+        cls, count = arg
+        push(cls(_pop_many(stack, count)))
+
+      elif op == ENTER_GLOBAL:
+        saved.append(env)
+        env = self._environment
+
+      elif op == LEAVE_GLOBAL:
+        env = saved.pop()
+
+      elif op == NATIVE:
+        push(arg(evaluate, env))
+
+      elif op == RAISE:
+        raise arg[0](*arg[1:])
+
+      else:
+        raise ValueError(u"invalid opcode: %r" % op)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
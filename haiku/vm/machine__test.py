@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.machine__test ----------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+# Python standard library, garbage collection
+import gc
+# Python standard library, object serialization
+import cPickle as pickle
+# Python standard library, unit-testing
+import unittest2
+
+# Haiku language, built-in primitives
+from haiku.builtin import builtinEnvironment
+# Haiku language, environment mapping
+from haiku.environment import Environment
+# Haiku language, interpreter
+from haiku.interpreter import BaseInterpreter
+# Haiku language, s-expression pickler
+from haiku.pickle import SimpleExpressionPickler
+# Haiku language, type hierarchy
+from haiku.types import *
+
+# Haiku language, virtual machine
+from haiku.vm import InlineCache, Machine
+
+class TestMachine(unittest2.TestCase):
+  """Test the virtual machine beyond the evaluation scenarios, which it is
+  run against by `EvaluateScenarioTest`."""
+  def setUp(self):
+    self.environment = Environment(parent=builtinEnvironment)
+    self.interpreter = BaseInterpreter(
+      pickler     = SimpleExpressionPickler(),
+      environment = self.environment)
+    self.machine = Machine(self.interpreter)
+
+  def test_disassemble(self):
+    code = self.machine.compile(Tuple([
+      (0, Symbol('+')),
+      (1, 1),
+      (2, (Symbol('x'), 2)),
+    ]))
+    self.assertEqual(code.disassemble(), [
+      ('LOAD_GLOBAL', InlineCache('+')),
+      ('CONST',  1),
+      ('LOAD_GLOBAL', InlineCache('x')),
+      ('CONST',  2),
+      ('BUILD',  (tuple, 2)),
+      ('APPLY',  ((1, 2), '+')),
+      ('RETURN', None),
+    ])
+
+  def test_disassemble_if(self):
+    # The branches of a conditional are jumped over, with the generic call
+    # of the special form as the fallback for when `if` is rebound:
+    code = self.machine.compile(self.interpreter.read(u'[if x 1]')[0])
+    self.assertEqual(code.disassemble(), [
+      ('LOAD_GLOBAL',   InlineCache('if')),
+      ('SPECIAL_GUARD', ('if', 8)),
+      ('LOAD_GLOBAL',   InlineCache('x')),
+      ('JUMP_IF_FALSE', 6),
+      ('CONST',         1),
+      ('JUMP',          11),
+      ('CONST',         None),
+      ('JUMP',          11),
+      ('CONST',         Symbol('x')),
+      ('CONST',         1),
+      ('SPECIAL',       ((1, 2), 'if')),
+      ('RETURN',        None),
+    ])
+
+  def test_counts(self):
+    self.machine.evaluate(self.interpreter.read(u'[+ 1 [* 2 3]]')[0])
+    self.assertEqual(self.machine.instruction_counts(), {
+      'LOAD_GLOBAL': 2, 'CONST': 3, 'APPLY': 2, 'RETURN': 1})
+    self.assertEqual(self.machine.instructions, 8)
+    self.machine.reset_counts()
+    self.assertEqual(self.machine.instructions, 0)
+
+  def test_global_keys(self):
+    self.environment[Symbol('one')] = 1
+    expression = Tuple([(0, Symbol('-')), (Symbol('one'), 5), (2, 3)])
+    local = Environment(parent=self.environment)
+    local[Symbol('one')] = 2
+    self.assertEqual(self.machine.evaluate(expression, local), 2)
+    self.assertEqual(
+      self.machine.evaluate(expression, local),
+      self.interpreter.evaluate(expression, local))
+
+  def test_deep_calls(self):
+    # A chain of procedures, each of which calls the next, deeper than the
+    # Python recursion limit allows recursion to go. The calls are in tail
+    # position, which `evaluate()` makes in constant stack as well:
+    depth = 10000
+    for index in xrange(depth):
+      if index:
+        body = Tuple([(0, Symbol('p%d' % (index-1)))])
+      else:
+        body = 42
+      self.environment[Symbol('p%d' % index)] = Procedure(
+        params      = Tuple(),
+        defaults    = Tuple(),
+        ellipsis    = False,
+        environment = self.environment,
+        body        = body)
+    expression = Tuple([(0, Symbol('p%d' % (depth-1)))])
+    self.assertEqual(self.interpreter.evaluate(expression), 42)
+    self.assertEqual(self.machine.evaluate(expression), 42)
+    self.assertEqual(self.machine.instruction_counts()['RETURN'], depth+1)
+
+  def quote(self, obj):
+    return Tuple([(0, Symbol('quote')), (1, obj)])
+
+  def test_lexical_addressing(self):
+    a, b, c = Symbol('a'), Symbol('b'), Symbol('c')
+    self.environment[c] = 100
+    # The frame of an enclosing procedure call, binding `a`:
+    outer = Environment(
+      params = Tuple([(a, IntegerCompatible)]),
+      args   = Tuple([(a, 5)]),
+      parent = self.environment)
+    self.environment[Symbol('inner')] = Procedure(
+      params      = Tuple([(b, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = False,
+      environment = outer,
+      body        = Tuple([(0, Symbol('+')), (1, a), (2, Tuple([
+        (0, Symbol('+')), (1, b), (2, c)]))]))
+    expression = Tuple([(0, Symbol('inner')), (self.quote(b), 2)])
+    self.assertEqual(self.interpreter.evaluate(expression), 107)
+    self.assertEqual(self.machine.evaluate(expression), 107)
+    counts = self.machine.instruction_counts()
+    self.assertEqual(counts['LOAD_LOCAL'], 1) # b
+    self.assertEqual(counts['LOAD_OUTER'], 1) # a
+    self.assertEqual(counts['LOAD_GLOBAL'], 5) # inner, quote, + twice, c
+
+  def test_lexical_addressing_ellipsis(self):
+    # Extra arguments may bind any symbol in the frame of a procedure taking
+    # an ellipsis, so only its parameters have lexical addresses:
+    a, b = Symbol('a'), Symbol('b')
+    self.environment[a] = 1
+    self.environment[Symbol('f')] = Procedure(
+      params      = Tuple([(b, IntegerCompatible)]),
+      defaults    = Tuple(),
+      ellipsis    = True,
+      environment = self.environment,
+      body        = Tuple([(0, Symbol('+')), (1, a), (2, b)]))
+    for args, result in [
+        ([(self.quote(b), 2)],                      3),
+        ([(self.quote(b), 2), (self.quote(a), 10)], 12)]:
+      expression = Tuple([(0, Symbol('f'))] + args)
+      self.assertEqual(self.interpreter.evaluate(expression), result)
+      self.assertEqual(self.machine.evaluate(expression), result)
+    counts = self.machine.instruction_counts()
+    self.assertEqual(counts['LOAD_LOCAL'], 2) # b
+    self.assertEqual(counts['LOAD'], 4)       # + and a, from the new frame
+
+  def test_inline_cache(self):
+    x = Symbol('x')
+    self.environment[x] = 1
+    code = self.machine.compile(Tuple([(0, Symbol('+')), (1, x), (2, 1)]))
+    self.assertEqual(self.machine.run(code), 2)
+    cache = code.args[0]
+    self.assertEqual(cache.entry[2], builtinEnvironment[Symbol('+')])
+    self.assertEqual(self.machine.run(code), 2)
+    self.assertTrue(cache.entry[2] is builtinEnvironment[Symbol('+')])
+    # Rebinding and shadowing invalidate the cached values:
+    self.environment[x] = 2
+    self.assertEqual(self.machine.run(code), 3)
+    self.environment[Symbol('+')] = builtinEnvironment[Symbol('-')]
+    self.assertEqual(self.machine.run(code), 1)
+    del self.environment[Symbol('+')]
+    self.assertEqual(self.machine.run(code), 3)
+    # ...as does starting from another environment:
+    local = Environment(parent=self.environment)
+    local[x] = 10
+    self.assertEqual(self.machine.run(code, local), 11)
+    # ...which the cache does not keep alive:
+    self.assertTrue(cache.entry[1]() is local)
+    del local
+    gc.collect()
+    self.assertTrue(cache.entry[1]() is None)
+    self.assertEqual(self.machine.run(code), 3)
+    # Cached values are not persisted:
+    copy = pickle.loads(pickle.dumps(code, pickle.HIGHEST_PROTOCOL))
+    self.assertEqual(copy.disassemble(), code.disassemble())
+    self.assertEqual(copy.args[0].entry, (None, None, None))
+
+  def test_errors(self):
+    for expression, exception in [
+        (Symbol('undefined'),        KeyError),
+        (Tuple([(1, 2)]),            SyntaxError),
+        (Tuple([(0, 2), (1, 2)]),    self.interpreter.SyntaxError),
+        (object(),                   ValueError)]:
+      self.assertRaises(exception, self.interpreter.evaluate, expression)
+      self.assertRaises(exception, self.machine.evaluate, expression)
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# === haiku.vm.opcodes ----------------------------------------------------===
+# Copyright © 2011-2012, RokuSigma Inc. and contributors. See AUTHORS for more
+# details.
+#
+# Some rights reserved.
+#
+# Redistribution and use in source and binary forms of the software as well as
+# documentation, with or without modification, are permitted provided that the
+# following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * The names of the copyright holders or contributors may not be used to
+#    endorse or promote products derived from this software without specific
+#    prior written permission.
+#
+# THIS SOFTWARE AND DOCUMENTATION IS PROVIDED BY THE COPYRIGHT HOLDERS AND
+# CONTRIBUTORS “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A
+# PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE AND
+# DOCUMENTATION, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# ===----------------------------------------------------------------------===
+
+"""The instruction set of the haiku virtual machine. Every instruction is an
+integer opcode paired with a single operand (`None` if unused), and a compiled
+expression is a `Code` object holding two parallel lists of them."""
+
+__all__ = [
+  'Code',
+  'InlineCache',
+  'OPNAMES',
+  'VERSION',
+  'CONST',
+  'LOAD',
+  'LOAD_LOCAL',
+  'LOAD_OUTER',
+  'LOAD_GLOBAL',
+  'BUILD',
+  'ENTER_GLOBAL',
+  'LEAVE_GLOBAL',
+  'APPLY',
+  'APPLY_KEYS',
+  'SPECIAL',
+  'SPECIAL_KEYS',
+  'SPECIAL_GUARD',
+  'JUMP',
+  'JUMP_IF_FALSE',
+  'JUMP_IF_FALSE_OR_POP',
+  'JUMP_IF_TRUE_OR_POP',
+  'ENTER_LOOP',
+  'LEAVE_LOOP',
+  'REBIND',
+  'POP',
+  'NATIVE',
+  'RAISE',
+  'RETURN',
+]
+
+# ===----------------------------------------------------------------------===
+
+# The version of the instruction set and of the compiler's output, to be bumped
+# whenever either changes so that persisted `Code` is not run by a machine
+# which would misinterpret it.
+VERSION = 5
+
+OPNAMES = (
+  'CONST',        # push the operand
+  'LOAD',         # push the value the operand (a symbol) is bound to
+  'LOAD_LOCAL',   # ditto, from the frame of the running procedure
+  'LOAD_OUTER',   # ditto for operand[1], from the operand[0]'th outer frame
+  'LOAD_GLOBAL',  # ditto for operand.symbol, through an InlineCache
+  'BUILD',        # pop operand[1] values, push operand[0](values)
+  'ENTER_GLOBAL', # save the current environment, switch to the global one
+  'LEAVE_GLOBAL', # restore the environment saved by ENTER_GLOBAL
+  'APPLY',        # pop len(operand[0]) values and a procedure, push the call
+  'APPLY_KEYS',   # pop operand[0] values, as many keys and a procedure, ditto
+  'SPECIAL',      # as APPLY, but pass the unevaluated values to the special
+                  # form registered for operand[1]
+  'SPECIAL_KEYS', # as APPLY_KEYS, ditto
+  'SPECIAL_GUARD',# pop the procedure on top of the stack if it is the builtin
+                  # bound to operand[0], else jump to operand[1]
+  'JUMP',         # continue at the operand
+  'JUMP_IF_FALSE',# pop a value, and if it is false continue at the operand
+  'JUMP_IF_FALSE_OR_POP', # if the top value is false continue at the
+                  # operand, else pop it
+  'JUMP_IF_TRUE_OR_POP',  # if the top value is true continue at the operand,
+                  # else pop it
+  'ENTER_LOOP',   # pop len(operand) values, and bind the symbols of the
+                  # operand to them in a new LoopFrame, entering it
+  'LEAVE_LOOP',   # return to the environment ENTER_LOOP entered from
+  'REBIND',       # pop len(operand) values, and rebind the symbols of the
+                  # operand to them in the current LoopFrame
+  'POP',          # pop a value and discard it
+  'NATIVE',       # push operand(evaluate, environment)
+  'RAISE',        # raise operand[0](*operand[1:])
+  'RETURN',       # pop a value and return it to the calling frame
+)
+
+(CONST, LOAD, LOAD_LOCAL, LOAD_OUTER, LOAD_GLOBAL, BUILD, ENTER_GLOBAL,
+ LEAVE_GLOBAL, APPLY, APPLY_KEYS, SPECIAL, SPECIAL_KEYS, SPECIAL_GUARD, JUMP,
+ JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP, ENTER_LOOP,
+ LEAVE_LOOP, REBIND, POP, NATIVE, RAISE, RETURN) = range(len(OPNAMES))
+
+class InlineCache(object):
+  """The operand of a LOAD_GLOBAL instruction: a symbol, the depth of the
+  frame its resolution starts from (as for LOAD_OUTER, with zero for the
+  current environment), and the value it was last resolved to. That value
+  stands for as long as `Environment.version` is unchanged and resolution
+  starts from the same environment, which is one comparison of each. The
+  environment is held by a weak reference, so that code which outlives it,
+  such as the cached bodies of procedures, does not keep it alive."""
+  __slots__ = ('symbol', 'depth', 'entry')
+
+  def __init__(self, symbol, depth=0):
+    self.symbol, self.depth = symbol, depth
+    # The version, weak reference to the starting environment and value,
+    # replaced all at once so that concurrent threads never see a mixture of
+    # two entries:
+    self.entry = (None, None, None)
+
+  def __reduce__(self):
+    # The cached value belongs to the environments of this process, and is
+    # never persisted along with the instruction:
+    return (InlineCache, (self.symbol, self.depth))
+
+  def __eq__(self, other):
+    return (isinstance(other, InlineCache) and
+            (self.symbol, self.depth) == (other.symbol, other.depth))
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __repr__(self):
+    return 'InlineCache(%r, %d)' % (self.symbol, self.depth)
+
+class Code(object):
+  "A compiled haiku expression, as parallel lists of opcodes and operands."
+  __slots__ = ('ops', 'args')
+
+  def __init__(self, ops=None, args=None):
+    self.ops  = ops  or []
+    self.args = args or []
+
+  def emit(self, op, arg=None):
+    "Append one instruction."
+    self.ops.append(op)
+    self.args.append(arg)
+
+  def __len__(self):
+    return len(self.ops)
+
+  def disassemble(self):
+    "Returns a list of `(name, operand)` pairs, one per instruction."
+    return [(OPNAMES[op], arg) for op, arg in zip(self.ops, self.args)]
+
+# ===----------------------------------------------------------------------===
+# End of File
+# ===----------------------------------------------------------------------===
@@ -79,7 +79,6 @@ setup(name='haiku-lang',
   description='An embedable LISP implemented on top of the Python interpreter.',
   install_requires=[
     'LEPL>=5.1.1',
-    'bitstring>=3.0.2',
     'python-patterns>=0.0.1',
   ],
   author='RokuSigma Inc.',